@@ -1,11 +1,13 @@
 from __future__ import annotations
 
 import os
-from dotenv import load_dotenv
-from flask import Flask, render_template
+from flask import Flask, jsonify, render_template
 from flask_cors import CORS
+from pymongo.errors import ConnectionFailure
+from werkzeug.exceptions import HTTPException
 
-from .utils.db import ensure_indexes
+from .repositories import STORAGE_BACKEND
+from .utils.db import DatabaseUnavailable, db_breaker, ensure_indexes, get_startup_mode
 from .routes.tasks import bp as tasks_bp
 from .routes.sessions import bp as sessions_bp
 from .routes.moods import bp as moods_bp
@@ -14,8 +16,16 @@ from .routes.stats import bp as stats_bp
 from .routes.status import bp as status_bp
 from .routes.calendar import bp as calendar_bp
 from .routes.music import bp as music_bp
-
-load_dotenv()
+from .routes.media import bp as media_bp
+from .routes.metrics import bp as metrics_bp
+from .routes.debug import bp as debug_bp
+from .routes.events import bp as events_bp
+from .utils.compression import init_compression
+from .utils.events import events_enabled, init_events
+from .utils.json_provider import BSONJSONProvider
+from .utils.metrics import init_metrics
+from .utils.media import send_media
+from .utils.session_archive import archiver
 
 
 def create_app() -> Flask:
@@ -33,6 +43,9 @@ def create_app() -> Flask:
         static_folder=static_path,
     )
 
+    # ObjectId/datetime-aware JSON, encoded with orjson when installed
+    app.json = BSONJSONProvider(app)
+
     # Enable CORS for production deployment
     CORS(app, resources={
         r"/*": {
@@ -42,13 +55,37 @@ def create_app() -> Flask:
         }
     })
 
-    @app.route('/static/<path:filename>')
+    # Per-route latency histograms, Mongo command attribution and
+    # Server-Timing headers. Registered before compression so the timing
+    # includes it (after_request hooks run in reverse order).
+    init_metrics(app)
+    init_events(app)
+
+    # gzip/brotli for JSON responses; text assets are precompressed once
+    # (at startup in eager mode, on first hit in lazy mode).
+    precompressor = init_compression(app, warm=get_startup_mode() == "eager")
+
     def custom_static(filename):
+        if filename.startswith("media/"):
+            # Audio gets ETag/Range handling from the mapped media store.
+            return send_media(filename[len("media/"):])
+        asset = precompressor.get(filename)
+        if asset is not None:
+            return asset.to_response()
         return app.send_static_file(filename)
 
-    # Initialize DB indexes
+    # Flask registers its own "static" rule first, so a second route on the
+    # same path never matches. Replace the view instead; url_for("static")
+    # keeps working.
+    app.view_functions["static"] = custom_static
+
+    # Initialize DB indexes. In lazy startup mode (the serverless default)
+    # this is deferred to the first get_db() call and skipped entirely when
+    # the stored index version marker is current. (.env is loaded by utils.db.)
+    # The SQLite backend creates its tables and indexes on first connect.
     try:
-        ensure_indexes()
+        if get_startup_mode() == "eager" and STORAGE_BACKEND == "mongo":
+            ensure_indexes()
     except Exception as e:
         print(f"⚠️  Warning: Could not initialize MongoDB indexes: {e}")
         print("  The app will continue but database features may not work.")
@@ -63,10 +100,19 @@ def create_app() -> Flask:
     app.register_blueprint(status_bp)
     app.register_blueprint(calendar_bp)
     app.register_blueprint(music_bp, url_prefix="/api")
+    app.register_blueprint(media_bp)
+    app.register_blueprint(metrics_bp)
+    app.register_blueprint(debug_bp)
+    app.register_blueprint(events_bp)
+
+    # Roll sessions past SESSION_ARCHIVE_DAYS up into monthly summaries
+    # every SESSION_ARCHIVE_INTERVAL seconds (on serverless, run
+    # python -m backend.utils.session_archive from a cron job instead).
+    archiver.start()
 
     @app.route("/")
     def index():
-        return render_template("index.html")
+        return render_template("index.html", live_updates=events_enabled())
     
     @app.route("/favicon.ico")
     def favicon():
@@ -82,9 +128,29 @@ def create_app() -> Flask:
             "traceback": traceback.format_exc()
         }), 500
 
+    @app.errorhandler(DatabaseUnavailable)
+    @app.errorhandler(ConnectionFailure)
+    def database_unavailable(e):
+        # A driver-level failure mid-request trips the breaker so the
+        # following requests fail fast instead of each waiting on timeouts.
+        if not isinstance(e, DatabaseUnavailable):
+            db_breaker.record_failure(e)
+        retry_after = max(1, int(db_breaker.retry_after() + 0.999))
+        resp = jsonify({
+            "error": "Service Unavailable",
+            "message": "Database is temporarily unavailable",
+            "breaker": db_breaker.snapshot(),
+        })
+        resp.status_code = 503
+        resp.headers["Retry-After"] = str(retry_after)
+        return resp
+
     @app.errorhandler(Exception)
     def handle_exception(e):
         import traceback
+        if isinstance(e, HTTPException):
+            # Let 404/405/416 etc. keep their status codes.
+            return e
         return jsonify({
             "error": "Unhandled Exception",
             "message": str(e),
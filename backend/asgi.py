@@ -0,0 +1,309 @@
+"""
+ASGI entry point.
+
+    uvicorn backend.asgi:app --workers 4
+
+The read-heavy GET endpoints (galaxy data, tasks, stats, calendar) are
+served by async views that overlap their MongoDB queries, and the
+/api/events stream waits on the event loop; every other route falls
+through to the Flask app, run in a worker thread.
+"""
+from __future__ import annotations
+
+import asyncio
+import io
+import sys
+import traceback
+from typing import IO, Any, Dict, List, Tuple
+from urllib.parse import parse_qsl
+
+from pymongo.errors import ConnectionFailure
+from werkzeug.datastructures import MultiDict
+from werkzeug.http import parse_etags, quote_etag
+
+from .app import app as flask_app
+from .repositories import STORAGE_BACKEND
+from .routes.async_views import ROUTES
+from .utils.async_db import close_async_clients
+from .utils.compression import COMPRESS_MIN_SIZE, compress, negotiate_encoding
+from .utils.conditional import CONDITIONAL_CACHE_CONTROL
+from .utils.db import DatabaseUnavailable, db_breaker, get_default_user_id
+from .utils.events import events_enabled, hub
+from .utils.metrics import begin_request, end_request
+from .utils.single_flight import async_flight, single_flight_requests
+
+Headers = List[Tuple[bytes, bytes]]
+
+EVENTS_PATH = "/api/events"
+
+
+def _header(scope: Dict[str, Any], name: bytes) -> str | None:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+def _blueprint(endpoint: str) -> str:
+    return endpoint.split(".", 1)[0] if "." in endpoint else "app"
+
+
+class _ReceiveStream(io.RawIOBase):
+    """
+    Request body for the WSGI side, pulled from ASGI receive() as the app
+    reads it, so large uploads (galaxy import) aren't buffered in memory.
+    """
+
+    def __init__(self, receive, loop: asyncio.AbstractEventLoop) -> None:
+        self._receive = receive
+        self._loop = loop
+        self._buf = b""
+        self._done = False
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        while not self._buf and not self._done:
+            message = asyncio.run_coroutine_threadsafe(self._receive(), self._loop).result()
+            self._buf = message.get("body", b"")
+            self._done = not message.get("more_body")
+        n = min(len(b), len(self._buf))
+        b[:n] = self._buf[:n]
+        self._buf = self._buf[n:]
+        return n
+
+
+class ASGIApp:
+    def __init__(self, wsgi_app, routes) -> None:
+        self.wsgi_app = wsgi_app
+        self.routes = routes
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            raise RuntimeError(f"Unsupported ASGI scope type: {scope['type']}")
+        if scope["method"] == "GET" and scope["path"] == EVENTS_PATH:
+            await self._call_events(scope, receive, send)
+            return
+        route = self.routes.get((scope["method"], scope["path"]))
+        if route is None:
+            await self._call_wsgi(scope, receive, send)
+        else:
+            await self._call_async(route, scope, send)
+
+    async def _lifespan(self, receive, send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                close_async_clients()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    # ------------------------------------------------------------ async views
+
+    async def _call_async(self, route, scope, send) -> None:
+        endpoint, view, conditional = route
+        stats = begin_request(endpoint)
+        args = MultiDict(parse_qsl(scope["query_string"].decode("latin-1"), keep_blank_values=True))
+        headers: Headers = []
+        etag = None
+        try:
+            if conditional is None:
+                status, data = 200, await view(args)
+            else:
+                # Version lookup is a sync pymongo read; keep it off the loop.
+                key = await asyncio.to_thread(conditional.key, get_default_user_id(), args)
+                etag = conditional.etag_for_key(key)
+                if parse_etags(_header(scope, b"if-none-match")).contains_weak(etag):
+                    await self._send_not_modified(etag, endpoint, stats, scope, send)
+                    return
+                # Concurrent identical requests share one run of the view.
+                data, shared = await async_flight.do(key, lambda: view(args))
+                single_flight_requests.inc(view=conditional.name, role="coalesced" if shared else "leader")
+                status = 200
+        except (DatabaseUnavailable, ConnectionFailure) as e:
+            # Same contract as the Flask handler: trip the breaker on driver
+            # errors and tell clients when to come back.
+            if not isinstance(e, DatabaseUnavailable):
+                db_breaker.record_failure(e)
+            retry_after = max(1, int(db_breaker.retry_after() + 0.999))
+            status, data = 503, {
+                "error": "Service Unavailable",
+                "message": "Database is temporarily unavailable",
+                "breaker": db_breaker.snapshot(),
+            }
+            headers.append((b"retry-after", str(retry_after).encode()))
+        except Exception as e:
+            status, data = 500, {
+                "error": "Unhandled Exception",
+                "message": str(e),
+                "traceback": traceback.format_exc(),
+            }
+
+        body = flask_app.json.dumps_bytes(data) + b"\n"
+        headers += [
+            (b"content-type", b"application/json"),
+            (b"vary", b"Accept-Encoding"),
+            (b"access-control-allow-origin", b"*"),
+        ]
+        encoding = None
+        if status == 200 and len(body) >= COMPRESS_MIN_SIZE:
+            encoding = negotiate_encoding(_header(scope, b"accept-encoding") or "")
+            if encoding is not None:
+                body = compress(body, encoding)
+                headers.append((b"content-encoding", encoding.encode()))
+        if status == 200 and etag is not None:
+            # Weak when encoded, matching the Flask compression hook.
+            headers.append((b"etag", quote_etag(etag, weak=encoding is not None).encode()))
+            headers.append((b"cache-control", CONDITIONAL_CACHE_CONTROL.encode()))
+        headers.append((b"content-length", str(len(body)).encode()))
+        timing = end_request(stats, _blueprint(endpoint), scope["method"], status)
+        headers.append((b"server-timing", timing.encode()))
+
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": body if scope["method"] != "HEAD" else b""})
+
+    async def _send_not_modified(self, etag: str, endpoint: str, stats, scope, send) -> None:
+        timing = end_request(stats, _blueprint(endpoint), scope["method"], 304)
+        headers = [
+            (b"etag", quote_etag(etag).encode()),
+            (b"cache-control", CONDITIONAL_CACHE_CONTROL.encode()),
+            (b"vary", b"Accept-Encoding"),
+            (b"access-control-allow-origin", b"*"),
+            (b"server-timing", timing.encode()),
+        ]
+        await send({"type": "http.response.start", "status": 304, "headers": headers})
+        await send({"type": "http.response.body", "body": b""})
+
+    # ------------------------------------------------------------ event stream
+
+    async def _call_events(self, scope, receive, send) -> None:
+        """
+        GET /api/events without the WSGI bridge: the bridge would pin an
+        executor thread per open stream, here an idle stream is just a
+        coroutine waiting on its subscription.
+        """
+        stats = begin_request("events.event_stream")
+        headers: Headers = [(b"access-control-allow-origin", b"*")]
+        if not events_enabled():
+            status, body = 204, b""
+        else:
+            last_event_id = _header(scope, b"last-event-id")
+            sub = hub.subscribe(get_default_user_id(), last_event_id, asyncio.get_running_loop())
+            if sub is not None:
+                await self._stream_events(sub, stats, headers, receive, send)
+                return
+            status, body = 503, flask_app.json.dumps_bytes({"error": "Too many event streams"}) + b"\n"
+            headers += [(b"content-type", b"application/json"), (b"retry-after", b"30")]
+        headers.append((b"content-length", str(len(body)).encode()))
+        headers.append((b"server-timing", end_request(stats, "events", "GET", status).encode()))
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+    async def _stream_events(self, sub, stats, headers: Headers, receive, send) -> None:
+        headers += [
+            (b"content-type", b"text/event-stream; charset=utf-8"),
+            (b"cache-control", b"no-cache"),
+            (b"x-accel-buffering", b"no"),
+            (b"server-timing", end_request(stats, "events", "GET", 200).encode()),
+        ]
+
+        async def pump() -> None:
+            await send({"type": "http.response.start", "status": 200, "headers": headers})
+            async for chunk in hub.astream(sub):
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            await send({"type": "http.response.body", "body": b""})
+
+        async def disconnected() -> None:
+            while (await receive())["type"] != "http.disconnect":
+                pass
+
+        # Heartbeats only notice a gone client every EVENTS_HEARTBEAT
+        # seconds; watching receive() frees the subscription right away.
+        tasks = [asyncio.ensure_future(pump()), asyncio.ensure_future(disconnected())]
+        try:
+            await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            if tasks[0].done():
+                tasks[0].result()
+        finally:
+            for task in tasks:
+                task.cancel()
+            hub.unsubscribe(sub)
+
+    # ------------------------------------------------------------ WSGI bridge
+
+    def _environ(self, scope, body: IO[bytes]) -> Dict[str, Any]:
+        server = scope.get("server") or ("localhost", 80)
+        client = scope.get("client") or ("", 0)
+        environ: Dict[str, Any] = {
+            "REQUEST_METHOD": scope["method"],
+            "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin-1"),
+            "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+            "QUERY_STRING": scope["query_string"].decode("latin-1"),
+            "SERVER_NAME": server[0],
+            "SERVER_PORT": str(server[1]),
+            "REMOTE_ADDR": client[0],
+            "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+            "wsgi.version": (1, 0),
+            "wsgi.url_scheme": scope.get("scheme", "http"),
+            "wsgi.input": body,
+            "wsgi.input_terminated": True,
+            "wsgi.errors": sys.stderr,
+            "wsgi.multithread": True,
+            "wsgi.multiprocess": True,
+            "wsgi.run_once": False,
+        }
+        for key, value in scope["headers"]:
+            name = key.decode("latin-1").upper().replace("-", "_")
+            value = value.decode("latin-1")
+            if name == "CONTENT_TYPE" or name == "CONTENT_LENGTH":
+                environ[name] = value
+                continue
+            name = f"HTTP_{name}"
+            environ[name] = f"{environ[name]},{value}" if name in environ else value
+        return environ
+
+    async def _call_wsgi(self, scope, receive, send) -> None:
+        body = io.BufferedReader(_ReceiveStream(receive, asyncio.get_running_loop()))
+        started: Dict[str, Any] = {}
+
+        def start_response(status: str, headers, exc_info=None):
+            started["status"] = int(status.split(" ", 1)[0])
+            started["headers"] = [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in headers]
+            return lambda data: None  # write() is not used by Flask
+
+        iterable = await asyncio.to_thread(self.wsgi_app, self._environ(scope, body), start_response)
+        try:
+            if isinstance(iterable, (list, tuple)):
+                chunks = iterable
+            else:
+                chunks = None
+                iterator = iter(iterable)
+            await send({"type": "http.response.start", "status": started["status"], "headers": started["headers"]})
+            if chunks is not None:
+                for chunk in chunks:
+                    if chunk:
+                        await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            else:
+                # Streamed bodies (media) are pulled chunk by chunk off-loop.
+                while True:
+                    chunk = await asyncio.to_thread(next, iterator, None)
+                    if chunk is None:
+                        break
+                    if chunk:
+                        await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            await send({"type": "http.response.body", "body": b""})
+        finally:
+            close = getattr(iterable, "close", None)
+            if close is not None:
+                await asyncio.to_thread(close)
+
+
+# The async views query MongoDB directly; other storage backends serve
+# every route through the Flask app.
+app = ASGIApp(flask_app.wsgi_app, ROUTES if STORAGE_BACKEND == "mongo" else {})
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import os
+import threading
+from dataclasses import dataclass
+from typing import Callable
+
+from .base import (
+    CalendarRepository, CelestialRepository, MoodRepository, RollupRepository, SessionRepository, TaskRepository,
+    VersionRepository,
+)
+
+
+# Which engine the routes store data in: "mongo" (MONGODB_URI) or
+# "sqlite" (a local file at SQLITE_PATH, for single-node installs).
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "mongo").lower()
+
+
+@dataclass
+class Repositories:
+    engine: str
+    tasks: TaskRepository
+    calendar: CalendarRepository
+    sessions: SessionRepository
+    rollups: RollupRepository
+    celestial: CelestialRepository
+    moods: MoodRepository
+    versions: VersionRepository
+    ping: Callable[[], None]
+
+
+def mongo_repositories() -> Repositories:
+    from ..utils.db import get_db
+    from . import mongo
+
+    return Repositories(
+        engine="mongo",
+        tasks=mongo.MongoTaskRepository(),
+        calendar=mongo.MongoCalendarRepository(),
+        sessions=mongo.MongoSessionRepository(),
+        rollups=mongo.MongoRollupRepository(),
+        celestial=mongo.MongoCelestialRepository(),
+        moods=mongo.MongoMoodRepository(),
+        versions=mongo.MongoVersionRepository(),
+        ping=lambda: get_db().command("ping"),
+    )
+
+
+def sqlite_repositories(path: str | None = None) -> Repositories:
+    from . import sqlite
+
+    store = sqlite.SQLiteStore(path or sqlite.SQLITE_PATH)
+    return Repositories(
+        engine="sqlite",
+        tasks=sqlite.SQLiteTaskRepository(store),
+        calendar=sqlite.SQLiteCalendarRepository(store),
+        sessions=sqlite.SQLiteSessionRepository(store),
+        rollups=sqlite.SQLiteRollupRepository(store),
+        celestial=sqlite.SQLiteCelestialRepository(store),
+        moods=sqlite.SQLiteMoodRepository(store),
+        versions=sqlite.SQLiteVersionRepository(store),
+        ping=store.ping,
+    )
+
+
+ENGINES = {"mongo": mongo_repositories, "sqlite": sqlite_repositories}
+
+_repositories: Repositories | None = None
+_lock = threading.Lock()
+
+
+def get_repositories() -> Repositories:
+    global _repositories
+    if _repositories is None:
+        with _lock:
+            if _repositories is None:
+                if STORAGE_BACKEND not in ENGINES:
+                    raise RuntimeError(f"Unknown STORAGE_BACKEND {STORAGE_BACKEND!r} (expected mongo or sqlite)")
+                _repositories = ENGINES[STORAGE_BACKEND]()
+                print(f"✓ Storage backend: {_repositories.engine}")
+    return _repositories
@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Sequence, Tuple
+
+Doc = Dict[str, Any]
+
+
+def task_args(args: Mapping[str, Any]) -> Tuple[str | None, bool | None]:
+    """
+    (category, completed) filters from GET /tasks query params.
+    """
+    completed = args.get("completed")
+    return args.get("category"), None if completed is None else completed == "true"
+
+
+# The contract both storage engines implement. Documents go in and come
+# out Mongo-shaped ({"_id": ..., field: value}) so serializers and routes
+# don't care which engine is behind them; ids are ObjectId hex strings
+# either way. projection is a hint: engines may return extra fields.
+
+
+class TaskRepository(ABC):
+    @abstractmethod
+    def list(self, user_id: str, category: str | None = None, completed: bool | None = None,
+             projection: Mapping[str, Any] | None = None) -> List[Doc]:
+        """Tasks sorted by date (newest first), then due time, then newest created."""
+
+    @abstractmethod
+    def get(self, user_id: str, task_id: str) -> Doc | None:
+        ...
+
+    @abstractmethod
+    def create(self, doc: Doc) -> str:
+        ...
+
+    @abstractmethod
+    def update(self, user_id: str, task_id: str, fields: Doc) -> bool:
+        ...
+
+    @abstractmethod
+    def delete(self, user_id: str, task_id: str) -> bool:
+        ...
+
+    @abstractmethod
+    def count(self, user_id: str, completed: bool | None = None) -> int:
+        ...
+
+
+class CalendarRepository(ABC):
+    @abstractmethod
+    def list(self, user_id: str, month: Any = None, year: Any = None,
+             projection: Mapping[str, Any] | None = None) -> List[Doc]:
+        """Events (optionally of one month) sorted by date and time."""
+
+    @abstractmethod
+    def create(self, doc: Doc) -> str:
+        ...
+
+    @abstractmethod
+    def delete(self, user_id: str, event_id: str) -> bool:
+        ...
+
+
+class SessionRepository(ABC):
+    @abstractmethod
+    def create(self, doc: Doc) -> str:
+        ...
+
+    @abstractmethod
+    def between(self, user_id: str, generation: int, start: datetime, end: datetime,
+                projection: Mapping[str, Any] | None = None) -> List[Doc]:
+        """Sessions started in [start, end], oldest first."""
+
+    @abstractmethod
+    def started_since(self, user_id: str, generation: int, since: datetime) -> List[Doc]:
+        """started_at and duration_minutes of sessions started at or after since."""
+
+    @abstractmethod
+    def totals(self, user_id: str, generation: int, since: datetime | None = None) -> Tuple[int, float]:
+        """(session count, total focus minutes), of sessions started at or after since if given."""
+
+    @abstractmethod
+    def oldest_started(self, user_id: str, generation: int, since: datetime | None = None) -> datetime | None:
+        """started_at of the oldest session (started at or after since if given)."""
+
+    @abstractmethod
+    def users_started_before(self, before: datetime) -> List[str]:
+        """Users with any session started before before."""
+
+    @abstractmethod
+    def delete_started_before(self, user_id: str, generation: int, before: datetime, limit: int) -> int:
+        """Delete up to limit sessions started before before; returns how many."""
+
+    @abstractmethod
+    def delete_before_generation(self, user_id: str, generation: int, limit: int) -> int:
+        """Delete up to limit sessions from older generations; returns how many."""
+
+
+class CelestialRepository(ABC):
+    """
+    Stars come back with x/y filled in by utils.spiral.place_stars:
+    spiral stars store only their index, and dragged stars' positions
+    live in a per-generation override map.
+    """
+
+    @abstractmethod
+    def list(self, user_id: str, generation: int, projection: Mapping[str, Any] | None = None) -> List[Doc]:
+        """Stars oldest first."""
+
+    @abstractmethod
+    def count(self, user_id: str, generation: int) -> int:
+        ...
+
+    @abstractmethod
+    def max_spiral_index(self, user_id: str, generation: int) -> int | None:
+        """The highest spiral_index in the galaxy; None when no star has one."""
+
+    @abstractmethod
+    def batches(self, user_id: str, generation: int, projection: Mapping[str, Any] | None = None,
+                batch_size: int = 1000) -> Iterator[List[Doc]]:
+        """Stars oldest first, batch_size at a time, without holding the galaxy in memory."""
+
+    @abstractmethod
+    def find(self, user_id: str, generation: int, ids: Iterable[str]) -> List[Doc]:
+        """The stars with the given ids (in no particular order); unknown ids are skipped."""
+
+    @abstractmethod
+    def created_range(self, user_id: str, generation: int) -> Tuple[datetime, datetime] | None:
+        """created_at of the oldest and newest star; None when there are none."""
+
+    @abstractmethod
+    def create(self, doc: Doc) -> str:
+        ...
+
+    @abstractmethod
+    def create_many(self, docs: Sequence[Doc]) -> List[str]:
+        """Insert docs, setting each doc's "_id"; returns the ids."""
+
+    @abstractmethod
+    def delete(self, user_id: str, generation: int, ids: Iterable[str]) -> int:
+        ...
+
+    @abstractmethod
+    def move_many(self, user_id: str, generation: int, moves: Mapping[str, Tuple[float, float]]) -> List[str]:
+        """Record dragged positions in the override map; returns the ids of existing stars that moved."""
+
+    @abstractmethod
+    def overrides(self, user_id: str, generation: int) -> Dict[str, Tuple[float, float]]:
+        """Dragged positions by star id."""
+
+    @abstractmethod
+    def positions(self, user_id: str, generation: int) -> List[Doc]:
+        """{"_id", "x", "y"} per star."""
+
+    @abstractmethod
+    def delete_before_generation(self, user_id: str, generation: int, limit: int) -> int:
+        ...
+
+    @abstractmethod
+    def save_stats(self, user_id: str, stats: Doc) -> None:
+        """Replace the user's galaxy_stats record."""
+
+
+class RollupRepository(ABC):
+    """
+    Monthly summaries of archived sessions (see utils.session_archive),
+    one per (user_id, generation, month).
+    """
+
+    @abstractmethod
+    def list(self, user_id: str, generation: int) -> List[Doc]:
+        """Rollups oldest month first."""
+
+    @abstractmethod
+    def save(self, doc: Doc) -> None:
+        """Insert or replace the rollup for doc's (user_id, generation, month)."""
+
+    @abstractmethod
+    def delete_before_generation(self, user_id: str, generation: int, limit: int) -> int:
+        ...
+
+
+class MoodRepository(ABC):
+    @abstractmethod
+    def list(self) -> List[Doc]:
+        """Moods in display order."""
+
+    @abstractmethod
+    def upsert(self, mood: Doc) -> None:
+        """Insert or update a mood by its key."""
+
+
+class VersionRepository(ABC):
+    """
+    Per-user counters: one write version per collection, plus the galaxy
+    generation and the last generation the reaper finished.
+    """
+
+    @abstractmethod
+    def get(self, user_id: str) -> Dict[str, int]:
+        ...
+
+    @abstractmethod
+    def bump(self, user_id: str, collections: Sequence[str]) -> None:
+        ...
+
+    @abstractmethod
+    def start_generation(self, user_id: str, collections: Sequence[str]) -> int:
+        """Atomically increment the generation and bump collections; returns the new generation."""
+
+    @abstractmethod
+    def pending_reaps(self) -> List[Tuple[str, int]]:
+        """(user_id, generation) for users whose old generations still need deleting."""
+
+    @abstractmethod
+    def mark_reaped(self, user_id: str, generation: int) -> None:
+        ...
@@ -0,0 +1,348 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, Dict, Iterable, Tuple
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import ReturnDocument
+
+from ..utils.db import get_db
+from ..utils.spiral import place_stars
+from .base import (
+    CalendarRepository, CelestialRepository, MoodRepository, RollupRepository, SessionRepository, TaskRepository,
+    VersionRepository, task_args,
+)
+
+
+# One small document per user: {_id: user_id, <collection>: <write count>,
+# generation, reaped_generation}.
+VERSIONS_COLLECTION = "user_versions"
+
+TASK_SORT = [("date", -1), ("due_at", 1), ("created_at", -1)]
+EVENT_SORT = [("date", 1), ("time", 1)]
+
+
+def task_filter(user_id: str, category: str | None = None, completed: bool | None = None) -> Dict[str, Any]:
+    query: Dict[str, Any] = {"user_id": user_id}
+    if category and category != "all":
+        query["category"] = category
+    if completed is not None:
+        query["completed"] = completed
+    return query
+
+
+def task_query(user_id: str, args) -> Dict[str, Any]:
+    """
+    Filter for GET /tasks from its query params (category, completed).
+    """
+    return task_filter(user_id, *task_args(args))
+
+
+def month_query(user_id: str, month: Any = None, year: Any = None) -> Dict[str, Any]:
+    query: Dict[str, Any] = {"user_id": user_id}
+    if month and year:
+        # dates are stored as YYYY-MM-DD strings
+        query["date"] = {"$regex": f"^{year}-{str(month).zfill(2)}-"}
+    return query
+
+
+def generation_clause(generation: int) -> Dict[str, Any]:
+    # Documents from before generations existed have no field: generation 0.
+    if generation == 0:
+        return {"generation": {"$in": [None, 0]}}
+    return {"generation": generation}
+
+
+def _scope(user_id: str, generation: int) -> Dict[str, Any]:
+    return {"user_id": user_id, **generation_clause(generation)}
+
+
+def rollup_query(user_id: str, generation: int) -> Dict[str, Any]:
+    # Rollups are always written with an explicit generation.
+    return {"user_id": user_id, "generation": generation}
+
+
+def sessions_since(user_id: str, generation: int, since: datetime | None) -> Dict[str, Any]:
+    query = _scope(user_id, generation)
+    if since is not None:
+        query["started_at"] = {"$gte": since}
+    return query
+
+
+def _layout_filter(user_id: str, generation: int) -> Dict[str, Any]:
+    # The override map: {user_id, generation, kind: "overrides",
+    # overrides: {star_id: [x, y]}}, one document per generation.
+    return {"user_id": user_id, "generation": generation, "kind": "overrides"}
+
+
+def overrides_query(user_id: str, generation: int) -> Dict[str, Any]:
+    return {**_layout_filter(user_id, generation), **generation_clause(generation)}
+
+
+def merge_overrides(docs: Iterable[Dict[str, Any]]) -> Dict[str, Tuple[float, float]]:
+    # An import can add a second map for the same generation; merge them.
+    out = {}
+    for doc in docs:
+        for star_id, (x, y) in (doc.get("overrides") or {}).items():
+            out[star_id] = (x, y)
+    return out
+
+
+def _oid(value: str) -> ObjectId | None:
+    try:
+        return ObjectId(value)
+    except (InvalidId, TypeError):
+        return None
+
+
+def _delete_batch(collection, query: Dict[str, Any], limit: int) -> int:
+    ids = [d["_id"] for d in collection.find(query, {"_id": 1}).limit(limit)]
+    if not ids:
+        return 0
+    return collection.delete_many({"_id": {"$in": ids}}).deleted_count
+
+
+class MongoTaskRepository(TaskRepository):
+    def list(self, user_id, category=None, completed=None, projection=None):
+        return list(get_db().tasks.find(task_filter(user_id, category, completed), projection).sort(TASK_SORT))
+
+    def get(self, user_id, task_id):
+        oid = _oid(task_id)
+        return get_db().tasks.find_one({"_id": oid, "user_id": user_id}) if oid else None
+
+    def create(self, doc):
+        return str(get_db().tasks.insert_one(doc).inserted_id)
+
+    def update(self, user_id, task_id, fields):
+        oid = _oid(task_id)
+        return bool(oid) and get_db().tasks.update_one({"_id": oid, "user_id": user_id}, {"$set": fields}).matched_count > 0
+
+    def delete(self, user_id, task_id):
+        oid = _oid(task_id)
+        return bool(oid) and get_db().tasks.delete_one({"_id": oid, "user_id": user_id}).deleted_count > 0
+
+    def count(self, user_id, completed=None):
+        return get_db().tasks.count_documents(task_filter(user_id, completed=completed))
+
+
+class MongoCalendarRepository(CalendarRepository):
+    def list(self, user_id, month=None, year=None, projection=None):
+        return list(get_db().calendar_events.find(month_query(user_id, month, year), projection).sort(EVENT_SORT))
+
+    def create(self, doc):
+        return str(get_db().calendar_events.insert_one(doc).inserted_id)
+
+    def delete(self, user_id, event_id):
+        oid = _oid(event_id)
+        return bool(oid) and get_db().calendar_events.delete_one({"_id": oid, "user_id": user_id}).deleted_count > 0
+
+
+class MongoSessionRepository(SessionRepository):
+    def create(self, doc):
+        return str(get_db().sessions.insert_one(doc).inserted_id)
+
+    def between(self, user_id, generation, start, end, projection=None):
+        query = {**_scope(user_id, generation), "started_at": {"$gte": start, "$lte": end}}
+        return list(get_db().sessions.find(query, projection).sort("started_at", 1))
+
+    def started_since(self, user_id, generation, since):
+        query = {**_scope(user_id, generation), "started_at": {"$gte": since}}
+        return list(get_db().sessions.find(query, {"started_at": 1, "duration_minutes": 1, "_id": 0}))
+
+    def totals(self, user_id, generation, since=None):
+        db = get_db()
+        scope = sessions_since(user_id, generation, since)
+        total_minutes = 0.0
+        for s in db.sessions.find(scope, {"duration_minutes": 1, "_id": 0}):
+            total_minutes += float(s.get("duration_minutes", 0) or 0)
+        return db.sessions.count_documents(scope), total_minutes
+
+    def oldest_started(self, user_id, generation, since=None):
+        doc = get_db().sessions.find_one(
+            sessions_since(user_id, generation, since), {"started_at": 1}, sort=[("started_at", 1)]
+        )
+        return doc.get("started_at") if doc else None
+
+    def users_started_before(self, before):
+        return get_db().sessions.distinct("user_id", {"started_at": {"$lt": before}})
+
+    def delete_started_before(self, user_id, generation, before, limit):
+        old = {**_scope(user_id, generation), "started_at": {"$lt": before}}
+        return _delete_batch(get_db().sessions, old, limit)
+
+    def delete_before_generation(self, user_id, generation, limit):
+        old = {"user_id": user_id, "generation": {"$not": {"$gte": generation}}}
+        return _delete_batch(get_db().sessions, old, limit)
+
+
+class MongoRollupRepository(RollupRepository):
+    def list(self, user_id, generation):
+        return list(get_db().session_rollups.find(rollup_query(user_id, generation), {"_id": 0}).sort("month", 1))
+
+    def save(self, doc):
+        key = {"user_id": doc["user_id"], "generation": doc["generation"], "month": doc["month"]}
+        get_db().session_rollups.replace_one(key, doc, upsert=True)
+
+    def delete_before_generation(self, user_id, generation, limit):
+        old = {"user_id": user_id, "generation": {"$lt": generation}}
+        return _delete_batch(get_db().session_rollups, old, limit)
+
+
+class MongoCelestialRepository(CelestialRepository):
+    def list(self, user_id, generation, projection=None):
+        if projection is not None:
+            projection = {**projection, "spiral_index": 1}
+        docs = get_db().celestial_objects.find(_scope(user_id, generation), projection).sort("created_at", 1)
+        return place_stars(user_id, docs, self.overrides(user_id, generation))
+
+    def count(self, user_id, generation):
+        return get_db().celestial_objects.count_documents(_scope(user_id, generation))
+
+    def max_spiral_index(self, user_id, generation):
+        # Stars without an index sort last descending.
+        doc = get_db().celestial_objects.find_one(
+            _scope(user_id, generation), {"spiral_index": 1}, sort=[("spiral_index", -1)]
+        )
+        return doc.get("spiral_index") if doc else None
+
+    def batches(self, user_id, generation, projection=None, batch_size=1000):
+        if projection is not None:
+            projection = {**projection, "spiral_index": 1}
+        overrides = self.overrides(user_id, generation)
+        cursor = get_db().celestial_objects.find(_scope(user_id, generation), projection).sort("created_at", 1)
+        batch = []
+        for doc in cursor.batch_size(batch_size):
+            batch.append(doc)
+            if len(batch) == batch_size:
+                yield place_stars(user_id, batch, overrides)
+                batch = []
+        if batch:
+            yield place_stars(user_id, batch, overrides)
+
+    def find(self, user_id, generation, ids):
+        oids = [oid for oid in (_oid(i) for i in ids) if oid is not None]
+        if not oids:
+            return []
+        docs = get_db().celestial_objects.find({"_id": {"$in": oids}, **_scope(user_id, generation)})
+        return place_stars(user_id, docs, self.overrides(user_id, generation))
+
+    def created_range(self, user_id, generation):
+        stars = get_db().celestial_objects
+        scope = _scope(user_id, generation)
+        first = stars.find_one(scope, {"created_at": 1}, sort=[("created_at", 1)])
+        last = stars.find_one(scope, {"created_at": 1}, sort=[("created_at", -1)])
+        if first is None or last is None:
+            return None
+        return first.get("created_at"), last.get("created_at")
+
+    def create(self, doc):
+        return str(get_db().celestial_objects.insert_one(doc).inserted_id)
+
+    def create_many(self, docs):
+        if not docs:
+            return []
+        return [str(oid) for oid in get_db().celestial_objects.insert_many(list(docs)).inserted_ids]
+
+    def delete(self, user_id, generation, ids):
+        oids = [oid for oid in (_oid(i) for i in ids) if oid is not None]
+        if not oids:
+            return 0
+        db = get_db()
+        deleted = db.celestial_objects.delete_many({"_id": {"$in": oids}, **_scope(user_id, generation)}).deleted_count
+        if deleted:
+            db.galaxy_layout.update_many(
+                overrides_query(user_id, generation),
+                {"$unset": {f"overrides.{oid}": "" for oid in oids}},
+            )
+        return deleted
+
+    def move_many(self, user_id, generation, moves):
+        wanted = {i: (float(x), float(y)) for i, (x, y) in moves.items() if _oid(i) is not None}
+        if not wanted:
+            return []
+        db = get_db()
+        docs = db.celestial_objects.find(
+            {"_id": {"$in": [ObjectId(i) for i in wanted]}, **_scope(user_id, generation)},
+            {"x": 1, "y": 1, "spiral_index": 1},
+        )
+        current = place_stars(user_id, docs, self.overrides(user_id, generation))
+        moved = [str(d["_id"]) for d in current if (d.get("x"), d.get("y")) != wanted[str(d["_id"])]]
+        if moved:
+            db.galaxy_layout.update_one(
+                _layout_filter(user_id, generation),
+                {"$set": {f"overrides.{i}": list(wanted[i]) for i in moved}},
+                upsert=True,
+            )
+        return moved
+
+    def overrides(self, user_id, generation):
+        return merge_overrides(get_db().galaxy_layout.find(overrides_query(user_id, generation), {"overrides": 1}))
+
+    def positions(self, user_id, generation):
+        docs = get_db().celestial_objects.find(_scope(user_id, generation), {"x": 1, "y": 1, "spiral_index": 1})
+        return [
+            {"_id": d["_id"], "x": d.get("x", 0), "y": d.get("y", 0)}
+            for d in place_stars(user_id, docs, self.overrides(user_id, generation))
+        ]
+
+    def delete_before_generation(self, user_id, generation, limit):
+        # The generation's override map goes with its stars.
+        old = {"user_id": user_id, "generation": {"$not": {"$gte": generation}}}
+        db = get_db()
+        deleted = _delete_batch(db.celestial_objects, old, limit)
+        if deleted < limit:
+            deleted += _delete_batch(db.galaxy_layout, old, limit - deleted)
+        return deleted
+
+    def save_stats(self, user_id, stats):
+        get_db().galaxy_stats.update_one({"user_id": user_id}, {"$set": stats}, upsert=True)
+
+
+class MongoMoodRepository(MoodRepository):
+    def list(self):
+        return list(get_db().moods.find({}).sort("order", 1))
+
+    def upsert(self, mood):
+        now = datetime.utcnow()
+        fields = {k: v for k, v in mood.items() if k != "key"}
+        get_db().moods.update_one(
+            {"key": mood["key"]},
+            {"$set": {**fields, "updated_at": now}, "$setOnInsert": {"created_at": now}},
+            upsert=True,
+        )
+
+
+class MongoVersionRepository(VersionRepository):
+    def get(self, user_id):
+        doc = get_db()[VERSIONS_COLLECTION].find_one({"_id": user_id}) or {}
+        doc.pop("_id", None)
+        return doc
+
+    def bump(self, user_id, collections):
+        get_db()[VERSIONS_COLLECTION].update_one(
+            {"_id": user_id}, {"$inc": {c: 1 for c in collections}}, upsert=True
+        )
+
+    def start_generation(self, user_id, collections):
+        doc = get_db()[VERSIONS_COLLECTION].find_one_and_update(
+            {"_id": user_id},
+            {"$inc": {"generation": 1, **{c: 1 for c in collections}}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        return int(doc["generation"])
+
+    def pending_reaps(self):
+        pending = {"$expr": {"$lt": [{"$ifNull": ["$reaped_generation", 0]}, {"$ifNull": ["$generation", 0]}]}}
+        return [
+            (doc["_id"], int(doc.get("generation", 0)))
+            for doc in get_db()[VERSIONS_COLLECTION].find(pending, {"generation": 1})
+        ]
+
+    def mark_reaped(self, user_id, generation):
+        # Only record progress we made; a later reset raises generation again.
+        get_db()[VERSIONS_COLLECTION].update_one(
+            {"_id": user_id, "reaped_generation": {"$not": {"$gte": generation}}},
+            {"$set": {"reaped_generation": generation}},
+        )
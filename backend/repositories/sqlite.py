@@ -0,0 +1,611 @@
+"""
+Embedded storage: the same repositories on a local SQLite file.
+
+For single-node installs where a MongoDB round trip costs more than the
+query. One connection per thread (WAL mode, so readers don't block the
+writer); every statement is a fixed SQL string with ? parameters, which
+sqlite3 compiles once per connection and reuses from its statement cache.
+"""
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Mapping, Sequence, Tuple
+
+from bson import ObjectId
+
+from ..utils.spiral import place_stars
+from .base import (
+    CalendarRepository, CelestialRepository, Doc, MoodRepository, RollupRepository, SessionRepository,
+    TaskRepository, VersionRepository,
+)
+
+
+SQLITE_PATH = os.getenv("SQLITE_PATH", "codegalaxy.sqlite3")
+
+_DT_FORMAT = "%Y-%m-%dT%H:%M:%S.%f"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id TEXT PRIMARY KEY, user_id TEXT NOT NULL, title TEXT, description TEXT, date TEXT,
+    due_at TEXT, priority TEXT, category TEXT, completed INTEGER NOT NULL DEFAULT 0, created_at TEXT
+);
+CREATE INDEX IF NOT EXISTS tasks_user_date ON tasks (user_id, date);
+CREATE INDEX IF NOT EXISTS tasks_user_category ON tasks (user_id, category);
+
+CREATE TABLE IF NOT EXISTS calendar_events (
+    id TEXT PRIMARY KEY, user_id TEXT NOT NULL, title TEXT, date TEXT, time TEXT, category TEXT, created_at TEXT
+);
+CREATE INDEX IF NOT EXISTS calendar_events_user_date ON calendar_events (user_id, date, time);
+
+CREATE TABLE IF NOT EXISTS sessions (
+    id TEXT PRIMARY KEY, user_id TEXT NOT NULL, generation INTEGER NOT NULL DEFAULT 0, task_id TEXT,
+    mood TEXT, duration_minutes REAL, started_at TEXT, ended_at TEXT, created_at TEXT, meta TEXT
+);
+CREATE INDEX IF NOT EXISTS sessions_user_generation_started ON sessions (user_id, generation, started_at);
+
+CREATE TABLE IF NOT EXISTS celestial_objects (
+    id TEXT PRIMARY KEY, user_id TEXT NOT NULL, generation INTEGER NOT NULL DEFAULT 0, session_id TEXT,
+    type TEXT, radius REAL, color TEXT, x REAL, y REAL, created_at TEXT, created_via TEXT, meta TEXT,
+    spiral_index INTEGER
+);
+CREATE INDEX IF NOT EXISTS celestial_user_generation_created ON celestial_objects (user_id, generation, created_at);
+
+CREATE TABLE IF NOT EXISTS galaxy_layout (
+    user_id TEXT NOT NULL, generation INTEGER NOT NULL, star_id TEXT NOT NULL, x REAL NOT NULL, y REAL NOT NULL,
+    PRIMARY KEY (user_id, generation, star_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS session_rollups (
+    user_id TEXT NOT NULL, generation INTEGER NOT NULL, month TEXT NOT NULL, start TEXT, "end" TEXT,
+    sessions INTEGER NOT NULL, minutes REAL NOT NULL, moods TEXT, days TEXT, archived_at TEXT,
+    PRIMARY KEY (user_id, generation, month)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS galaxy_stats (user_id TEXT PRIMARY KEY, stats TEXT NOT NULL);
+
+CREATE TABLE IF NOT EXISTS moods (
+    id TEXT PRIMARY KEY, key TEXT NOT NULL UNIQUE, label TEXT, color TEXT, playlist_id TEXT,
+    "order" INTEGER, created_at TEXT, updated_at TEXT
+);
+
+CREATE TABLE IF NOT EXISTS user_versions (
+    user_id TEXT NOT NULL, name TEXT NOT NULL, value INTEGER NOT NULL, PRIMARY KEY (user_id, name)
+) WITHOUT ROWID;
+"""
+
+
+def _encode(kind: str, value: Any) -> Any:
+    if value is None:
+        return None
+    if kind == "datetime" and isinstance(value, datetime):
+        # Naive UTC with fixed-width microseconds, so text order is time order.
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value.strftime(_DT_FORMAT)
+    if kind == "bool":
+        return 1 if value else 0
+    if kind == "json":
+        return json.dumps(value, default=str, separators=(",", ":"))
+    if isinstance(value, ObjectId):
+        return str(value)
+    return value
+
+
+def _parse_datetime(value: Any) -> Any:
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return value
+
+
+_DECODERS = {"datetime": _parse_datetime, "bool": bool, "json": json.loads}
+
+
+def _decode(kind: str, value: Any) -> Any:
+    decoder = _DECODERS.get(kind)
+    return value if value is None or decoder is None else decoder(value)
+
+
+class _Table:
+    """
+    Column list of a table and the doc <-> row conversions.
+    """
+
+    def __init__(self, name: str, columns: Dict[str, str]) -> None:
+        self.name = name
+        self.columns = columns
+        names = ", ".join(f'"{c}"' for c in columns)
+        self.select = f"SELECT id, {names} FROM {name}"
+        self.insert = f"INSERT INTO {name} (id, {names}) VALUES ({', '.join('?' * (len(columns) + 1))})"
+        self._decoders = [(c, _DECODERS.get(kind)) for c, kind in columns.items()]
+        self._views: Dict[Any, "_Table"] = {}
+
+    def row(self, doc: Doc) -> Tuple[Any, ...]:
+        doc.setdefault("_id", ObjectId())
+        return (str(doc["_id"]), *(_encode(kind, doc.get(c)) for c, kind in self.columns.items()))
+
+    def only(self, projection: Mapping[str, Any] | None, keep: Sequence[str] = ()) -> "_Table":
+        """
+        The same table narrowed to the projected columns (plus keep), for
+        reads that don't need whole rows.
+        """
+        if projection is None:
+            return self
+        key = (tuple(sorted(projection)), tuple(keep))
+        table = self._views.get(key)
+        if table is None:
+            wanted = set(projection) | set(keep)
+            table = self._views[key] = _Table(self.name, {c: k for c, k in self.columns.items() if c in wanted})
+        return table
+
+    def doc(self, row: Sequence[Any]) -> Doc:
+        # Called once per row on every read, so no per-value dispatch.
+        out: Doc = {"_id": row[0]}
+        for (c, decoder), value in zip(self._decoders, row[1:]):
+            out[c] = value if value is None or decoder is None else decoder(value)
+        return out
+
+
+TASKS = _Table("tasks", {
+    "user_id": "text", "title": "text", "description": "text", "date": "text", "due_at": "text",
+    "priority": "text", "category": "text", "completed": "bool", "created_at": "datetime",
+})
+EVENTS = _Table("calendar_events", {
+    "user_id": "text", "title": "text", "date": "text", "time": "text", "category": "text", "created_at": "datetime",
+})
+SESSIONS = _Table("sessions", {
+    "user_id": "text", "generation": "int", "task_id": "text", "mood": "text", "duration_minutes": "real",
+    "started_at": "datetime", "ended_at": "datetime", "created_at": "datetime", "meta": "json",
+})
+STARS = _Table("celestial_objects", {
+    "user_id": "text", "generation": "int", "session_id": "text", "type": "text", "radius": "real",
+    "color": "text", "x": "real", "y": "real", "created_at": "datetime", "created_via": "text", "meta": "json",
+    "spiral_index": "int",
+})
+MOODS = _Table("moods", {
+    "key": "text", "label": "text", "color": "text", "playlist_id": "text", "order": "int",
+    "created_at": "datetime", "updated_at": "datetime",
+})
+
+
+# Columns added after a table's first release: (table, column, type).
+ADDED_COLUMNS = [("celestial_objects", "spiral_index", "INTEGER")]
+# Indexes over added columns, created once the columns exist.
+ADDED_INDEXES = """
+CREATE INDEX IF NOT EXISTS celestial_user_generation_spiral ON celestial_objects (user_id, generation, spiral_index);
+"""
+
+
+def _add_missing_columns(conn: sqlite3.Connection) -> None:
+    for table, column, kind in ADDED_COLUMNS:
+        if column not in {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {kind}")
+
+
+class SQLiteStore:
+    """
+    Per-thread connections to one database file; the schema is created on
+    the first connection in each process.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._local = threading.local()
+        self._schema_lock = threading.Lock()
+        self._schema_pid: int | None = None
+
+    def conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        conn = sqlite3.connect(
+            self.path, timeout=5, isolation_level=None, check_same_thread=False, cached_statements=256
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        with self._schema_lock:
+            if self._schema_pid != os.getpid():
+                conn.executescript(SCHEMA)
+                _add_missing_columns(conn)
+                conn.executescript(ADDED_INDEXES)
+                self._schema_pid = os.getpid()
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        conn = self.conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def ping(self) -> None:
+        self.conn().execute("SELECT 1").fetchone()
+
+
+def _insert(store: SQLiteStore, table: _Table, doc: Doc) -> str:
+    store.conn().execute(table.insert, table.row(doc))
+    doc["_id"] = str(doc["_id"])
+    return doc["_id"]
+
+
+class SQLiteTaskRepository(TaskRepository):
+    def __init__(self, store: SQLiteStore) -> None:
+        self.store = store
+
+    def list(self, user_id, category=None, completed=None, projection=None):
+        sql, params = TASKS.select + " WHERE user_id = ?", [user_id]
+        if category and category != "all":
+            sql += " AND category = ?"
+            params.append(category)
+        if completed is not None:
+            sql += " AND completed = ?"
+            params.append(1 if completed else 0)
+        sql += " ORDER BY date DESC, due_at ASC, created_at DESC"
+        return [TASKS.doc(r) for r in self.store.conn().execute(sql, params)]
+
+    def get(self, user_id, task_id):
+        row = self.store.conn().execute(TASKS.select + " WHERE id = ? AND user_id = ?", (task_id, user_id)).fetchone()
+        return TASKS.doc(row) if row else None
+
+    def create(self, doc):
+        return _insert(self.store, TASKS, doc)
+
+    def update(self, user_id, task_id, fields):
+        fields = {c: v for c, v in fields.items() if c in TASKS.columns and c != "user_id"}
+        if not fields:
+            return self.get(user_id, task_id) is not None
+        assignments = ", ".join(f'"{c}" = ?' for c in fields)
+        params = [_encode(TASKS.columns[c], v) for c, v in fields.items()] + [task_id, user_id]
+        cur = self.store.conn().execute(f"UPDATE tasks SET {assignments} WHERE id = ? AND user_id = ?", params)
+        return cur.rowcount > 0
+
+    def delete(self, user_id, task_id):
+        cur = self.store.conn().execute("DELETE FROM tasks WHERE id = ? AND user_id = ?", (task_id, user_id))
+        return cur.rowcount > 0
+
+    def count(self, user_id, completed=None):
+        if completed is None:
+            row = self.store.conn().execute("SELECT COUNT(*) FROM tasks WHERE user_id = ?", (user_id,)).fetchone()
+        else:
+            row = self.store.conn().execute(
+                "SELECT COUNT(*) FROM tasks WHERE user_id = ? AND completed = ?", (user_id, 1 if completed else 0)
+            ).fetchone()
+        return row[0]
+
+
+class SQLiteCalendarRepository(CalendarRepository):
+    def __init__(self, store: SQLiteStore) -> None:
+        self.store = store
+
+    def list(self, user_id, month=None, year=None, projection=None):
+        if month and year:
+            # YYYY-MM-DD strings: a range on the prefix uses the index ('.' follows '-').
+            prefix = f"{year}-{str(month).zfill(2)}-"
+            rows = self.store.conn().execute(
+                EVENTS.select + " WHERE user_id = ? AND date >= ? AND date < ? ORDER BY date, time",
+                (user_id, prefix, prefix[:-1] + "."),
+            )
+        else:
+            rows = self.store.conn().execute(EVENTS.select + " WHERE user_id = ? ORDER BY date, time", (user_id,))
+        return [EVENTS.doc(r) for r in rows]
+
+    def create(self, doc):
+        return _insert(self.store, EVENTS, doc)
+
+    def delete(self, user_id, event_id):
+        cur = self.store.conn().execute("DELETE FROM calendar_events WHERE id = ? AND user_id = ?", (event_id, user_id))
+        return cur.rowcount > 0
+
+
+class SQLiteSessionRepository(SessionRepository):
+    def __init__(self, store: SQLiteStore) -> None:
+        self.store = store
+
+    def create(self, doc):
+        return _insert(self.store, SESSIONS, {"generation": 0, **doc})
+
+    def between(self, user_id, generation, start, end, projection=None):
+        rows = self.store.conn().execute(
+            SESSIONS.select + " WHERE user_id = ? AND generation = ? AND started_at BETWEEN ? AND ?"
+            " ORDER BY started_at",
+            (user_id, generation, _encode("datetime", start), _encode("datetime", end)),
+        )
+        return [SESSIONS.doc(r) for r in rows]
+
+    def started_since(self, user_id, generation, since):
+        rows = self.store.conn().execute(
+            "SELECT started_at, duration_minutes FROM sessions"
+            " WHERE user_id = ? AND generation = ? AND started_at >= ?",
+            (user_id, generation, _encode("datetime", since)),
+        )
+        return [{"started_at": _decode("datetime", s), "duration_minutes": m} for s, m in rows]
+
+    @staticmethod
+    def _since(user_id, generation, since):
+        where, params = " WHERE user_id = ? AND generation = ?", [user_id, generation]
+        if since is not None:
+            where += " AND started_at >= ?"
+            params.append(_encode("datetime", since))
+        return where, params
+
+    def totals(self, user_id, generation, since=None):
+        where, params = self._since(user_id, generation, since)
+        count, minutes = self.store.conn().execute(
+            "SELECT COUNT(*), COALESCE(SUM(duration_minutes), 0) FROM sessions" + where, params
+        ).fetchone()
+        return count, float(minutes)
+
+    def oldest_started(self, user_id, generation, since=None):
+        where, params = self._since(user_id, generation, since)
+        (first,) = self.store.conn().execute("SELECT MIN(started_at) FROM sessions" + where, params).fetchone()
+        return _decode("datetime", first)
+
+    def users_started_before(self, before):
+        rows = self.store.conn().execute(
+            "SELECT DISTINCT user_id FROM sessions WHERE started_at < ?", (_encode("datetime", before),)
+        )
+        return [user_id for (user_id,) in rows]
+
+    def delete_started_before(self, user_id, generation, before, limit):
+        cur = self.store.conn().execute(
+            "DELETE FROM sessions WHERE id IN"
+            " (SELECT id FROM sessions WHERE user_id = ? AND generation = ? AND started_at < ? LIMIT ?)",
+            (user_id, generation, _encode("datetime", before), limit),
+        )
+        return cur.rowcount
+
+    def delete_before_generation(self, user_id, generation, limit):
+        cur = self.store.conn().execute(
+            "DELETE FROM sessions WHERE id IN"
+            " (SELECT id FROM sessions WHERE user_id = ? AND generation < ? LIMIT ?)",
+            (user_id, generation, limit),
+        )
+        return cur.rowcount
+
+
+class SQLiteRollupRepository(RollupRepository):
+    COLUMNS = {
+        "user_id": "text", "generation": "int", "month": "text", "start": "datetime", "end": "datetime",
+        "sessions": "int", "minutes": "real", "moods": "json", "days": "json", "archived_at": "datetime",
+    }
+
+    def __init__(self, store: SQLiteStore) -> None:
+        self.store = store
+        names = ", ".join(f'"{c}"' for c in self.COLUMNS)
+        self._select = f"SELECT {names} FROM session_rollups"
+        self._upsert = f"INSERT OR REPLACE INTO session_rollups ({names}) VALUES ({', '.join('?' * len(self.COLUMNS))})"
+
+    def list(self, user_id, generation):
+        rows = self.store.conn().execute(
+            self._select + " WHERE user_id = ? AND generation = ? ORDER BY month", (user_id, generation)
+        )
+        return [{c: _decode(kind, v) for (c, kind), v in zip(self.COLUMNS.items(), row)} for row in rows]
+
+    def save(self, doc):
+        self.store.conn().execute(self._upsert, [_encode(kind, doc.get(c)) for c, kind in self.COLUMNS.items()])
+
+    def delete_before_generation(self, user_id, generation, limit):
+        cur = self.store.conn().execute(
+            "DELETE FROM session_rollups WHERE user_id = ? AND (generation, month) IN"
+            " (SELECT generation, month FROM session_rollups WHERE user_id = ? AND generation < ? LIMIT ?)",
+            (user_id, user_id, generation, limit),
+        )
+        return cur.rowcount
+
+
+class SQLiteCelestialRepository(CelestialRepository):
+    def __init__(self, store: SQLiteStore) -> None:
+        self.store = store
+
+    def list(self, user_id, generation, projection=None):
+        rows = self.store.conn().execute(
+            STARS.select + " WHERE user_id = ? AND generation = ? ORDER BY created_at", (user_id, generation)
+        )
+        return place_stars(user_id, (STARS.doc(r) for r in rows), self.overrides(user_id, generation))
+
+    def count(self, user_id, generation):
+        return self.store.conn().execute(
+            "SELECT COUNT(*) FROM celestial_objects WHERE user_id = ? AND generation = ?", (user_id, generation)
+        ).fetchone()[0]
+
+    def max_spiral_index(self, user_id, generation):
+        return self.store.conn().execute(
+            "SELECT MAX(spiral_index) FROM celestial_objects WHERE user_id = ? AND generation = ?", (user_id, generation)
+        ).fetchone()[0]
+
+    def batches(self, user_id, generation, projection=None, batch_size=1000):
+        overrides = self.overrides(user_id, generation)
+        table = STARS.only(projection, keep=("x", "y", "spiral_index"))
+        # A dedicated cursor: the caller may run other queries between batches.
+        cursor = self.store.conn().cursor()
+        cursor.execute(
+            table.select + " WHERE user_id = ? AND generation = ? ORDER BY created_at", (user_id, generation)
+        )
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            yield place_stars(user_id, [table.doc(r) for r in rows], overrides)
+
+    def find(self, user_id, generation, ids):
+        ids = list(ids)
+        if not ids:
+            return []
+        # Unary + keeps the planner on the primary key instead of scanning
+        # the whole galaxy through the (user_id, generation) index.
+        rows = self.store.conn().execute(
+            STARS.select + f" WHERE id IN ({', '.join('?' * len(ids))}) AND +user_id = ? AND +generation = ?",
+            (*ids, user_id, generation),
+        )
+        return place_stars(user_id, [STARS.doc(r) for r in rows], self.overrides(user_id, generation))
+
+    def created_range(self, user_id, generation):
+        first, last = self.store.conn().execute(
+            "SELECT MIN(created_at), MAX(created_at) FROM celestial_objects WHERE user_id = ? AND generation = ?",
+            (user_id, generation),
+        ).fetchone()
+        if first is None:
+            return None
+        return _decode("datetime", first), _decode("datetime", last)
+
+    def create(self, doc):
+        doc.setdefault("generation", 0)
+        return _insert(self.store, STARS, doc)
+
+    def create_many(self, docs):
+        if not docs:
+            return []
+        for doc in docs:
+            doc.setdefault("generation", 0)
+        with self.store.transaction() as conn:
+            conn.executemany(STARS.insert, [STARS.row(d) for d in docs])
+        for doc in docs:
+            doc["_id"] = str(doc["_id"])
+        return [doc["_id"] for doc in docs]
+
+    def delete(self, user_id, generation, ids):
+        ids = list(ids)
+        if not ids:
+            return 0
+        deleted = 0
+        with self.store.transaction() as conn:
+            for star_id in ids:
+                params = (star_id, user_id, generation)
+                deleted += conn.execute(
+                    "DELETE FROM celestial_objects WHERE id = ? AND user_id = ? AND generation = ?", params
+                ).rowcount
+                conn.execute("DELETE FROM galaxy_layout WHERE star_id = ? AND user_id = ? AND generation = ?", params)
+        return deleted
+
+    def move_many(self, user_id, generation, moves):
+        overrides = self.overrides(user_id, generation)
+        moved = []
+        with self.store.transaction() as conn:
+            for star_id, (x, y) in moves.items():
+                row = conn.execute(
+                    "SELECT id, x, y, spiral_index FROM celestial_objects WHERE id = ? AND user_id = ? AND generation = ?",
+                    (star_id, user_id, generation),
+                ).fetchone()
+                if row is None:
+                    continue
+                current = place_stars(user_id, [{"_id": row[0], "x": row[1], "y": row[2], "spiral_index": row[3]}],
+                                      overrides)[0]
+                if (current["x"], current["y"]) == (x, y):
+                    continue
+                conn.execute(
+                    "INSERT INTO galaxy_layout (user_id, generation, star_id, x, y) VALUES (?, ?, ?, ?, ?)"
+                    " ON CONFLICT (user_id, generation, star_id) DO UPDATE SET x = excluded.x, y = excluded.y",
+                    (user_id, generation, star_id, x, y),
+                )
+                moved.append(star_id)
+        return moved
+
+    def overrides(self, user_id, generation):
+        rows = self.store.conn().execute(
+            "SELECT star_id, x, y FROM galaxy_layout WHERE user_id = ? AND generation = ?", (user_id, generation)
+        )
+        return {star_id: (x, y) for star_id, x, y in rows}
+
+    def positions(self, user_id, generation):
+        rows = self.store.conn().execute(
+            "SELECT id, x, y, spiral_index FROM celestial_objects WHERE user_id = ? AND generation = ?"
+            " ORDER BY created_at",
+            (user_id, generation),
+        )
+        docs = [{"_id": i, "x": x, "y": y, "spiral_index": index} for i, x, y, index in rows]
+        return [
+            {"_id": d["_id"], "x": d["x"], "y": d["y"]}
+            for d in place_stars(user_id, docs, self.overrides(user_id, generation))
+        ]
+
+    def delete_before_generation(self, user_id, generation, limit):
+        conn = self.store.conn()
+        deleted = conn.execute(
+            "DELETE FROM celestial_objects WHERE id IN"
+            " (SELECT id FROM celestial_objects WHERE user_id = ? AND generation < ? LIMIT ?)",
+            (user_id, generation, limit),
+        ).rowcount
+        if deleted < limit:
+            deleted += conn.execute(
+                "DELETE FROM galaxy_layout WHERE (user_id, generation, star_id) IN"
+                " (SELECT user_id, generation, star_id FROM galaxy_layout WHERE user_id = ? AND generation < ? LIMIT ?)",
+                (user_id, generation, limit - deleted),
+            ).rowcount
+        return deleted
+
+    def save_stats(self, user_id, stats):
+        self.store.conn().execute(
+            "INSERT INTO galaxy_stats (user_id, stats) VALUES (?, ?)"
+            " ON CONFLICT (user_id) DO UPDATE SET stats = excluded.stats",
+            (user_id, _encode("json", stats)),
+        )
+
+
+class SQLiteMoodRepository(MoodRepository):
+    def __init__(self, store: SQLiteStore) -> None:
+        self.store = store
+
+    def list(self):
+        return [MOODS.doc(r) for r in self.store.conn().execute(MOODS.select + ' ORDER BY "order"')]
+
+    def upsert(self, mood):
+        now = datetime.utcnow()
+        doc = {"created_at": now, **mood, "updated_at": now}
+        self.store.conn().execute(
+            MOODS.insert + ' ON CONFLICT (key) DO UPDATE SET label = excluded.label, color = excluded.color,'
+            ' playlist_id = excluded.playlist_id, "order" = excluded."order", updated_at = excluded.updated_at',
+            MOODS.row(doc),
+        )
+
+
+_BUMP = (
+    "INSERT INTO user_versions (user_id, name, value) VALUES (?, ?, 1)"
+    " ON CONFLICT (user_id, name) DO UPDATE SET value = value + 1"
+)
+
+
+class SQLiteVersionRepository(VersionRepository):
+    def __init__(self, store: SQLiteStore) -> None:
+        self.store = store
+
+    def get(self, user_id):
+        rows = self.store.conn().execute("SELECT name, value FROM user_versions WHERE user_id = ?", (user_id,))
+        return dict(rows.fetchall())
+
+    def bump(self, user_id, collections):
+        with self.store.transaction() as conn:
+            conn.executemany(_BUMP, [(user_id, c) for c in collections])
+
+    def start_generation(self, user_id, collections):
+        with self.store.transaction() as conn:
+            conn.executemany(_BUMP, [(user_id, c) for c in ("generation", *collections)])
+            return conn.execute(
+                "SELECT value FROM user_versions WHERE user_id = ? AND name = 'generation'", (user_id,)
+            ).fetchone()[0]
+
+    def pending_reaps(self):
+        rows = self.store.conn().execute(
+            "SELECT g.user_id, g.value FROM user_versions g"
+            " LEFT JOIN user_versions r ON r.user_id = g.user_id AND r.name = 'reaped_generation'"
+            " WHERE g.name = 'generation' AND COALESCE(r.value, 0) < g.value"
+        )
+        return [(user_id, int(generation)) for user_id, generation in rows]
+
+    def mark_reaped(self, user_id, generation):
+        self.store.conn().execute(
+            "INSERT INTO user_versions (user_id, name, value) VALUES (?, 'reaped_generation', ?)"
+            " ON CONFLICT (user_id, name) DO UPDATE SET value = MAX(value, excluded.value)",
+            (user_id, generation),
+        )
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+from werkzeug.datastructures import MultiDict
+
+from ..repositories.mongo import (
+    EVENT_SORT, TASK_SORT, merge_overrides, month_query, overrides_query, rollup_query, sessions_since, task_query,
+)
+from ..utils.async_db import get_async_db
+from ..utils.conditional import ConditionalSpec
+from ..utils.db import get_default_user_id
+from ..utils.generations import current_generation, galaxy_scope
+from ..utils.session_archive import SessionArchive
+from ..utils.spiral import place_stars
+from . import calendar as calendar_routes, galaxy as galaxy_routes, stats as stats_routes, tasks as task_routes
+from .calendar import serialize_event
+from .galaxy import serialize_celestial
+from .stats import build_summary, bucket_weekly, count_streak, streak_query, streak_since, weekly_query, weekly_since
+from .tasks import serialize_task
+
+
+# Async counterparts of the read-heavy GET endpoints, served by backend.asgi.
+# Queries and serializers are shared with the Flask views; independent
+# queries run concurrently instead of back to back.
+
+AsyncView = Callable[[MultiDict], Awaitable[Any]]
+
+
+async def _generation(user_id: str) -> int:
+    # Sync pymongo read of the user's versions document; keep it off the loop.
+    return await asyncio.to_thread(current_generation, user_id)
+
+
+async def galaxy_data(args: MultiDict) -> Any:
+    db = get_async_db()
+    user_id = get_default_user_id()
+    generation = await _generation(user_id)
+    projection = {**serialize_celestial.projection, "spiral_index": 1}
+    docs, layouts = await asyncio.gather(
+        db.celestial_objects.find(galaxy_scope(user_id, generation), projection).sort("created_at", 1).to_list(None),
+        db.galaxy_layout.find(overrides_query(user_id, generation), {"overrides": 1}).to_list(None),
+    )
+    return [serialize_celestial(d) for d in place_stars(user_id, docs, merge_overrides(layouts))]
+
+
+async def list_tasks(args: MultiDict) -> Any:
+    db = get_async_db()
+    cursor = db.tasks.find(task_query(get_default_user_id(), args), serialize_task.projection).sort(TASK_SORT)
+    return [serialize_task(d) for d in await cursor.to_list(None)]
+
+
+async def list_events(args: MultiDict) -> Any:
+    db = get_async_db()
+    query = month_query(get_default_user_id(), args.get("month"), args.get("year"))
+    cursor = db.calendar_events.find(query, serialize_event.projection).sort(EVENT_SORT)
+    return [serialize_event(d) for d in await cursor.to_list(None)]
+
+
+async def _total_minutes(db, scope: Dict[str, Any]) -> float:
+    rows = await db.sessions.aggregate([
+        {"$match": scope},
+        {"$group": {"_id": None, "minutes": {"$sum": "$duration_minutes"}}},
+    ]).to_list(None)
+    return float(rows[0]["minutes"]) if rows else 0
+
+
+async def _archive(db, user_id: str, generation: int) -> SessionArchive:
+    rollups = db.session_rollups.find(rollup_query(user_id, generation), {"_id": 0}).sort("month", 1)
+    return SessionArchive(await rollups.to_list(None))
+
+
+async def summary(args: MultiDict) -> Any:
+    db = get_async_db()
+    user_id = get_default_user_id()
+    generation = await _generation(user_id)
+    archive = await _archive(db, user_id, generation)
+    sessions = sessions_since(user_id, generation, archive.boundary)
+    total_tasks, completed_tasks, total_sessions, total_minutes = await asyncio.gather(
+        db.tasks.count_documents({"user_id": user_id}),
+        db.tasks.count_documents({"user_id": user_id, "completed": True}),
+        db.sessions.count_documents(sessions),
+        _total_minutes(db, sessions),
+    )
+    return build_summary(
+        total_tasks, completed_tasks, total_sessions + archive.sessions, total_minutes + archive.minutes
+    )
+
+
+async def streak(args: MultiDict) -> Any:
+    db = get_async_db()
+    user_id = get_default_user_id()
+    generation = await _generation(user_id)
+    archive = await _archive(db, user_id, generation)
+    since = streak_since()
+    query = streak_query(user_id, generation, archive.raw_since(since))
+    cursor = db.sessions.find(query, {"started_at": 1, "_id": 0})
+    return count_streak(archive.days_since(since) + await cursor.to_list(None))
+
+
+async def weekly(args: MultiDict) -> Any:
+    db = get_async_db()
+    user_id = get_default_user_id()
+    generation = await _generation(user_id)
+    archive = await _archive(db, user_id, generation)
+    since = weekly_since()
+    query = weekly_query(user_id, generation, archive.raw_since(since))
+    cursor = db.sessions.find(query, {"started_at": 1, "duration_minutes": 1, "_id": 0})
+    return bucket_weekly(archive.days_since(since) + await cursor.to_list(None))
+
+
+async def dashboard(args: MultiDict) -> Any:
+    today = datetime.utcnow().date()
+    summary_data, streak_data, tasks, events = await asyncio.gather(
+        summary(args),
+        streak(args),
+        list_tasks(MultiDict()),
+        list_events(MultiDict({"month": today.month, "year": today.year})),
+    )
+    return {"summary": summary_data, "streak": streak_data, "tasks": tasks, "events": events}
+
+
+# (method, path) -> (endpoint name as in the Flask app, view, the Flask
+# view's ETag spec so both apps answer If-None-Match the same way)
+ROUTES: Dict[Tuple[str, str], Tuple[str, AsyncView, ConditionalSpec | None]] = {
+    ("GET", "/api/galaxy/data"): ("galaxy.galaxy_data", galaxy_data, galaxy_routes.galaxy_data.conditional),
+    ("GET", "/api/galaxy"): ("api_galaxy", galaxy_data, galaxy_routes.galaxy_data.conditional),
+    ("GET", "/tasks"): ("tasks.list_tasks", list_tasks, task_routes.list_tasks.conditional),
+    ("GET", "/api/tasks"): ("api_get_tasks", list_tasks, task_routes.list_tasks.conditional),
+    ("GET", "/calendar"): ("calendar.list_events", list_events, calendar_routes.list_events.conditional),
+    ("GET", "/api/calendar"): ("api_get_calendar", list_events, calendar_routes.list_events.conditional),
+    ("GET", "/stats/summary"): ("stats.summary", summary, stats_routes.summary.conditional),
+    ("GET", "/stats/streak"): ("stats.streak", streak, stats_routes.streak.conditional),
+    ("GET", "/stats/weekly"): ("stats.weekly", weekly, stats_routes.weekly.conditional),
+    ("GET", "/stats/dashboard"): ("stats.dashboard", dashboard, stats_routes.dashboard.conditional),
+}
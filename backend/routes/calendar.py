@@ -1,58 +1,53 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import Any, Dict
 
 from flask import Blueprint, jsonify, request
 from bson import ObjectId
 
-from ..utils.db import get_db, get_default_user_id
+from ..repositories import get_repositories
+from ..utils.conditional import conditional_view
+from ..utils.db import get_default_user_id
+from ..utils.serializers import Field, Serializer
+from ..utils.single_flight import coalesced_view
+from ..utils.versions import bumps_versions
 
 
 bp = Blueprint("calendar", __name__, url_prefix="/calendar")
 
 
-def serialize_event(doc: Dict[str, Any]) -> Dict[str, Any]:
-    return {
-        "id": str(doc["_id"]),
-        "title": doc.get("title", ""),
-        "date": doc.get("date"),
-        "time": doc.get("time"),
-        "category": doc.get("category", "Personal"),
-        "created_at": doc.get("created_at"),
-    }
-
+serialize_event = Serializer("serialize_event", [
+    Field("id", "_id", convert="str"),
+    Field("title", default=""),
+    Field("date"),
+    Field("time"),
+    Field("category", default="Personal"),
+    Field("created_at"),
+])
 
 @bp.get("")
+@conditional_view("list_events", ("calendar_events",), vary=("month", "year"))
+@coalesced_view("list_events", ("calendar_events",), vary=("month", "year"))
 def list_events():
     """
     GET /calendar
     Optional query params: month, year (numbers)
     """
-    db = get_db()
     user_id = get_default_user_id()
 
-    query: Dict[str, Any] = {"user_id": user_id}
-
-    month = request.args.get("month")
-    year = request.args.get("year")
-    if month and year:
-        # dates are stored as YYYY-MM-DD strings
-        month = str(month).zfill(2)
-        year = str(year)
-        query["date"] = {"$regex": f"^{year}-{month}-"}
-
-    docs = db.calendar_events.find(query).sort([("date", 1), ("time", 1)])
+    docs = get_repositories().calendar.list(
+        user_id, request.args.get("month"), request.args.get("year"), serialize_event.projection
+    )
     return jsonify([serialize_event(d) for d in docs])
 
 
 @bp.post("")
+@bumps_versions("calendar_events")
 def create_event():
     """
     POST /calendar
     Body: { title, date, time?, category? }
     """
-    db = get_db()
     user_id = get_default_user_id()
     data = request.get_json(silent=True) or {}
 
@@ -64,27 +59,25 @@ def create_event():
         "category": data.get("category", "Personal"),
         "created_at": datetime.utcnow(),
     }
-    result = db.calendar_events.insert_one(doc)
+    event_id = get_repositories().calendar.create(doc)
     return (
-        jsonify({"id": str(result.inserted_id), "message": "Event created successfully"}),
+        jsonify({"id": event_id, "message": "Event created successfully"}),
         201,
     )
 
 
 @bp.delete("/<event_id>")
+@bumps_versions("calendar_events")
 def delete_event(event_id: str):
     """
     DELETE /calendar/<id>
     """
-    db = get_db()
     user_id = get_default_user_id()
 
-    try:
-        oid = ObjectId(event_id)
-    except Exception:
+    if not ObjectId.is_valid(event_id):
         return jsonify({"error": "Invalid event id"}), 400
 
-    db.calendar_events.delete_one({"_id": oid, "user_id": user_id})
+    get_repositories().calendar.delete(user_id, event_id)
     return jsonify({"message": "Event deleted successfully"})
 
 
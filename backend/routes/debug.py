@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import os
+import sys
+
+from flask import Blueprint, abort, current_app, jsonify, request
+
+from ..utils.db import db_breaker, get_db, get_db_profile, get_startup_mode
+from ..utils.events import hub
+from ..utils.generations import reaper
+from ..utils.session_archive import archiver
+from ..utils.slow_queries import (
+    SLOW_QUERY_EXPLAIN_SAMPLE, group_by_shape, rank_by_docs_examined, recent_slow_queries, slow_query_recorder,
+)
+from ..utils.user_cache import cache_stats
+
+
+bp = Blueprint("debug", __name__, url_prefix="/debug")
+
+
+def _truthy(value: str | None) -> bool:
+    return (value or "").strip().lower() in ("1", "true", "yes")
+
+
+def debug_endpoints_enabled() -> bool:
+    """
+    DEBUG_ENDPOINTS=1/0 turns /debug on or off; unset, it follows debug
+    mode (FLASK_DEBUG, or app.run(debug=True)).
+    """
+    setting = os.getenv("DEBUG_ENDPOINTS")
+    if setting is not None and setting.strip():
+        return _truthy(setting)
+    return current_app.debug
+
+
+@bp.before_request
+def _guard():
+    # Slow-query samples, explain plans and pool state aren't for the public.
+    if not debug_endpoints_enabled():
+        abort(404)
+
+
+@bp.get("")
+def diagnostics():
+    """
+    GET /debug
+    Deployment diagnostics (replaces the old standalone api/debug.py).
+    """
+    result = {
+        "python_version": sys.version,
+        "mongodb_uri_set": "MONGODB_URI" in os.environ,
+        "db_profile": get_db_profile(),
+        "startup_mode": get_startup_mode(),
+        "breaker": db_breaker.snapshot(),
+        "slow_query_recorder": slow_query_recorder.snapshot(),
+        "user_cache": cache_stats(),
+        "generation_reaper": reaper.snapshot(),
+        "session_archiver": archiver.snapshot(),
+        "events": hub.snapshot(),
+    }
+    try:
+        db = get_db()
+        db.command("ping")
+        result["mongodb_ping"] = "success"
+        result["database_name"] = db.name
+        result["collections"] = sorted(db.list_collection_names())
+    except Exception as e:
+        result["mongodb_ping"] = f"failed: {e}"
+    return jsonify(result)
+
+
+@bp.get("/slow-queries")
+def slow_queries():
+    """
+    GET /debug/slow-queries
+    Optional query params: limit (default 50), min_ms, group=1 (by shape),
+    sort=docs_examined (only rows whose count is known, most first)
+    """
+    try:
+        limit = max(1, min(int(request.args.get("limit", 50)), 1000))
+        min_ms = float(request.args.get("min_ms", 0) or 0)
+    except ValueError:
+        return jsonify({"error": "limit and min_ms must be numbers"}), 400
+
+    records = recent_slow_queries(get_db(), limit=limit, min_ms=min_ms)
+    body = {
+        "recorder": slow_query_recorder.snapshot(),
+        "count": len(records),
+        # Only explained commands have a count; see SLOW_QUERY_EXPLAIN_SAMPLE.
+        "docs_examined": {"source": "sampled explain", "sample_rate": SLOW_QUERY_EXPLAIN_SAMPLE},
+    }
+    by_docs = request.args.get("sort") == "docs_examined"
+    if request.args.get("group") in ("1", "true"):
+        groups = group_by_shape(records)
+        body["groups"] = rank_by_docs_examined(groups, "docs_examined_max") if by_docs else groups
+    else:
+        body["queries"] = rank_by_docs_examined(records) if by_docs else records
+    return jsonify(body)
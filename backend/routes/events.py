@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+from flask import Blueprint, Response, jsonify, request
+
+from ..utils.db import get_default_user_id
+from ..utils.events import events_enabled, hub
+
+
+bp = Blueprint("events", __name__)
+
+
+@bp.get("/api/events")
+def event_stream():
+    """
+    GET /api/events
+    Server-Sent Events for the current user: star-created, star-moved,
+    star-deleted, task-changed, stats-changed and resync. 204 when live
+    updates are off, which also stops EventSource from reconnecting.
+    """
+    if not events_enabled():
+        return "", 204
+    sub = hub.subscribe(get_default_user_id(), request.headers.get("Last-Event-ID"))
+    if sub is None:
+        response = jsonify({"error": "Too many event streams"})
+        response.status_code = 503
+        response.headers["Retry-After"] = "30"
+        return response
+
+    response = Response(hub.stream(sub), mimetype="text/event-stream")
+    # Unsubscribe even if the stream is closed before it was iterated.
+    response.call_on_close(lambda: hub.unsubscribe(sub))
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"  # nginx: don't buffer the stream
+    return response
@@ -1,38 +1,55 @@
 from __future__ import annotations
 
+import zlib
 from datetime import datetime
 
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context
 from bson import ObjectId
 
+from ..repositories import get_repositories
+from ..utils.compression import PrecompressedAsset
+from ..utils.conditional import ConditionalSpec, conditional_view
+from ..utils.constellation_match import CONSTELLATION_MATCH_MAX_STARS, ConstellationMatcher
 from ..utils.db import get_db, get_default_user_id
+from ..utils.events import publish
+from ..utils.galaxy_transfer import (
+    GalaxyImporter, ImportFormatError, chunked, export_lines, gzipped, import_records, open_upload, read_header,
+)
+from ..utils.generations import current_generation, start_new_generation
+from ..utils.serializers import Field, Serializer
+from ..utils.single_flight import coalesced_view
+from ..utils.spatial import galaxy_indexes
+from ..utils.timelapse import TIMELAPSE_BATCH_SIZE, frame_count, timelapse_lines
+from ..utils.user_cache import cached_stream, cached_view
+from ..utils.versions import bump_versions, bumps_versions
 
 
 bp = Blueprint("galaxy", __name__)
 
 
-def serialize_celestial(doc):
-    return {
-        "id": str(doc["_id"]),
-        "type": doc.get("type"),
-        "radius": doc.get("radius"),
-        "color": doc.get("color"),
-        "x": doc.get("x"),
-        "y": doc.get("y"),
-        "created_at": doc.get("created_at"),
-        "session_id": doc.get("session_id"),
-        "meta": doc.get("meta", {}),
-    }
+serialize_celestial = Serializer("serialize_celestial", [
+    Field("id", "_id", convert="str"),
+    Field("type"),
+    Field("radius"),
+    Field("color"),
+    Field("x"),
+    Field("y"),
+    Field("created_at"),
+    Field("session_id"),
+    Field("meta", default={}),
+])
 
 
 @bp.get("/api/galaxy/data")
+@conditional_view("galaxy_data", ("celestial_objects",))
+@coalesced_view("galaxy_data", ("celestial_objects",))
+@cached_view("galaxy_data", ("celestial_objects",))
 def galaxy_data():
     """
     Primary endpoint for the canvas.
     """
-    db = get_db()
     user_id = get_default_user_id()
-    docs = db.celestial_objects.find({"user_id": user_id}).sort("created_at", 1)
+    docs = get_repositories().celestial.list(user_id, current_generation(user_id), serialize_celestial.projection)
     return jsonify([serialize_celestial(d) for d in docs])
 
 
@@ -43,13 +60,49 @@ def galaxy_legacy():
     """
     return galaxy_data()
 
+
+serialize_timelapse_star = Serializer("serialize_timelapse_star", [
+    Field("id", "_id", convert="str"),
+    Field("x"),
+    Field("y"),
+    Field("radius"),
+    Field("color"),
+    Field("type"),
+])
+
+_TIMELAPSE = ConditionalSpec("galaxy_timelapse", ("celestial_objects",), ("frames",))
+
+
+@bp.get("/api/galaxy/timelapse")
+@conditional_view(_TIMELAPSE.name, _TIMELAPSE.collections, _TIMELAPSE.vary)
+def galaxy_timelapse():
+    """
+    The galaxy's growth as ?frames=N keyframes of new stars (NDJSON, see
+    utils.timelapse). Cached per user until the next star changes.
+    """
+    user_id = get_default_user_id()
+    frames = frame_count(request.args.get("frames"))
+
+    def produce():
+        celestial = get_repositories().celestial
+        generation = current_generation(user_id)
+        created_range = celestial.created_range(user_id, generation)
+        projection = {**serialize_timelapse_star.projection, "created_at": 1}
+        batches = celestial.batches(user_id, generation, projection, TIMELAPSE_BATCH_SIZE)
+        total = celestial.count(user_id, generation) if created_range else 0
+        return timelapse_lines(batches, created_range, total, frames, serialize_timelapse_star,
+                               current_app.json.dumps_bytes)
+
+    key = _TIMELAPSE.key(user_id, request.args)
+    return cached_stream(_TIMELAPSE.name, key, produce, "application/x-ndjson")
+
 @bp.post("/api/galaxy/stars")
+@bumps_versions("celestial_objects")
 def create_stars():
     """
     Bulk create stars.
     Body: { stars: [{ x, y, radius?, color?, type? }, ...] }
     """
-    db = get_db()
     user_id = get_default_user_id()
     data = request.get_json(silent=True) or {}
     stars = data.get("stars") or []
@@ -61,10 +114,12 @@ def create_stars():
         return jsonify({"created": 0, "ids": []})
 
     now = datetime.utcnow()
+    generation = current_generation(user_id)
     new_docs = []
     for s in stars:
         new_docs.append({
             "user_id": user_id,
+            "generation": generation,
             "x": float(s.get("x", 0)),
             "y": float(s.get("y", 0)),
             "radius": float(s.get("radius", 2)),
@@ -75,22 +130,24 @@ def create_stars():
         })
 
     if new_docs:
-        result = db.celestial_objects.insert_many(new_docs)
+        ids = get_repositories().celestial.create_many(new_docs)
+        galaxy_indexes.added(user_id, new_docs)
+        publish(user_id, "star-created", {"stars": [serialize_celestial(d) for d in new_docs]})
         return jsonify({
-            "created": len(result.inserted_ids),
-            "ids": [str(oid) for oid in result.inserted_ids]
+            "created": len(ids),
+            "ids": ids
         })
     
     return jsonify({"created": 0, "ids": []})
 
 
 @bp.delete("/api/galaxy/stars")
+@bumps_versions("celestial_objects")
 def delete_stars():
     """
     Bulk delete stars.
     Body: { ids: [id1, id2, ...] }
     """
-    db = get_db()
     user_id = get_default_user_id()
     data = request.get_json(silent=True) or {}
     ids = data.get("ids") or []
@@ -98,32 +155,26 @@ def delete_stars():
     if not ids:
         return jsonify({"deleted": 0})
         
-    oids = []
-    for i in ids:
-        try:
-            oids.append(ObjectId(i))
-        except:
-            continue
+    ids = [str(ObjectId(i)) for i in ids if ObjectId.is_valid(i)]
             
-    if not oids:
+    if not ids:
         return jsonify({"deleted": 0})
         
-    result = db.celestial_objects.delete_many({
-        "_id": {"$in": oids},
-        "user_id": user_id
-    })
-    
-    return jsonify({"deleted": result.deleted_count})
+    deleted = get_repositories().celestial.delete(user_id, current_generation(user_id), ids)
+    if deleted:
+        galaxy_indexes.removed(user_id, ids)
+        publish(user_id, "star-deleted", {"ids": ids})
+
+    return jsonify({"deleted": deleted})
 @bp.post("/api/galaxy/reset")
 def galaxy_reset():
-    db = get_db()
     user_id = get_default_user_id()
     if not user_id:
         return jsonify({"ok": False, "error": "unauthenticated"}), 401
 
-    deleted = db.celestial_objects.delete_many({"user_id": user_id}).deleted_count
-    db.galaxy_layout.delete_many({"user_id": user_id})
-    db.sessions.delete_many({"user_id": user_id})
+    # Stars, sessions and layout of the old generation disappear from every
+    # read at once; the reaper deletes them in the background.
+    generation = start_new_generation(user_id)
 
     default_stats = {
         "user_id": user_id,
@@ -134,20 +185,16 @@ def galaxy_reset():
         "last_reset_at": datetime.utcnow(),
     }
 
-    db.galaxy_stats.update_one(
-        {"user_id": user_id},
-        {"$set": default_stats},
-        upsert=True,
-    )
+    get_repositories().celestial.save_stats(user_id, default_stats)
+    publish(user_id, "resync", {"reason": "reset"})
 
-    return jsonify({"ok": True, "deleted": deleted, "stats": default_stats})
+    return jsonify({"ok": True, "generation": generation, "stats": default_stats})
 
 
 @bp.get("/api/galaxy/layout")
 def galaxy_layout_get():
-    db = get_db()
     user_id = get_default_user_id()
-    docs = db.celestial_objects.find({"user_id": user_id})
+    docs = get_repositories().celestial.positions(user_id, current_generation(user_id))
     layout = [
         {"id": str(doc["_id"]), "x": doc.get("x", 0), "y": doc.get("y", 0)}
         for doc in docs
@@ -155,40 +202,183 @@ def galaxy_layout_get():
     return jsonify({"layout": layout})
 
 
+NEAREST_MAX_K = 100
+
+
+def _point_args():
+    """
+    (x, y) from the query string, or an error response.
+    """
+    try:
+        return (float(request.args["x"]), float(request.args["y"])), None
+    except (KeyError, ValueError):
+        return None, (jsonify({"error": "x and y are required numbers"}), 400)
+
+
+def _stars_by_id(user_id, ids):
+    docs = get_repositories().celestial.find(user_id, current_generation(user_id), ids)
+    return {str(d["_id"]): serialize_celestial(d) for d in docs}
+
+
+@bp.get("/api/galaxy/nearest")
+@conditional_view("galaxy_nearest", ("celestial_objects",), vary=("x", "y", "k"))
+def galaxy_nearest():
+    """
+    The k stars closest to (x, y), nearest first, each with its distance.
+    """
+    point, error = _point_args()
+    if error:
+        return error
+    try:
+        k = max(1, min(int(request.args.get("k", 1)), NEAREST_MAX_K))
+    except ValueError:
+        return jsonify({"error": "k must be an integer"}), 400
+
+    user_id = get_default_user_id()
+    nearest = galaxy_indexes.get(user_id).nearest(point[0], point[1], k)
+    stars = _stars_by_id(user_id, [star_id for _, star_id, _, _ in nearest])
+    return jsonify({"stars": [
+        {**stars[star_id], "distance": distance} for distance, star_id, _, _ in nearest if star_id in stars
+    ]})
+
+
+@bp.get("/api/galaxy/at")
+@conditional_view("galaxy_at", ("celestial_objects",), vary=("x", "y", "tolerance"))
+def galaxy_at():
+    """
+    Hit test: the star drawn at (x, y), i.e. whose radius (plus
+    ?tolerance=) covers the point, preferring the closest centre.
+    """
+    point, error = _point_args()
+    if error:
+        return error
+    try:
+        tolerance = max(0.0, float(request.args.get("tolerance", 0)))
+    except ValueError:
+        return jsonify({"error": "tolerance must be a number"}), 400
+
+    user_id = get_default_user_id()
+    for distance, star_id in galaxy_indexes.get(user_id).at(point[0], point[1], tolerance):
+        star = _stars_by_id(user_id, [star_id]).get(star_id)
+        if star is not None:
+            return jsonify({"star": {**star, "distance": distance}})
+    return jsonify({"star": None})
+
+
+def _truthy(value: str | None) -> bool:
+    return (value or "").strip().lower() in ("1", "true", "yes")
+
+
+def _transfer_unsupported():
+    # Export/import stream MongoDB Extended JSON straight from/to cursors.
+    engine = get_repositories().engine
+    if engine != "mongo":
+        return jsonify({"error": f"Galaxy export/import is not available with the {engine} storage backend"}), 501
+    return None
+
+
+@bp.get("/api/galaxy/export")
+def galaxy_export():
+    """
+    Stream the current galaxy (sessions, stars, layout, session rollups) as NDJSON.
+    ?gzip=1 returns a .ndjson.gz download instead.
+    """
+    unsupported = _transfer_unsupported()
+    if unsupported:
+        return unsupported
+    db = get_db()
+    user_id = get_default_user_id()
+    body = chunked(export_lines(db, user_id, current_generation(user_id)))
+    filename = f"galaxy-{datetime.utcnow():%Y%m%d}.ndjson"
+    if _truthy(request.args.get("gzip")):
+        body, mimetype, filename = gzipped(body), "application/gzip", filename + ".gz"
+    else:
+        mimetype = "application/x-ndjson"
+    return Response(body, mimetype=mimetype, headers={
+        "Content-Disposition": f'attachment; filename="{filename}"',
+        "Cache-Control": "no-store",
+    })
+
+
+@bp.post("/api/galaxy/import")
+@bumps_versions("celestial_objects", "sessions", "galaxy_layout")
+def galaxy_import():
+    """
+    Import an export into the current galaxy.
+    Body: the NDJSON (optionally gzipped) as the raw body or a "file" upload.
+    ?progress=1 streams NDJSON progress reports while importing.
+    """
+    unsupported = _transfer_unsupported()
+    if unsupported:
+        return unsupported
+    db = get_db()
+    user_id = get_default_user_id()
+    upload = request.files.get("file")
+    try:
+        lines = iter(open_upload(upload.stream if upload else request.stream))
+        read_header(lines)
+    except (ImportFormatError, OSError, EOFError, zlib.error) as e:
+        return jsonify({"error": f"Invalid galaxy export: {e}"}), 400
+
+    importer = GalaxyImporter(db, user_id, current_generation(user_id))
+    progress = import_records(importer, lines)
+
+    if _truthy(request.args.get("progress")):
+        def stream():
+            dumps = current_app.json.dumps_bytes
+            try:
+                for report in progress:
+                    yield dumps(report) + b"\n"
+            except (OSError, EOFError, zlib.error) as e:
+                importer.flush_all()
+                yield dumps({"error": f"Upload ended early: {e}", **importer.report()}) + b"\n"
+            finally:
+                # The decorator's bump ran when the response started.
+                bump_versions(user_id, "celestial_objects", "sessions", "galaxy_layout")
+                publish(user_id, "resync", {"reason": "import"})
+        return Response(stream_with_context(stream()), mimetype="application/x-ndjson")
+
+    report = None
+    try:
+        for report in progress:
+            print(f"✓ Galaxy import for {user_id}: {report['lines']} lines")
+    except (OSError, EOFError, zlib.error) as e:
+        importer.flush_all()
+        return jsonify({"error": f"Upload ended early: {e}", **importer.report()}), 400
+    finally:
+        publish(user_id, "resync", {"reason": "import"})
+    return jsonify(report)
+
+
 @bp.post("/api/galaxy/layout")
+@bumps_versions("celestial_objects")
 def galaxy_layout_save():
     data = request.get_json(silent=True) or {}
     layout = data.get("layout") or []
     if not isinstance(layout, list):
         return jsonify({"error": "layout must be a list"}), 400
 
-    db = get_db()
+    celestial = get_repositories().celestial
     user_id = get_default_user_id()
+    generation = current_generation(user_id)
 
-    updated = 0
+    # Dragged positions go to the override map in one write.
+    moves = {}
     for item in layout:
         star_id = item.get("id")
-        if not star_id:
-            continue
-        try:
-            oid = ObjectId(star_id)
-        except Exception:
+        if not star_id or not ObjectId.is_valid(star_id):
             continue
-        update_result = db.celestial_objects.update_one(
-            {"_id": oid, "user_id": user_id},
-            {
-                "$set": {
-                    "x": float(item.get("x", 0) or 0),
-                    "y": float(item.get("y", 0) or 0),
-                }
-            },
-        )
-        updated += update_result.modified_count
+        moves[str(ObjectId(star_id))] = (float(item.get("x", 0) or 0), float(item.get("y", 0) or 0))
+    moved = [{"id": i, "x": moves[i][0], "y": moves[i][1]} for i in celestial.move_many(user_id, generation, moves)]
+    updated = len(moved)
+    if moved:
+        galaxy_indexes.moved(user_id, {m["id"]: (m["x"], m["y"]) for m in moved})
+        publish(user_id, "star-moved", {"stars": moved})
 
     # Guard: Do not delete stars here. This endpoint only updates positions.
     # If the client sends a subset of stars, the others remain untouched.
     
-    docs = db.celestial_objects.find({"user_id": user_id})
+    docs = celestial.positions(user_id, generation)
     layout = [
         {"id": str(doc["_id"]), "x": doc.get("x", 0), "y": doc.get("y", 0)}
         for doc in docs
@@ -210,13 +400,83 @@ def load_constellations():
 
 CONSTELLATION_PRESETS = load_constellations()
 
+# The catalog never changes at runtime, so encode it once.
+_CONSTELLATIONS_ASSET = PrecompressedAsset.build(
+    json.dumps({"constellations": CONSTELLATION_PRESETS}, separators=(",", ":")).encode("utf-8"),
+    "application/json",
+)
+
 
 @bp.get("/api/constellations")
 def constellation_presets():
-    return jsonify({"constellations": CONSTELLATION_PRESETS})
+    return _CONSTELLATIONS_ASSET.to_response()
+
+
+_CONSTELLATION_MATCHER = ConstellationMatcher(CONSTELLATION_PRESETS)
+
+
+def _selected_stars(data):
+    """
+    Positions of the stars named by body["ids"] or inside body["region"]
+    ({x, y, width, height}); a (positions, error message) pair.
+    """
+    grid = galaxy_indexes.get(get_default_user_id())
+    if data.get("ids") is not None:
+        ids = data["ids"]
+        if not isinstance(ids, list):
+            return None, "ids must be a list"
+        # Bound the lookup by the request size, before touching the index.
+        if len(ids) > CONSTELLATION_MATCH_MAX_STARS:
+            return None, f"Select at most {CONSTELLATION_MATCH_MAX_STARS} stars"
+        keys = dict.fromkeys(str(ObjectId(i)) for i in ids if isinstance(i, str) and ObjectId.is_valid(i))
+        found = (grid.positions.get(key) for key in keys)
+        return [p for p in found if p is not None], None
+    region = data.get("region")
+    if not isinstance(region, dict):
+        return None, "Send ids or region"
+    try:
+        x, y = float(region["x"]), float(region["y"])
+        width, height = float(region["width"]), float(region["height"])
+    except (KeyError, TypeError, ValueError):
+        return None, "region needs numeric x, y, width and height"
+    if width <= 0 or height <= 0:
+        return None, "region width and height must be positive"
+    return [(sx, sy) for _, sx, sy in grid.in_rect(x, y, x + width, y + height)], None
+
+
+@bp.post("/api/constellations/match")
+def constellation_match():
+    """
+    Which preset a group of the user's stars most resembles, regardless
+    of where it is, how big it is and how it is rotated.
+    Body: { ids: [...] } or { region: {x, y, width, height} }
+    """
+    stars, error = _selected_stars(request.get_json(silent=True) or {})
+    if error:
+        return jsonify({"error": error}), 400
+    if len(stars) < 3:
+        return jsonify({"error": "Select at least 3 stars"}), 400
+    if len(stars) > CONSTELLATION_MATCH_MAX_STARS:
+        return jsonify({"error": f"Select at most {CONSTELLATION_MATCH_MAX_STARS} stars"}), 400
+
+    matches, center, scale = _CONSTELLATION_MATCHER.match(stars)
+    if not matches:
+        return jsonify({"error": "No constellation presets loaded"}), 503
+    best = matches[0]
+    return jsonify({
+        "match": best.name,
+        "similarity": round(best.similarity, 4),
+        "stars": len(stars),
+        "placement": _CONSTELLATION_MATCHER.placement(best.name, center, scale, best.rotation),
+        "ranking": [
+            {"name": m.name, "similarity": round(m.similarity, 4), "distance": round(m.distance, 4)}
+            for m in matches
+        ],
+    })
 
 
 @bp.post("/api/galaxy/layout/merge")
+@bumps_versions("celestial_objects")
 def galaxy_layout_merge():
     """
     Merge layout updates and create new stars if needed.
@@ -225,29 +485,30 @@ def galaxy_layout_merge():
         new_stars: [{x, y, radius, color, type}, ...] 
     }
     """
-    db = get_db()
+    celestial = get_repositories().celestial
     user_id = get_default_user_id()
     data = request.get_json(silent=True) or {}
     
     updates = data.get("updates") or []
     new_stars = data.get("new_stars") or []
+    generation = current_generation(user_id)
     
-    updated_count = 0
     created_ids = []
     
     # 1. Update existing stars
+    moves = {}
     for item in updates:
         star_id = item.get("id")
-        if not star_id: continue
+        if not star_id or not ObjectId.is_valid(star_id): continue
         try:
-            oid = ObjectId(star_id)
-            res = db.celestial_objects.update_one(
-                {"_id": oid, "user_id": user_id},
-                {"$set": {"x": float(item.get("x", 0)), "y": float(item.get("y", 0))}}
-            )
-            updated_count += res.modified_count
-        except:
+            moves[str(ObjectId(star_id))] = (float(item.get("x", 0)), float(item.get("y", 0)))
+        except (TypeError, ValueError):
             continue
+    moved = [{"id": i, "x": moves[i][0], "y": moves[i][1]} for i in celestial.move_many(user_id, generation, moves)]
+    updated_count = len(moved)
+    if moved:
+        galaxy_indexes.moved(user_id, {m["id"]: (m["x"], m["y"]) for m in moved})
+        publish(user_id, "star-moved", {"stars": moved})
             
     # 2. Create new stars
     if new_stars:
@@ -256,6 +517,7 @@ def galaxy_layout_merge():
         for s in new_stars:
             docs.append({
                 "user_id": user_id,
+                "generation": generation,
                 "x": float(s.get("x", 0)),
                 "y": float(s.get("y", 0)),
                 "radius": float(s.get("radius", 2)),
@@ -265,8 +527,9 @@ def galaxy_layout_merge():
                 "created_via": "constellation_merge"
             })
         if docs:
-            res = db.celestial_objects.insert_many(docs)
-            created_ids = [str(oid) for oid in res.inserted_ids]
+            created_ids = celestial.create_many(docs)
+            galaxy_indexes.added(user_id, docs)
+            publish(user_id, "star-created", {"stars": [serialize_celestial(d) for d in docs]})
             
     return jsonify({
         "updated": updated_count,
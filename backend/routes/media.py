@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+from flask import Blueprint, abort, redirect
+
+from ..utils.media import IMMUTABLE_CACHE_CONTROL, get_media_file, media_url, send_media
+
+
+bp = Blueprint("media", __name__, url_prefix="/media")
+
+
+@bp.get("/<digest>/<path:filename>")
+def hashed_media(digest: str, filename: str):
+    """
+    GET /media/<digest>/<filename>
+    Content-hashed audio URL. Cached forever by clients; supports Range.
+    """
+    media = get_media_file(filename)
+    if media is None:
+        abort(404)
+    if digest != media.short_digest:
+        # The file changed since this URL was handed out.
+        return redirect(media_url(filename), code=302)
+    return send_media(filename, cache_control=IMMUTABLE_CACHE_CONTROL)
@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+from flask import Blueprint, Response
+
+from ..utils.metrics import render_prometheus
+
+
+bp = Blueprint("metrics", __name__)
+
+
+@bp.get("/metrics")
+def metrics():
+    """
+    GET /metrics
+    Route latency, MongoDB command and pool metrics for Prometheus.
+    Numbers are per worker process.
+    """
+    return Response(render_prometheus(), content_type="text/plain; version=0.0.4; charset=utf-8")
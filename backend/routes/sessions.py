@@ -6,32 +6,40 @@ from typing import Any, Dict
 from flask import Blueprint, jsonify, request
 from bson import ObjectId
 
-from ..utils.db import get_db, get_default_user_id
+from ..repositories import get_repositories
+from ..utils.conditional import conditional_view
+from ..utils.db import get_default_user_id
+from ..utils.events import publish
+from ..utils.generations import current_generation
+from ..utils.serializers import Field, Serializer
+from ..utils.single_flight import coalesced_view
+from ..utils.spatial import galaxy_indexes
 from ..utils.star_logic import create_celestial_for_session
+from ..utils.versions import bumps_versions
+from .galaxy import serialize_celestial
 
 
 bp = Blueprint("sessions", __name__, url_prefix="/sessions")
 
 
-def serialize_session(doc: Dict[str, Any]) -> Dict[str, Any]:
-    return {
-        "id": str(doc["_id"]),
-        "task_id": str(doc["task_id"]) if doc.get("task_id") else None,
-        "mood": doc.get("mood"),
-        "duration_minutes": doc.get("duration_minutes"),
-        "started_at": doc.get("started_at"),
-        "ended_at": doc.get("ended_at"),
-    }
+serialize_session = Serializer("serialize_session", [
+    Field("id", "_id", convert="str"),
+    Field("task_id", convert="optional_str"),
+    Field("mood"),
+    Field("duration_minutes"),
+    Field("started_at"),
+    Field("ended_at"),
+])
 
 
 @bp.post("")
+@bumps_versions("sessions", "celestial_objects")
 def create_session():
     """
     POST /sessions
     Body: { task_id?, mood, duration_minutes }
     Creates a focus session AND a celestial object.
     """
-    db = get_db()
     user_id = get_default_user_id()
     data = request.get_json(silent=True) or {}
 
@@ -56,24 +64,29 @@ def create_session():
         "started_at": now,
         "ended_at": now,
         "created_at": now,
+        "generation": current_generation(user_id),
     }
 
-    result = db.sessions.insert_one(session_doc)
-    session_id = str(result.inserted_id)
+    session_id = get_repositories().sessions.create(session_doc)
 
     celestial = create_celestial_for_session(
-        db=db,
         session_id=session_id,
         duration_minutes=duration_minutes,
         mood=mood,
         meta={"task_id": str(task_oid) if task_oid else None},
     )
 
+    doc = celestial.as_doc()
+    galaxy_indexes.added(user_id, [doc])
+    star = serialize_celestial(doc)
+    publish(user_id, "star-created", {"stars": [star]})
+    publish(user_id, "stats-changed", {"reason": "session"})
+
     return (
         jsonify(
             {
-                "session": serialize_session({**session_doc, "_id": result.inserted_id}),
-                "celestial": celestial.to_mongo(),
+                "session": serialize_session({**session_doc, "_id": session_id}),
+                "celestial": star,
             }
         ),
         201,
@@ -81,24 +94,22 @@ def create_session():
 
 
 @bp.get("/today")
+@conditional_view("sessions_today", ("sessions",), daily=True)
+@coalesced_view("sessions_today", ("sessions",), daily=True)
 def sessions_today():
     """
     GET /sessions/today
     Returns all sessions for the current UTC day.
     """
-    db = get_db()
     user_id = get_default_user_id()
 
     now = datetime.utcnow()
     start = datetime(now.year, now.month, now.day)
     end = datetime(now.year, now.month, now.day, 23, 59, 59, 999000)
 
-    docs = db.sessions.find(
-        {
-            "user_id": user_id,
-            "started_at": {"$gte": start, "$lte": end},
-        }
-    ).sort("started_at", 1)
+    docs = get_repositories().sessions.between(
+        user_id, current_generation(user_id), start, end, serialize_session.projection
+    )
 
     return jsonify([serialize_session(d) for d in docs])
 
@@ -1,56 +1,59 @@
 from __future__ import annotations
 
 from datetime import datetime, timedelta
+from typing import Any, Dict
 
 from flask import Blueprint, jsonify
 
-from ..utils.db import get_db, get_default_user_id
+from ..repositories import get_repositories
+from ..utils.conditional import conditional_view
+from ..utils.db import get_default_user_id
+from ..utils.generations import current_generation, galaxy_scope
+from ..utils.session_archive import session_archive
+from ..utils.single_flight import coalesced_view
 
 
 bp = Blueprint("stats", __name__, url_prefix="/stats")
 
 
-@bp.get("/summary")
-def summary():
-    """
-    GET /stats/summary
-    High-level overview for dashboard.
-    """
-    db = get_db()
-    user_id = get_default_user_id()
-
-    total_tasks = db.tasks.count_documents({"user_id": user_id})
-    completed_tasks = db.tasks.count_documents({"user_id": user_id, "completed": True})
+# Sessions past SESSION_ARCHIVE_DAYS live on as monthly rollups; every
+# view here adds them to the raw sessions from the archive boundary on.
 
-    total_sessions = db.sessions.count_documents({"user_id": user_id})
-    total_minutes = 0
-    for s in db.sessions.find({"user_id": user_id}):
-        total_minutes += float(s.get("duration_minutes", 0) or 0)
 
-    return jsonify(
-        {
-            "total_tasks": total_tasks,
-            "completed_tasks": completed_tasks,
-            "completion_rate": (completed_tasks / total_tasks) * 100 if total_tasks else 0,
-            "total_sessions": total_sessions,
-            "total_focus_minutes": total_minutes,
-        }
+def summary_data(user_id: str) -> Dict[str, Any]:
+    repos = get_repositories()
+    generation = current_generation(user_id)
+    archive = session_archive(user_id, generation)
+    total_tasks = repos.tasks.count(user_id)
+    completed_tasks = repos.tasks.count(user_id, completed=True)
+    total_sessions, total_minutes = repos.sessions.totals(user_id, generation, archive.boundary)
+    return build_summary(
+        total_tasks, completed_tasks, total_sessions + archive.sessions, total_minutes + archive.minutes
     )
 
 
-@bp.get("/streak")
-def streak():
-    """
-    GET /stats/streak
-    Simple daily streak based on focus sessions.
-    """
-    db = get_db()
-    user_id = get_default_user_id()
+def build_summary(total_tasks: int, completed_tasks: int, total_sessions: int, total_minutes: float) -> Dict[str, Any]:
+    return {
+        "total_tasks": total_tasks,
+        "completed_tasks": completed_tasks,
+        "completion_rate": (completed_tasks / total_tasks) * 100 if total_tasks else 0,
+        "total_sessions": total_sessions,
+        "total_focus_minutes": total_minutes,
+    }
+
+
+def streak_since() -> datetime:
+    # Unique days with a session in the last 60 days
+    return datetime.utcnow() - timedelta(days=60)
 
-    # Get unique days with a session in the last 60 days
+
+def streak_query(user_id: str, generation: int | None = None, since: datetime | None = None) -> Dict[str, Any]:
+    return {**galaxy_scope(user_id, generation), "started_at": {"$gte": since or streak_since()}}
+
+
+def count_streak(sessions) -> Dict[str, Any]:
     days = set()
-    since = datetime.utcnow() - timedelta(days=60)
-    for s in db.sessions.find({"user_id": user_id, "started_at": {"$gte": since}}):
+    for s in sessions:
         dt = s.get("started_at")
         if isinstance(dt, datetime):
             days.add(dt.date())
@@ -62,31 +65,89 @@ def streak():
         streak_len += 1
         current = current - timedelta(days=1)
 
-    return jsonify({"current_streak_days": streak_len})
+    return {"current_streak_days": streak_len}
 
 
-@bp.get("/weekly")
-def weekly():
+def streak_data(user_id: str) -> Dict[str, Any]:
+    generation = current_generation(user_id)
+    archive = session_archive(user_id, generation)
+    since = streak_since()
+    sessions = get_repositories().sessions.started_since(user_id, generation, archive.raw_since(since))
+    return count_streak(archive.days_since(since) + sessions)
+
+
+@bp.get("/summary")
+@conditional_view("summary", ("tasks", "sessions"))
+@coalesced_view("summary", ("tasks", "sessions"))
+def summary():
     """
-    GET /stats/weekly
-    Returns focus minutes per day for the last 7 days.
+    GET /stats/summary
+    High-level overview for dashboard.
+    """
+    return jsonify(summary_data(get_default_user_id()))
+
+
+@bp.get("/streak")
+@conditional_view("streak", ("sessions",), daily=True)
+@coalesced_view("streak", ("sessions",), daily=True)
+def streak():
     """
-    db = get_db()
+    GET /stats/streak
+    Simple daily streak based on focus sessions.
+    """
+    return jsonify(streak_data(get_default_user_id()))
+
+
+@bp.get("/dashboard")
+@conditional_view("dashboard", ("tasks", "sessions", "calendar_events"), daily=True)
+@coalesced_view("dashboard", ("tasks", "sessions", "calendar_events"), daily=True)
+def dashboard():
+    """
+    GET /stats/dashboard
+    Summary, streak, tasks and this month's calendar in one response.
+    """
+    from .calendar import serialize_event
+    from .tasks import serialize_task
+
+    repos = get_repositories()
     user_id = get_default_user_id()
+    today = datetime.utcnow().date()
+    tasks = repos.tasks.list(user_id, projection=serialize_task.projection)
+    events = repos.calendar.list(user_id, today.month, today.year, serialize_event.projection)
+    return jsonify({
+        "summary": summary_data(user_id),
+        "streak": streak_data(user_id),
+        "tasks": [serialize_task(d) for d in tasks],
+        "events": [serialize_event(d) for d in events],
+    })
+
 
+def weekly_window() -> tuple:
     today = datetime.utcnow().date()
-    start = today - timedelta(days=6)
+    return today - timedelta(days=6), today
+
+
+def weekly_since() -> datetime:
+    start, _ = weekly_window()
+    return datetime(start.year, start.month, start.day)
 
+
+def weekly_query(user_id: str, generation: int | None = None, since: datetime | None = None) -> Dict[str, Any]:
+    return {**galaxy_scope(user_id, generation), "started_at": {"$gte": since or weekly_since()}}
+
+
+def bucket_weekly(sessions) -> list:
+    start, today = weekly_window()
     buckets = { (start + timedelta(days=i)): 0.0 for i in range(7) }
 
-    for s in db.sessions.find({"user_id": user_id}):
+    for s in sessions:
         dt = s.get("started_at")
         if isinstance(dt, datetime):
             d = dt.date()
             if start <= d <= today:
                 buckets[d] += float(s.get("duration_minutes", 0) or 0)
 
-    data = [
+    return [
         {
             "date": d.isoformat(),
             "minutes": buckets[d],
@@ -94,6 +155,18 @@ def weekly():
         for d in sorted(buckets.keys())
     ]
 
-    return jsonify(data)
-
 
+@bp.get("/weekly")
+@conditional_view("weekly", ("sessions",), daily=True)
+@coalesced_view("weekly", ("sessions",), daily=True)
+def weekly():
+    """
+    GET /stats/weekly
+    Returns focus minutes per day for the last 7 days.
+    """
+    user_id = get_default_user_id()
+    generation = current_generation(user_id)
+    archive = session_archive(user_id, generation)
+    since = weekly_since()
+    sessions = get_repositories().sessions.started_since(user_id, generation, archive.raw_since(since))
+    return jsonify(bucket_weekly(archive.days_since(since) + sessions))
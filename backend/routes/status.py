@@ -2,7 +2,8 @@ from __future__ import annotations
 
 from flask import Blueprint, jsonify
 
-from ..utils.db import get_db
+from ..repositories import get_repositories
+from ..utils.db import DB_UNAVAILABLE_ERRORS, db_breaker, get_db, get_pool_stats
 
 
 bp = Blueprint("status", __name__)
@@ -12,19 +13,34 @@ bp = Blueprint("status", __name__)
 def status():
     """
     GET /status
-    Simple health check: DB connectivity + collection names.
+    Simple health check: DB connectivity + collection names + pool stats
+    + circuit breaker state.
     """
     try:
+        repos = get_repositories()
+        if repos.engine != "mongo":
+            repos.ping()
+            return jsonify({"ok": True, "storage": repos.engine})
         db = get_db()
         collections = sorted(db.list_collection_names())
         return jsonify(
             {
                 "ok": True,
+                "storage": repos.engine,
                 "database": db.name,
                 "collections": collections,
+                "pool": get_pool_stats(),
+                "breaker": db_breaker.snapshot(),
             }
         )
+    except DB_UNAVAILABLE_ERRORS as exc:
+        if not db_breaker.is_open:
+            db_breaker.record_failure(exc)
+        return (
+            jsonify({"ok": False, "error": str(exc), "breaker": db_breaker.snapshot()}),
+            503,
+        )
     except Exception as exc:  # pragma: no cover - defensive
-        return jsonify({"ok": False, "error": str(exc)}), 500
+        return jsonify({"ok": False, "error": str(exc), "pool": get_pool_stats(), "breaker": db_breaker.snapshot()}), 500
 
 
@@ -6,51 +6,56 @@ from typing import Any, Dict
 from flask import Blueprint, jsonify, request
 from bson import ObjectId
 
-from ..utils.db import get_db, get_default_user_id
+from ..repositories import get_repositories
+from ..repositories.base import task_args
+from ..utils.conditional import conditional_view
+from ..utils.db import DB_UNAVAILABLE_ERRORS, get_default_user_id
+from ..utils.events import publish
+from ..utils.serializers import Field, Serializer
+from ..utils.single_flight import coalesced_view
+from ..utils.spatial import galaxy_indexes
+from ..utils.user_cache import cached_view
+from ..utils.versions import bumps_versions
 
 
 bp = Blueprint("tasks", __name__, url_prefix="/tasks")
 
 
-def serialize_task(doc: Dict[str, Any]) -> Dict[str, Any]:
-    return {
-        "id": str(doc["_id"]),
-        "title": doc.get("title", ""),
-        "description": doc.get("description", ""),
-        "date": doc.get("date"),
-        "due_at": doc.get("due_at"),  # ISO string
-        "priority": doc.get("priority", "Medium"),
-        "category": doc.get("category", "Personal"),
-        "completed": bool(doc.get("completed", False)),
-        "created_at": doc.get("created_at"),
-    }
+serialize_task = Serializer("serialize_task", [
+    Field("id", "_id", convert="str"),
+    Field("title", default=""),
+    Field("description", default=""),
+    Field("date"),
+    Field("due_at"),  # ISO string
+    Field("priority", default="Medium"),
+    Field("category", default="Personal"),
+    Field("completed", default=False, convert="bool"),
+    Field("created_at"),
+])
+
+def task_changed(user_id: str, action: str, task: Dict[str, Any]) -> None:
+    # Task counts feed /stats/summary, so every task write changes stats.
+    publish(user_id, "task-changed", {"action": action, "task": task})
+    publish(user_id, "stats-changed", {"reason": "task"})
 
 
 @bp.get("")
+@conditional_view("list_tasks", ("tasks",), vary=("category", "completed"))
+@coalesced_view("list_tasks", ("tasks",), vary=("category", "completed"))
+@cached_view("list_tasks", ("tasks",), vary=("category", "completed"))
 def list_tasks():
     """
     GET /tasks
     Optional query params: category, completed
     """
     try:
-        db = get_db()
         user_id = get_default_user_id()
 
-        query: Dict[str, Any] = {"user_id": user_id}
-
-        category = request.args.get("category")
-        if category and category != "all":
-            query["category"] = category
-
-        completed = request.args.get("completed")
-        if completed is not None:
-            query["completed"] = completed == "true"
-
-        docs = (
-            db.tasks.find(query)
-            .sort([("date", -1), ("due_at", 1), ("created_at", -1)])
-        )
+        category, completed = task_args(request.args)
+        docs = get_repositories().tasks.list(user_id, category, completed, serialize_task.projection)
         return jsonify([serialize_task(d) for d in docs])
+    except DB_UNAVAILABLE_ERRORS:
+        raise
     except Exception as e:
         print(f"Error in list_tasks: {e}")
         import traceback
@@ -59,13 +64,13 @@ def list_tasks():
 
 
 @bp.post("")
+@bumps_versions("tasks")
 def create_task():
     """
     POST /tasks
     Body: { title, description?, date, due_at?, priority?, category?, completed? }
     """
     try:
-        db = get_db()
         user_id = get_default_user_id()
         data = request.get_json(silent=True) or {}
 
@@ -80,11 +85,14 @@ def create_task():
             "completed": bool(data.get("completed", False)),
             "created_at": datetime.utcnow(),
         }
-        result = db.tasks.insert_one(doc)
+        task_id = get_repositories().tasks.create(doc)
+        task_changed(user_id, "created", serialize_task(doc))
         return (
-            jsonify({"id": str(result.inserted_id), "message": "Task created successfully"}),
+            jsonify({"id": task_id, "message": "Task created successfully"}),
             201,
         )
+    except DB_UNAVAILABLE_ERRORS:
+        raise
     except Exception as e:
         print(f"Error in create_task: {e}")
         import traceback
@@ -93,21 +101,20 @@ def create_task():
 
 
 @bp.put("/<task_id>")
+@bumps_versions("tasks")
 def update_task(task_id: str):
     """
     PUT /tasks/<id>
     Replaces editable fields.
     """
-    db = get_db()
+    tasks = get_repositories().tasks
     user_id = get_default_user_id()
     data = request.get_json(silent=True) or {}
 
-    try:
-        oid = ObjectId(task_id)
-    except Exception:
+    if not ObjectId.is_valid(task_id):
         return jsonify({"error": "Invalid task id"}), 400
 
-    existing = db.tasks.find_one({"_id": oid, "user_id": user_id})
+    existing = tasks.get(user_id, task_id)
     if not existing:
         return jsonify({"error": "Task not found"}), 404
 
@@ -121,28 +128,29 @@ def update_task(task_id: str):
         "completed": bool(data.get("completed", existing.get("completed", False))),
     }
 
-    db.tasks.update_one({"_id": oid, "user_id": user_id}, {"$set": update_doc})
+    tasks.update(user_id, task_id, update_doc)
+    task_changed(user_id, "updated", serialize_task({**existing, **update_doc}))
     return jsonify({"message": "Task updated successfully"})
 
 
 @bp.delete("/<task_id>")
+@bumps_versions("tasks")
 def delete_task(task_id: str):
     """
     DELETE /tasks/<id>
     """
-    db = get_db()
     user_id = get_default_user_id()
 
-    try:
-        oid = ObjectId(task_id)
-    except Exception:
+    if not ObjectId.is_valid(task_id):
         return jsonify({"error": "Invalid task id"}), 400
 
-    db.tasks.delete_one({"_id": oid, "user_id": user_id})
+    if get_repositories().tasks.delete(user_id, task_id):
+        task_changed(user_id, "deleted", {"id": task_id})
     return jsonify({"message": "Task deleted successfully"})
 
 
 @bp.patch("/<task_id>/complete")
+@bumps_versions("tasks", "celestial_objects")
 def complete_task(task_id: str):
     """
     PATCH /tasks/<id>/complete
@@ -150,27 +158,24 @@ def complete_task(task_id: str):
     """
     from ..utils.star_logic import create_celestial_for_session
     
-    db = get_db()
+    tasks = get_repositories().tasks
     user_id = get_default_user_id()
 
-    try:
-        oid = ObjectId(task_id)
-    except Exception:
+    if not ObjectId.is_valid(task_id):
         return jsonify({"error": "Invalid task id"}), 400
 
     # Get the task details before updating
-    task = db.tasks.find_one({"_id": oid, "user_id": user_id})
+    task = tasks.get(user_id, task_id)
     if not task:
         return jsonify({"error": "Task not found"}), 404
 
     # Update task as completed
-    db.tasks.update_one({"_id": oid, "user_id": user_id}, {"$set": {"completed": True}})
+    tasks.update(user_id, task_id, {"completed": True})
     
     # Create a celestial object for the completed task
     # Use a fixed duration for task completion (e.g., 15 minutes equivalent)
     # This creates a small star for each completed task
     celestial = create_celestial_for_session(
-        db=db,
         session_id=f"task-{task_id}",
         duration_minutes=15.0,  # Fixed duration for task completion
         mood="happy",  # Use a bright color for task completion
@@ -182,10 +187,17 @@ def complete_task(task_id: str):
         }
     )
     
+    from .galaxy import serialize_celestial
+
+    task_changed(user_id, "updated", serialize_task({**task, "completed": True}))
+    doc = celestial.as_doc()
+    galaxy_indexes.added(user_id, [doc])
+    publish(user_id, "star-created", {"stars": [serialize_celestial(doc)]})
+
     return jsonify({
         "message": "Task marked as completed",
         "celestial": {
-            "id": str(celestial.meta.get("_id")) if "_id" in celestial.meta else None,
+            "id": celestial.id,
             "type": celestial.type,
             "color": celestial.color
         }
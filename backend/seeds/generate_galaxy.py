@@ -0,0 +1,325 @@
+"""
+Bulk synthetic data generator for benchmarking and capacity planning.
+
+Unlike seed_demo_stars (one insert + count per star), this builds sessions
+and their stars in memory, computes spiral positions in bulk and writes
+them with batched insert_many from a pool of worker processes:
+
+    python -m backend.seeds.generate_galaxy --users 1 --stars 1000000 --workers 8
+    python -m backend.seeds.generate_galaxy --users 50 --stars 20000 \\
+        --durations 15:2,25:5,50:2,90:1 --moods focus:4,calm:2,happy:1 \\
+        --tasks-per-day 2 --events-per-week 3 --wipe
+
+Users are named <prefix>-0001, <prefix>-0002, ... (--demo makes the first
+one the app's demo user). Every generated document is tagged with
+meta.synthetic / synthetic so --wipe only removes generated data. For a
+given --seed the generated values are the same on every run; timestamps
+are relative to when it runs.
+"""
+from __future__ import annotations
+
+import argparse
+import math
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Tuple
+
+from bson import ObjectId
+
+from backend.utils.db import get_db, get_default_user_id
+from backend.utils.generations import current_generation
+from backend.utils.reference_cache import get_mood_palette
+from backend.utils.star_logic import duration_to_radius, duration_to_type, next_spiral_index
+from backend.utils.versions import bump_versions
+
+
+Distribution = Tuple[List[Any], List[float]]
+
+DEFAULT_DURATIONS = "5:1,15:3,25:6,45:3,60:2,90:1"
+DEFAULT_MOODS = "focus:4,calm:3,happy:2,energy:2,neutral:1"
+DEFAULT_CATEGORIES = "Work:4,Study:3,Personal:2,Life:2"
+DEFAULT_PRIORITIES = "Low:1,Medium:2,High:1"
+
+GENERATED_COLLECTIONS = ("sessions", "celestial_objects", "tasks", "calendar_events")
+
+
+def parse_distribution(spec: str, numeric: bool = False) -> Distribution:
+    """
+    "25:6,45:3" -> ([25.0, 45.0], [6.0, 3.0]). A bare value has weight 1.
+    """
+    values: List[Any] = []
+    weights: List[float] = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        value, _, weight = part.partition(":")
+        values.append(float(value) if numeric else value)
+        weights.append(float(weight) if weight else 1.0)
+    if not values or any(w < 0 for w in weights) or not sum(weights):
+        raise ValueError(f"invalid distribution: {spec!r}")
+    return values, weights
+
+
+def user_ids(count: int, prefix: str, demo: bool) -> List[str]:
+    ids = [f"{prefix}-{i:04d}" for i in range(1, count + 1)]
+    if demo and ids:
+        ids[0] = get_default_user_id()
+    return ids
+
+
+def _job_rng(seed: int, *parts: Any) -> random.Random:
+    # String seeds hash deterministically (unlike hash()), across processes too.
+    return random.Random(f"{seed}:" + ":".join(map(str, parts)))
+
+
+def generate_star_batch(job: Dict[str, Any]) -> Tuple[int, int]:
+    """
+    Build and insert sessions [start, start + count) for one user, plus one
+    star per session. Session ids are assigned client-side so both
+    collections are written with a single insert_many each.
+
+    Sessions are spread evenly over the user's history in index order, so
+    the spiral index grows with created_at like it does for real usage.
+    Indexes continue after index_base, the highest already in the galaxy.
+    """
+    user_id = job["user_id"]
+    start, count, total = job["start"], job["count"], job["total"]
+    durations, duration_weights = job["durations"]
+    moods, mood_weights = job["moods"]
+    palette = job["palette"]
+    rng = _job_rng(job["seed"], user_id, start)
+
+    history_start: datetime = job["history_start"]
+    slot = job["history_seconds"] / max(total, 1)
+    picked_durations = rng.choices(durations, duration_weights, k=count)
+    picked_moods = rng.choices(moods, mood_weights, k=count)
+    generation = current_generation(user_id)
+
+    sessions, stars = [], []
+    for i in range(count):
+        duration = picked_durations[i]
+        mood = picked_moods[i]
+        started = history_start + timedelta(seconds=(start + i + rng.random()) * slot)
+        ended = started + timedelta(minutes=duration)
+        session_id = ObjectId()
+        sessions.append({
+            "_id": session_id,
+            "user_id": user_id,
+            "task_id": None,
+            "mood": mood,
+            "duration_minutes": duration,
+            "started_at": started,
+            "ended_at": ended,
+            "created_at": ended,
+            "meta": {"synthetic": True},
+            "generation": generation,
+        })
+        stars.append({
+            "user_id": user_id,
+            "session_id": str(session_id),
+            "type": duration_to_type(duration),
+            "radius": duration_to_radius(duration),
+            "color": palette.get(mood, palette["neutral"]),
+            "spiral_index": job["index_base"] + start + i + 1,
+            "created_at": ended,
+            "meta": {"duration_minutes": duration, "mood": mood, "synthetic": True},
+            "generation": generation,
+        })
+
+    db = get_db()
+    db.sessions.insert_many(sessions, ordered=False)
+    db.celestial_objects.insert_many(stars, ordered=False)
+    return len(sessions), len(stars)
+
+
+def generate_planner(job: Dict[str, Any]) -> Tuple[int, int]:
+    """
+    Tasks and calendar events for one user across the history window.
+    """
+    user_id = job["user_id"]
+    rng = _job_rng(job["seed"], user_id, "planner")
+    categories, category_weights = job["categories"]
+    priorities, priority_weights = job["priorities"]
+    first_day: date = job["history_start"].date()
+    days = max(1, int(job["history_seconds"] // 86400))
+    today = first_day + timedelta(days=days)
+    now = datetime.utcnow()
+
+    tasks, events = [], []
+    for offset in range(days + 14):  # include two weeks of upcoming work
+        day = first_day + timedelta(days=offset)
+        for n in range(_poisson(rng, job["tasks_per_day"])):
+            tasks.append({
+                "user_id": user_id,
+                "title": f"Task {day.isoformat()} #{n + 1}",
+                "description": "",
+                "date": day.isoformat(),
+                "due_at": None,
+                "priority": rng.choices(priorities, priority_weights)[0],
+                "category": rng.choices(categories, category_weights)[0],
+                "completed": day < today and rng.random() < job["completion_rate"],
+                "created_at": now,
+                "synthetic": True,
+            })
+        for n in range(_poisson(rng, job["events_per_week"] / 7.0)):
+            events.append({
+                "user_id": user_id,
+                "title": f"Event {day.isoformat()} #{n + 1}",
+                "date": day.isoformat(),
+                "time": f"{rng.randint(7, 21):02d}:{rng.choice(['00', '15', '30', '45'])}",
+                "category": rng.choices(categories, category_weights)[0],
+                "created_at": now,
+                "synthetic": True,
+            })
+
+    db = get_db()
+    batch = job["batch_size"]
+    for start in range(0, len(tasks), batch):
+        db.tasks.insert_many(tasks[start:start + batch], ordered=False)
+    for start in range(0, len(events), batch):
+        db.calendar_events.insert_many(events[start:start + batch], ordered=False)
+    return len(tasks), len(events)
+
+
+def _poisson(rng: random.Random, mean: float) -> int:
+    # Knuth's method; fine for the small per-day means used here.
+    if mean <= 0:
+        return 0
+    limit, k, p = math.exp(-mean), 0, 1.0
+    while True:
+        p *= rng.random()
+        if p <= limit:
+            return k
+        k += 1
+
+
+def wipe(ids: List[str]) -> None:
+    db = get_db()
+    query = {"user_id": {"$in": ids}}
+    db.sessions.delete_many({**query, "meta.synthetic": True})
+    db.celestial_objects.delete_many({**query, "meta.synthetic": True})
+    db.tasks.delete_many({**query, "synthetic": True})
+    db.calendar_events.delete_many({**query, "synthetic": True})
+    for user_id in ids:
+        bump_versions(user_id, *GENERATED_COLLECTIONS)
+
+
+def build_jobs(args: argparse.Namespace, ids: List[str], palette: Dict[str, str]) -> Tuple[list, list]:
+    history_seconds = args.days * 86400
+    history_start = datetime.utcnow().replace(microsecond=0) - timedelta(seconds=history_seconds)
+    common = {
+        "seed": args.seed,
+        "history_start": history_start,
+        "history_seconds": history_seconds,
+    }
+    star_jobs, planner_jobs = [], []
+    durations = parse_distribution(args.durations, numeric=True)
+    moods = parse_distribution(args.moods)
+    unknown = [m for m in moods[0] if m not in palette]
+    if unknown:
+        raise ValueError(f"unknown moods: {', '.join(unknown)} (known: {', '.join(sorted(palette))})")
+    for user_id in ids:
+        for start in range(0, args.stars, args.batch_size):
+            star_jobs.append({
+                **common,
+                "user_id": user_id,
+                "start": start,
+                "count": min(args.batch_size, args.stars - start),
+                "total": args.stars,
+                "durations": durations,
+                "moods": moods,
+                "palette": palette,
+            })
+        planner_jobs.append({
+            **common,
+            "user_id": user_id,
+            "categories": parse_distribution(args.categories),
+            "priorities": parse_distribution(args.priorities),
+            "tasks_per_day": args.tasks_per_day,
+            "events_per_week": args.events_per_week,
+            "completion_rate": args.completion_rate,
+            "batch_size": args.batch_size,
+        })
+    return star_jobs, planner_jobs
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Generate synthetic CodeGalaxy users in bulk.")
+    parser.add_argument("--users", type=int, default=1)
+    parser.add_argument("--stars", type=int, default=10000, help="sessions (and stars) per user")
+    parser.add_argument("--days", type=int, default=365, help="history window the sessions are spread over")
+    parser.add_argument("--durations", default=DEFAULT_DURATIONS, help="session minutes as value:weight,...")
+    parser.add_argument("--moods", default=DEFAULT_MOODS, help="moods as key:weight,...")
+    parser.add_argument("--categories", default=DEFAULT_CATEGORIES, help="task/event categories as name:weight,...")
+    parser.add_argument("--priorities", default=DEFAULT_PRIORITIES)
+    parser.add_argument("--tasks-per-day", type=float, default=1.5)
+    parser.add_argument("--completion-rate", type=float, default=0.7, help="share of past tasks marked done")
+    parser.add_argument("--events-per-week", type=float, default=2.0, help="calendar density")
+    parser.add_argument("--prefix", default="synthetic-user")
+    parser.add_argument("--demo", action="store_true", help="generate the first user as the app's demo user")
+    parser.add_argument("--wipe", action="store_true", help="remove these users' generated data first")
+    parser.add_argument("--batch-size", type=int, default=10000, help="documents per insert_many")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="processes (0 = in-process)")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    ids = user_ids(args.users, args.prefix, args.demo)
+    palette = get_mood_palette()
+    try:
+        star_jobs, planner_jobs = build_jobs(args, ids, palette)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.wipe:
+        wipe(ids)
+        print(f"✓ Removed previous synthetic data for {len(ids)} user(s)")
+
+    # After the wipe: generated stars go past whatever stars remain.
+    index_bases = {u: next_spiral_index(u, current_generation(u)) - 1 for u in ids}
+    for job in star_jobs:
+        job["index_base"] = index_bases[job["user_id"]]
+
+    started = time.perf_counter()
+    totals = [0, 0, 0, 0]  # sessions, stars, tasks, events
+    jobs = [(generate_star_batch, j) for j in star_jobs] + [(generate_planner, j) for j in planner_jobs]
+
+    def _account(fn, result: Tuple[int, int]) -> None:
+        offset = 0 if fn is generate_star_batch else 2
+        totals[offset] += result[0]
+        totals[offset + 1] += result[1]
+        elapsed = time.perf_counter() - started
+        print(
+            f"\r  {totals[1]:,}/{args.stars * len(ids):,} stars, {totals[2]:,} tasks, "
+            f"{totals[3]:,} events ({totals[1] / max(elapsed, 1e-9):,.0f} stars/s)",
+            end="",
+            flush=True,
+        )
+
+    if args.workers <= 0:
+        for fn, job in jobs:
+            _account(fn, fn(job))
+    else:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            futures = {pool.submit(fn, job): fn for fn, job in jobs}
+            for future in as_completed(futures):
+                _account(futures[future], future.result())
+
+    # Written behind the routes' backs, so invalidate cached views.
+    for user_id in ids:
+        bump_versions(user_id, *GENERATED_COLLECTIONS)
+
+    elapsed = time.perf_counter() - started
+    print(
+        f"\n✓ Generated {totals[0]:,} sessions, {totals[1]:,} stars, {totals[2]:,} tasks and "
+        f"{totals[3]:,} events for {len(ids)} user(s) in {elapsed:.1f}s"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,8 +2,11 @@ from __future__ import annotations
 
 from datetime import datetime, timezone, timedelta
 
+from backend.repositories import get_repositories
 from backend.utils.db import get_db, get_default_user_id
+from backend.utils.generations import current_generation
 from backend.utils.star_logic import create_celestial_for_session
+from backend.utils.versions import bump_versions
 
 
 SESSIONS = [
@@ -16,14 +19,18 @@ SESSIONS = [
 
 
 def run() -> None:
-    db = get_db()
+    repos = get_repositories()
     user_id = get_default_user_id()
 
-    # Optional: wipe previous seed sessions/objects
-    db.sessions.delete_many({"user_id": user_id, "meta.seed": True})
-    db.celestial_objects.delete_many({"user_id": user_id, "meta.seed": True})
+    # Optional: wipe previous seed sessions/objects (a reset does it for
+    # other storage backends)
+    if repos.engine == "mongo":
+        db = get_db()
+        db.sessions.delete_many({"user_id": user_id, "meta.seed": True})
+        db.celestial_objects.delete_many({"user_id": user_id, "meta.seed": True})
 
     now = datetime.now(timezone.utc)
+    generation = current_generation(user_id)
     for idx, entry in enumerate(SESSIONS):
         started_at = now - timedelta(days=len(SESSIONS) - idx)
         session_doc = {
@@ -35,16 +42,17 @@ def run() -> None:
             "ended_at": started_at + timedelta(minutes=entry["duration_minutes"]),
             "created_at": started_at,
             "meta": {"seed": True},
+            "generation": generation,
         }
-        result = db.sessions.insert_one(session_doc)
+        session_id = repos.sessions.create(session_doc)
         create_celestial_for_session(
-            db=db,
-            session_id=str(result.inserted_id),
+            session_id=session_id,
             duration_minutes=entry["duration_minutes"],
             mood=entry["mood"],
             meta={"seed": True},
         )
 
+    bump_versions(user_id, "sessions", "celestial_objects")
     print(f"Seeded {len(SESSIONS)} demo sessions and celestial objects.")
 
 
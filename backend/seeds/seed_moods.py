@@ -1,8 +1,7 @@
 from __future__ import annotations
 
-from datetime import datetime
-
-from backend.utils.db import get_db
+from backend.repositories import get_repositories
+from backend.utils.reference_cache import bump_reference_version
 
 
 MOODS = [
@@ -15,21 +14,10 @@ MOODS = [
 
 
 def run() -> None:
-    db = get_db()
+    moods = get_repositories().moods
     for mood in MOODS:
-        db.moods.update_one(
-            {"key": mood["key"]},
-            {
-                "$set": {
-                    "label": mood["label"],
-                    "color": mood["color"],
-                    "order": mood["order"],
-                    "updated_at": datetime.utcnow(),
-                },
-                "$setOnInsert": {"created_at": datetime.utcnow()},
-            },
-            upsert=True,
-        )
+        moods.upsert(mood)
+    bump_reference_version()
     print(f"Seeded {len(MOODS)} moods.")
 
 
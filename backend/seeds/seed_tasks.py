@@ -2,7 +2,9 @@ from __future__ import annotations
 
 from datetime import date, timedelta, datetime
 
-from backend.utils.db import get_db, get_default_user_id
+from backend.repositories import get_repositories
+from backend.utils.db import get_default_user_id
+from backend.utils.versions import bump_versions
 
 
 TASKS = [
@@ -31,13 +33,13 @@ TASKS = [
 
 
 def run() -> None:
-    db = get_db()
+    tasks = get_repositories().tasks
     user_id = get_default_user_id()
 
     today = date.today()
     for task in TASKS:
         task_date = today + timedelta(days=task["days_from_today"])
-        db.tasks.insert_one(
+        tasks.create(
             {
                 "user_id": user_id,
                 "title": task["title"],
@@ -50,6 +52,7 @@ def run() -> None:
             }
         )
 
+    bump_versions(user_id, "tasks")
     print(f"Inserted {len(TASKS)} demo tasks.")
 
 
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import asyncio
+import os
+from typing import Any, Callable, Dict, List
+
+from .db import (
+    DatabaseUnavailable,
+    _mongo_uri,
+    db_breaker,
+    get_db,
+    get_db_name,
+    get_pool_options,
+)
+from .metrics import command_metrics
+from .pool_metrics import pool_metrics
+from .slow_queries import slow_query_recorder
+
+try:  # Optional: pip install motor
+    from motor.motor_asyncio import AsyncIOMotorClient
+except ImportError:  # pragma: no cover - depends on environment
+    AsyncIOMotorClient = None
+
+
+def async_driver() -> str:
+    """
+    "motor" when installed, else "threads" (pymongo in the default executor).
+    """
+    if AsyncIOMotorClient is not None and os.getenv("ASYNC_DB_DRIVER", "motor") == "motor":
+        return "motor"
+    return "threads"
+
+
+class _ThreadedCursor:
+    """
+    Records find()/aggregate() options and runs the query in a worker
+    thread on to_list(); the subset of Motor's cursor API we use.
+    """
+
+    def __init__(self, collection: Callable[[], Any], method: str, args: tuple, kwargs: dict) -> None:
+        self._collection = collection
+        self._method = method
+        self._args = args
+        self._kwargs = kwargs
+        self._chain: List[tuple] = []
+
+    def sort(self, *args: Any, **kwargs: Any) -> "_ThreadedCursor":
+        self._chain.append(("sort", args, kwargs))
+        return self
+
+    def limit(self, *args: Any) -> "_ThreadedCursor":
+        self._chain.append(("limit", args, {}))
+        return self
+
+    def skip(self, *args: Any) -> "_ThreadedCursor":
+        self._chain.append(("skip", args, {}))
+        return self
+
+    def _run(self, length: int | None) -> List[Dict[str, Any]]:
+        cursor = getattr(self._collection(), self._method)(*self._args, **self._kwargs)
+        for name, args, kwargs in self._chain:
+            cursor = getattr(cursor, name)(*args, **kwargs)
+        if length is None:
+            return list(cursor)
+        return [doc for _, doc in zip(range(length), cursor)]
+
+    async def to_list(self, length: int | None = None) -> List[Dict[str, Any]]:
+        return await asyncio.to_thread(self._run, length)
+
+
+class _ThreadedCollection:
+    def __init__(self, name: str) -> None:
+        self._name = name
+
+    def _collection(self) -> Any:
+        # Called in the worker thread: the first get_db() blocks on server
+        # selection, which must not stall the event loop.
+        return get_db()[self._name]
+
+    def find(self, *args: Any, **kwargs: Any) -> _ThreadedCursor:
+        return _ThreadedCursor(self._collection, "find", args, kwargs)
+
+    def aggregate(self, *args: Any, **kwargs: Any) -> _ThreadedCursor:
+        return _ThreadedCursor(self._collection, "aggregate", args, kwargs)
+
+    def __getattr__(self, name: str) -> Any:
+        # count_documents, find_one, insert_one, ... become coroutines.
+        async def call(*args: Any, **kwargs: Any) -> Any:
+            return await asyncio.to_thread(lambda: getattr(self._collection(), name)(*args, **kwargs))
+
+        call.__name__ = name
+        return call
+
+
+class _ThreadedDatabase:
+    """
+    Motor-shaped wrapper over the sync get_db(), so async handlers run
+    without motor installed (concurrency then comes from the executor).
+    The client is resolved in the worker thread with each query.
+    """
+
+    def __getattr__(self, name: str) -> _ThreadedCollection:
+        return _ThreadedCollection(name)
+
+    __getitem__ = __getattr__
+
+
+# Motor clients are bound to the event loop that created them.
+_async_clients: Dict[int, Any] = {}
+
+
+def get_async_db():
+    """
+    Async handle on the application database for the running event loop.
+
+    Shares the sync client's breaker: while it is open this raises
+    DatabaseUnavailable without touching the network.
+    """
+    if not db_breaker.allow():
+        raise DatabaseUnavailable("MongoDB circuit is open", retry_after=db_breaker.retry_after())
+    if async_driver() == "threads":
+        return _ThreadedDatabase()
+
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(id(loop))
+    if client is None:
+        client = AsyncIOMotorClient(
+            _mongo_uri(),
+            retryWrites=True,
+            event_listeners=[pool_metrics, command_metrics, slow_query_recorder],
+            **get_pool_options(),
+        )
+        _async_clients[id(loop)] = client
+        print("✓ Async MongoDB client created (motor)")
+    return client[get_db_name()]
+
+
+def close_async_clients() -> None:
+    for client in _async_clients.values():
+        client.close()
+    _async_clients.clear()
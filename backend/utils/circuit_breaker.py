@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Callable, Dict, List
+
+
+class CircuitBreaker:
+    """
+    Caches a dependency failure so callers can fail fast while it is down.
+
+    A failure opens the circuit and starts a background thread that calls
+    probe() with exponential backoff. While open, allow() returns False
+    immediately; a successful probe closes the circuit again. Failures
+    that is_transient() accepts (a blip such as a replica-set election)
+    only open it once failure_threshold of them land within
+    failure_window seconds.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        probe: Callable[[], None],
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+        failure_threshold: int = 1,
+        failure_window: float = 30.0,
+        is_transient: Callable[[BaseException], bool] | None = None,
+    ) -> None:
+        self.name = name
+        self.probe = probe
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.failure_threshold = max(1, failure_threshold)
+        self.failure_window = failure_window
+        self.is_transient = is_transient or (lambda exc: False)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        # Also used after fork: the retry thread does not survive it.
+        self._lock = threading.Lock()
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.total_trips = 0
+        self.last_error: str | None = None
+        self.opened_at: float | None = None
+        self.next_retry_at: float | None = None
+        self.delay = self.base_delay
+        self._thread: threading.Thread | None = None
+        self._transient_failures: List[float] = []
+
+    @property
+    def is_open(self) -> bool:
+        return self.state == "open"
+
+    def allow(self) -> bool:
+        return self.state == "closed"
+
+    def retry_after(self) -> float:
+        if self.next_retry_at is None:
+            return 0.0
+        return max(0.0, self.next_retry_at - time.time())
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state == "open":
+                print(f"✓ {self.name} recovered after {self.consecutive_failures} failed attempt(s)")
+            self.state = "closed"
+            self.consecutive_failures = 0
+            self.opened_at = None
+            self.next_retry_at = None
+            self.delay = self.base_delay
+            self._transient_failures = []
+
+    def record_failure(self, exc: BaseException) -> None:
+        with self._lock:
+            self.last_error = f"{type(exc).__name__}: {exc}"
+            if self.state == "open":
+                self.consecutive_failures += 1
+                return
+            if self.is_transient(exc):
+                now = time.time()
+                recent = [t for t in self._transient_failures if now - t < self.failure_window]
+                recent.append(now)
+                self._transient_failures = recent
+                if len(recent) < self.failure_threshold:
+                    return
+            self.consecutive_failures += 1
+            self._transient_failures = []
+            self.state = "open"
+            self.total_trips += 1
+            self.opened_at = time.time()
+            self.delay = self.base_delay
+            self.next_retry_at = self.opened_at + self.delay
+            print(f"⚠️  {self.name} circuit opened: {self.last_error}")
+            self._thread = threading.Thread(
+                target=self._retry_loop, name=f"{self.name}-breaker", daemon=True
+            )
+            self._thread.start()
+
+    def _retry_loop(self) -> None:
+        while True:
+            time.sleep(self.delay)
+            try:
+                self.probe()
+            except Exception as exc:
+                with self._lock:
+                    self.consecutive_failures += 1
+                    self.last_error = f"{type(exc).__name__}: {exc}"
+                    self.delay = min(self.delay * 2, self.max_delay)
+                    self.next_retry_at = time.time() + self.delay
+                continue
+            self.record_success()
+            return
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "recent_transient_failures": len(self._transient_failures),
+            "total_trips": self.total_trips,
+            "last_error": self.last_error,
+            "opened_at": self.opened_at,
+            "retry_in_seconds": round(self.retry_after(), 3) if self.is_open else None,
+        }
@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, Tuple
+
+from flask import Flask, Response, request
+from werkzeug.http import parse_accept_header
+
+try:  # Optional: pip install brotli
+    import brotli
+except ImportError:  # pragma: no cover - depends on environment
+    brotli = None
+
+
+# Bodies smaller than this aren't worth the CPU or the extra header bytes.
+COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))
+# Levels for per-request (dynamic) compression; static assets use the max.
+GZIP_LEVEL = int(os.getenv("COMPRESS_GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("COMPRESS_BROTLI_QUALITY", "4"))
+
+COMPRESSIBLE_MIMETYPES = {
+    "application/json",
+    "application/javascript",
+    "application/x-ndjson",
+    "text/css",
+    "text/html",
+    "text/javascript",
+    "text/plain",
+    "image/svg+xml",
+}
+
+PRECOMPRESS_EXTENSIONS = (".js", ".css", ".json", ".html", ".svg")
+
+
+def supported_encodings() -> Tuple[str, ...]:
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate_encoding(accept_encoding: str | None = None) -> str | None:
+    """
+    Pick the best encoding the client accepts (q=0 excludes), or None.
+    Reads the current request unless an Accept-Encoding value is given.
+    """
+    if accept_encoding is None:
+        accepted = request.accept_encodings
+    else:
+        accepted = parse_accept_header(accept_encoding)
+    if not accepted:
+        return None
+    return accepted.best_match(supported_encodings())
+
+
+def compress(data: bytes, encoding: str, static: bool = False) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=11 if static else BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=9 if static else GZIP_LEVEL, mtime=0)
+
+
+def _weaken_etag(response: Response) -> None:
+    # The encoded bytes differ from the identity representation, so a strong
+    # validator would be wrong. If-None-Match uses weak comparison, so 304s
+    # keep working.
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+
+
+def _should_compress(response: Response) -> bool:
+    if response.status_code != 200 or response.direct_passthrough or response.is_streamed:
+        return False
+    if "Content-Encoding" in response.headers or "Content-Range" in response.headers:
+        return False
+    if response.mimetype not in COMPRESSIBLE_MIMETYPES:
+        return False
+    length = response.content_length
+    return length is not None and length >= COMPRESS_MIN_SIZE
+
+
+def compress_response(response: Response) -> Response:
+    """
+    after_request hook: encode eligible bodies per Accept-Encoding.
+    """
+    if response.mimetype in COMPRESSIBLE_MIMETYPES:
+        response.vary.add("Accept-Encoding")
+    if request.method == "HEAD" or not _should_compress(response):
+        return response
+    encoding = negotiate_encoding()
+    if encoding is None:
+        return response
+
+    body = compress(response.get_data(), encoding)
+    response.set_data(body)
+    response.headers["Content-Encoding"] = encoding
+    _weaken_etag(response)
+    return response
+
+
+@dataclass
+class PrecompressedAsset:
+    """
+    A body encoded once in every supported encoding.
+    """
+
+    mimetype: str
+    identity: bytes
+    etag: str
+    encoded: Dict[str, bytes] = field(default_factory=dict)
+    mtime: float | None = None
+
+    @classmethod
+    def build(cls, data: bytes, mimetype: str, mtime: float | None = None) -> "PrecompressedAsset":
+        asset = cls(
+            mimetype=mimetype,
+            identity=data,
+            etag=hashlib.sha1(data).hexdigest(),
+            mtime=mtime,
+        )
+        if len(data) >= COMPRESS_MIN_SIZE:
+            for encoding in supported_encodings():
+                encoded = compress(data, encoding, static=True)
+                if len(encoded) < len(data):
+                    asset.encoded[encoding] = encoded
+        return asset
+
+    def to_response(self, cache_control: str = "no-cache") -> Response:
+        encoding = negotiate_encoding()
+        body = self.encoded.get(encoding) if encoding else None
+        resp = Response(body if body is not None else self.identity, mimetype=self.mimetype)
+        resp.headers["Cache-Control"] = cache_control
+        resp.vary.add("Accept-Encoding")
+        if body is not None:
+            resp.headers["Content-Encoding"] = encoding
+            resp.set_etag(self.etag, weak=True)
+        else:
+            resp.set_etag(self.etag)
+        return resp.make_conditional(request)
+
+
+class StaticPrecompressor:
+    """
+    Keeps precompressed copies of text assets under the static folder,
+    rebuilt only if a file's mtime changes.
+    """
+
+    def __init__(self, static_folder: str) -> None:
+        self.static_folder = os.path.abspath(static_folder)
+        self._assets: Dict[str, PrecompressedAsset] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def handles(filename: str) -> bool:
+        return filename.lower().endswith(PRECOMPRESS_EXTENSIONS)
+
+    def _mimetype(self, filename: str) -> str:
+        ext = os.path.splitext(filename)[1].lower()
+        return {
+            ".js": "text/javascript",
+            ".css": "text/css",
+            ".json": "application/json",
+            ".html": "text/html",
+            ".svg": "image/svg+xml",
+        }[ext]
+
+    def get(self, filename: str) -> PrecompressedAsset | None:
+        path = os.path.abspath(os.path.join(self.static_folder, filename))
+        if not path.startswith(self.static_folder + os.sep) or not self.handles(filename):
+            return None
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            return None
+        asset = self._assets.get(filename)
+        if asset is not None and asset.mtime == mtime:
+            return asset
+        with self._lock:
+            asset = self._assets.get(filename)
+            if asset is None or asset.mtime != mtime:
+                with open(path, "rb") as f:
+                    asset = PrecompressedAsset.build(f.read(), self._mimetype(filename), mtime)
+                self._assets[filename] = asset
+            return asset
+
+    def warm(self) -> int:
+        """
+        Precompress every eligible file now (used at eager startup).
+        """
+        count = 0
+        for root, _, files in os.walk(self.static_folder):
+            for name in files:
+                rel = os.path.relpath(os.path.join(root, name), self.static_folder)
+                if self.handles(rel) and self.get(rel) is not None:
+                    count += 1
+        return count
+
+
+def init_compression(app: Flask, warm: bool = False) -> StaticPrecompressor:
+    """
+    Register the response compression hook and the static precompressor.
+    """
+    precompressor = StaticPrecompressor(app.static_folder)
+    if warm:
+        precompressor.warm()
+    app.extensions["static_precompressor"] = precompressor
+    app.after_request(compress_response)
+    return precompressor
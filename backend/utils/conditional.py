@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass
+from datetime import datetime
+from functools import wraps
+from typing import Any, Callable, Mapping, Sequence
+
+from flask import current_app, make_response, request
+
+from .db import get_default_user_id
+from .versions import version_stamp
+
+
+CONDITIONAL_CACHE_CONTROL = "private, no-cache"
+
+
+@dataclass(frozen=True)
+class ConditionalSpec:
+    """
+    What a view's body depends on: the user's write versions for
+    collections, the listed query args and (if daily) the UTC date.
+    """
+
+    name: str
+    collections: Sequence[str]
+    vary: Sequence[str] = ()
+    daily: bool = False
+
+    def key(self, user_id: str, args: Mapping[str, Any]) -> str:
+        parts = [self.name, user_id, version_stamp(user_id, self.collections)]
+        parts.extend(f"{a}={args.get(a, '')}" for a in self.vary)
+        if self.daily:
+            parts.append(datetime.utcnow().date().isoformat())
+        return ":".join(parts)
+
+    def etag(self, user_id: str, args: Mapping[str, Any]) -> str:
+        return self.etag_for_key(self.key(user_id, args))
+
+    @staticmethod
+    def etag_for_key(key: str) -> str:
+        return hashlib.sha1(key.encode("utf-8")).hexdigest()[:24]
+
+
+def conditional_view(
+    name: str, collections: Sequence[str], vary: Sequence[str] = (), daily: bool = False
+) -> Callable:
+    """
+    ETag/If-None-Match for a view of the current user's data.
+
+    The ETag comes from the version stamp, not the body, so a matching
+    If-None-Match is answered with 304 before the view (and its queries)
+    runs. The spec is exposed as view.conditional for the ASGI app.
+    """
+    spec = ConditionalSpec(name, tuple(collections), tuple(vary), daily)
+
+    def decorator(view: Callable) -> Callable:
+        @wraps(view)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            etag = spec.etag(get_default_user_id(), request.args)
+            if request.if_none_match.contains_weak(etag):
+                response = current_app.response_class(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            response.headers["Cache-Control"] = CONDITIONAL_CACHE_CONTROL
+            return response
+
+        wrapper.conditional = spec
+        return wrapper
+
+    return decorator
@@ -0,0 +1,122 @@
+"""
+Which constellation preset a group of stars most resembles.
+
+Both point sets are normalized (centroid to the origin, RMS radius to 1)
+so position and size don't matter, then each preset is rotated to
+minimise the symmetric chamfer distance: the mean distance from each
+preset point to the nearest star plus from each star to the nearest
+preset point, halved. Nearest points come from KD-trees built once per
+set. A coarse sweep over rotations picks a few candidate angles, which
+are refined by halving the step.
+"""
+from __future__ import annotations
+
+import math
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, List, Mapping, Sequence, Tuple
+
+from .spatial import KDTree
+
+# Selections larger than this are refused rather than matched slowly.
+CONSTELLATION_MATCH_MAX_STARS = int(os.getenv("CONSTELLATION_MATCH_MAX_STARS", "200"))
+
+COARSE_STEPS = 36
+REFINE_CANDIDATES = 3
+REFINE_ROUNDS = 4
+
+Position = Tuple[float, float]
+
+
+def normalize(points: Sequence[Position]) -> Tuple[List[Position], Position, float]:
+    """
+    (points centred on their centroid and scaled to RMS radius 1, centroid, scale).
+    """
+    n = len(points)
+    cx = sum(p[0] for p in points) / n
+    cy = sum(p[1] for p in points) / n
+    scale = math.sqrt(sum((p[0] - cx) ** 2 + (p[1] - cy) ** 2 for p in points) / n) or 1.0
+    return [((p[0] - cx) / scale, (p[1] - cy) / scale) for p in points], (cx, cy), scale
+
+
+def _mean_distance(points: Sequence[Position], angle: float, tree: KDTree) -> float:
+    cos, sin = math.cos(angle), math.sin(angle)
+    nearest = tree.nearest
+    return sum(math.sqrt(nearest(x * cos - y * sin, x * sin + y * cos)[0]) for x, y in points) / len(points)
+
+
+@dataclass
+class Template:
+    name: str
+    points: List[Position]
+    center: Position
+    scale: float
+    tree: KDTree
+
+
+@dataclass
+class Match:
+    name: str
+    distance: float
+    rotation: float  # radians, preset -> stars
+
+    @property
+    def similarity(self) -> float:
+        return max(0.0, 1.0 - self.distance)
+
+
+class ConstellationMatcher:
+    def __init__(self, presets: Mapping[str, Sequence[Mapping[str, Any]]]) -> None:
+        self.templates: List[Template] = []
+        for name, stars in presets.items():
+            raw = [(float(s["x"]), float(s["y"])) for s in stars]
+            if len(raw) < 2:
+                continue
+            points, center, scale = normalize(raw)
+            self.templates.append(Template(name, points, center, scale, KDTree(points)))
+
+    def _distance(self, template: Template, stars: List[Position], tree: KDTree, angle: float) -> float:
+        return (_mean_distance(template.points, angle, tree) + _mean_distance(stars, -angle, template.tree)) / 2
+
+    def _best_rotation(self, template: Template, stars: List[Position], tree: KDTree) -> Tuple[float, float]:
+        step = 2 * math.pi / COARSE_STEPS
+        # The one-sided distance (preset points only) is cheap enough to sweep.
+        sweep = sorted(
+            (_mean_distance(template.points, i * step, tree), i * step) for i in range(COARSE_STEPS)
+        )
+        best = (math.inf, 0.0)
+        for _, angle in sweep[:REFINE_CANDIDATES]:
+            distance, delta = self._distance(template, stars, tree, angle), step / 2
+            for _ in range(REFINE_ROUNDS):
+                for candidate in (angle - delta, angle + delta):
+                    d = self._distance(template, stars, tree, candidate)
+                    if d < distance:
+                        distance, angle = d, candidate
+                delta /= 2
+            best = min(best, (distance, angle))
+        return best
+
+    def match(self, stars: Sequence[Position]) -> Tuple[List[Match], Position, float]:
+        """
+        Presets ranked best first, plus the stars' centroid and scale.
+        """
+        points, center, scale = normalize(stars)
+        tree = KDTree(points)
+        matches = []
+        for template in self.templates:
+            distance, angle = self._best_rotation(template, points, tree)
+            matches.append(Match(template.name, distance, angle % (2 * math.pi)))
+        matches.sort(key=lambda m: m.distance)
+        return matches, center, scale
+
+    def placement(self, name: str, center: Position, scale: float, rotation: float) -> Dict[str, float]:
+        """
+        How to stamp preset name over the stars: preset point p lands at
+        center + scale * R(rotation) * (p - origin).
+        """
+        template = next(t for t in self.templates if t.name == name)
+        return {
+            "x": center[0], "y": center[1],
+            "origin_x": template.center[0], "origin_y": template.center[1],
+            "scale": scale / template.scale, "rotation": math.degrees(rotation),
+        }
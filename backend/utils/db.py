@@ -1,69 +1,273 @@
+import hashlib
+import json
 import os
-from typing import Any, Dict
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Tuple
 
 from dotenv import load_dotenv
 from pymongo import MongoClient
 from pymongo.database import Database
 from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError
 
+from .circuit_breaker import CircuitBreaker
+from .metrics import command_metrics
+from .slow_queries import slow_query_recorder
+from .pool_metrics import pool_metrics
+
 
 load_dotenv()
 
+
+# Deployment profiles. "serverless" keeps the old Vercel-friendly settings
+# (one socket per function instance); "server" is for long-running
+# gunicorn workers with several threads sharing one pool.
+DB_PROFILES: Dict[str, Dict[str, int]] = {
+    "serverless": {
+        "maxPoolSize": 1,
+        "minPoolSize": 0,
+        "serverSelectionTimeoutMS": 10000,
+        "connectTimeoutMS": 10000,
+        "maxIdleTimeMS": 45000,
+        "waitQueueTimeoutMS": 10000,
+    },
+    "server": {
+        "maxPoolSize": 50,
+        "minPoolSize": 2,
+        "serverSelectionTimeoutMS": 5000,
+        "connectTimeoutMS": 5000,
+        "maxIdleTimeMS": 300000,
+        "waitQueueTimeoutMS": 2000,
+    },
+}
+
+# Environment overrides applied on top of the selected profile.
+_OVERRIDE_ENV = {
+    "maxPoolSize": "MONGO_MAX_POOL_SIZE",
+    "minPoolSize": "MONGO_MIN_POOL_SIZE",
+    "serverSelectionTimeoutMS": "MONGO_SERVER_SELECTION_TIMEOUT_MS",
+    "connectTimeoutMS": "MONGO_CONNECT_TIMEOUT_MS",
+    "maxIdleTimeMS": "MONGO_MAX_IDLE_TIME_MS",
+    "waitQueueTimeoutMS": "MONGO_WAIT_QUEUE_TIMEOUT_MS",
+}
+
 _client: MongoClient | None = None
+_client_pid: int | None = None
+_client_lock = threading.Lock()
+
+
+def get_db_profile() -> str:
+    """
+    DB_PROFILE wins; otherwise Vercel/Lambda environments are serverless.
+    """
+    profile = (os.getenv("DB_PROFILE") or "").strip().lower()
+    if profile in DB_PROFILES:
+        return profile
+    if os.getenv("VERCEL") or os.getenv("AWS_LAMBDA_FUNCTION_NAME"):
+        return "serverless"
+    return "server"
+
+
+def get_pool_options() -> Dict[str, int]:
+    options = dict(DB_PROFILES[get_db_profile()])
+    for key, env_name in _OVERRIDE_ENV.items():
+        raw = os.getenv(env_name)
+        if raw:
+            try:
+                options[key] = int(raw)
+            except ValueError:
+                print(f"⚠️  Ignoring invalid {env_name}={raw!r}")
+    options["minPoolSize"] = min(options["minPoolSize"], options["maxPoolSize"])
+    return options
+
+
+class DatabaseUnavailable(Exception):
+    """
+    Raised by get_db() while the database circuit breaker is open.
+    The app turns it into a 503 with Retry-After.
+    """
+
+    def __init__(self, message: str, retry_after: float = 0.0) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+# Errors that mean "the database is unreachable", as opposed to a bad query.
+DB_UNAVAILABLE_ERRORS = (DatabaseUnavailable, ConnectionFailure)
+
+
+def _mongo_uri() -> str:
+    mongo_uri = os.getenv("MONGODB_URI")
+    if not mongo_uri:
+        # Fallback to local (development only)
+        mongo_uri = "mongodb://localhost:27017/codegalaxy"
+        print("⚠️  MONGODB_URI not set. Using local fallback (development mode)")
+    return mongo_uri
+
+
+def _connect(mongo_uri: str, ping: bool = True) -> MongoClient:
+    """
+    Build a client and (optionally) ping it. Raises on failure.
+
+    Without the ping no network I/O happens here; the first real command
+    does server selection, and a failure there trips the breaker.
+    """
+    client = MongoClient(
+        mongo_uri,
+        retryWrites=True,
+        event_listeners=[pool_metrics, command_metrics, slow_query_recorder],
+        **get_pool_options(),
+    )
+    if not ping:
+        return client
+    try:
+        # Test the connection with a quick ping
+        client.admin.command('ping')
+    except Exception:
+        client.close()
+        raise
+    return client
+
+
+def _probe_connection() -> None:
+    """
+    Background retry used by the circuit breaker while it is open.
+    """
+    global _client, _client_pid
+    client = _client if _client is not None and _client_pid == os.getpid() else None
+    if client is not None:
+        client.admin.command('ping')
+        return
+    client = _connect(_mongo_uri())
+    with _client_lock:
+        _client = client
+        _client_pid = os.getpid()
+
+
+db_breaker = CircuitBreaker(
+    "MongoDB",
+    probe=_probe_connection,
+    base_delay=float(os.getenv("MONGO_BREAKER_BASE_DELAY", "1")),
+    max_delay=float(os.getenv("MONGO_BREAKER_MAX_DELAY", "60")),
+    failure_threshold=int(os.getenv("MONGO_BREAKER_THRESHOLD", "3")),
+    failure_window=float(os.getenv("MONGO_BREAKER_WINDOW", "30")),
+    # A server selection timeout already waited the full timeout: open at
+    # once. AutoReconnect, NotPrimaryError, NetworkTimeout and the like
+    # are usually an election or one dropped socket, retried by the client.
+    is_transient=lambda exc: isinstance(exc, ConnectionFailure) and not isinstance(exc, ServerSelectionTimeoutError),
+)
+
+
+def get_startup_mode() -> str:
+    """
+    "lazy" skips the connection ping and defers the index check to the
+    first get_db() call; "eager" does both while the app is created.
+    STARTUP_MODE wins, otherwise serverless deployments start lazily.
+    """
+    mode = (os.getenv("STARTUP_MODE") or "").strip().lower()
+    if mode in ("lazy", "eager"):
+        return mode
+    return "lazy" if get_db_profile() == "serverless" else "eager"
 
 
-def get_client() -> MongoClient:
+def _reset_client_after_fork() -> None:
+    # Sockets inherited from the parent must not be shared; the child builds
+    # its own client on first use.
+    global _client, _client_pid, _client_lock
+    _client = None
+    _client_pid = None
+    _client_lock = threading.Lock()
+    pool_metrics.reset()
+    db_breaker.reset()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_client_after_fork)
+
+
+def get_client() -> MongoClient | None:
     """
-    Return a singleton MongoClient instance with production-ready settings.
+    Return this process's MongoClient, creating it lazily on first use.
 
     The URI is loaded from the MONGODB_URI environment variable.
     Falls back to local MongoDB if not set (development only).
+    Pool size and timeouts come from the DB_PROFILE deployment profile.
+
+    Returns None without touching the network while the circuit breaker
+    is open; a background thread keeps retrying with backoff.
     """
-    global _client
-    if _client is None:
-        mongo_uri = os.getenv("MONGODB_URI")
-        if not mongo_uri:
-            # Fallback to local (development only)
-            mongo_uri = "mongodb://localhost:27017/codegalaxy"
-            print("⚠️  MONGODB_URI not set. Using local fallback (development mode)")
-        
+    global _client, _client_pid
+    if _client is not None and _client_pid == os.getpid() and db_breaker.allow():
+        return _client
+    if not db_breaker.allow():
+        return None
+
+    with _client_lock:
+        # Another thread may have connected, or tripped the breaker, meanwhile.
+        if not db_breaker.allow():
+            return None
+        if _client is not None and _client_pid == os.getpid():
+            return _client
+        # Created before a fork (e.g. gunicorn --preload): drop the copy.
+        _client = None
+
+        mongo_uri = _mongo_uri()
         try:
-            # Production-ready MongoDB client configuration
-            # For serverless (Vercel), we need simpler settings
-            _client = MongoClient(
-                mongo_uri,
-                serverSelectionTimeoutMS=10000,  # 10 second timeout for serverless
-                connectTimeoutMS=10000,
-                maxPoolSize=1,  # Serverless should use 1 connection
-                minPoolSize=0,
-                maxIdleTimeMS=45000,  # Close idle connections after 45s
-                retryWrites=True
-            )
-            # Test the connection with a quick ping
-            _client.admin.command('ping')
-            print("✓ MongoDB connection successful")
+            lazy = get_startup_mode() == "lazy"
+            _client = _connect(mongo_uri, ping=not lazy)
+            _client_pid = os.getpid()
+            db_breaker.record_success()
+            if lazy:
+                print(f"✓ MongoDB client created ({get_db_profile()} profile, lazy)")
+            else:
+                print(f"✓ MongoDB connection successful ({get_db_profile()} profile)")
         except (ConnectionFailure, ServerSelectionTimeoutError) as e:
             print(f"❌ MongoDB connection failed: {e}")
             # Don't raise in production - return None and handle gracefully
             print(f"  Connection URI (masked): mongodb+srv://***:***@{mongo_uri.split('@')[1] if '@' in mongo_uri else 'unknown'}")
             _client = None
+            db_breaker.record_failure(e)
         except Exception as e:
             print(f"❌ Unexpected MongoDB error: {e}")
             _client = None
+            db_breaker.record_failure(e)
     return _client
 
 
+def get_pool_stats() -> Dict[str, Any]:
+    """
+    Pool configuration plus checkout wait-time metrics for this process.
+    """
+    return {
+        "profile": get_db_profile(),
+        "pid": os.getpid(),
+        "options": get_pool_options(),
+        **pool_metrics.snapshot(),
+    }
+
+
+def get_db_name() -> str:
+    return os.getenv("MONGODB_DB", "codegalaxy")
+
+
 def get_db() -> Database:
     """
     Return the main application database.
 
     Even if the URI does not contain the database name, MongoDB will
-    lazily create the 'codegalaxy' database on first write.
+    lazily create the 'codegalaxy' database on first write. MONGODB_DB
+    selects a different database (benchmarks use their own).
     """
     client = get_client()
     if client is None:
-        raise Exception("MongoDB client is not available. Check your MONGODB_URI environment variable.")
-    return client["codegalaxy"]
+        raise DatabaseUnavailable(
+            "MongoDB client is not available. Check your MONGODB_URI environment variable.",
+            retry_after=db_breaker.retry_after(),
+        )
+    db = client[get_db_name()]
+    if _indexes_checked_pid != os.getpid() and get_startup_mode() == "lazy":
+        _ensure_indexes_lazily(db)
+    return db
 
 
 def get_default_user_id() -> str:
@@ -74,13 +278,69 @@ def get_default_user_id() -> str:
     return "demo-user"
 
 
-def ensure_indexes() -> None:
+# Index definitions per collection. INDEX_VERSION is derived from this
+# table, so adding or changing an index automatically invalidates the
+# stored marker and the next startup re-runs create_index.
+INDEX_SPECS: Dict[str, List[List[Tuple[str, int]]]] = {
+    "tasks": [[("user_id", 1), ("date", 1)]],
+    "sessions": [
+        [("user_id", 1), ("started_at", 1)],
+        [("user_id", 1), ("generation", 1), ("started_at", 1)],
+    ],
+    "celestial_objects": [
+        [("user_id", 1), ("created_at", 1)],
+        [("user_id", 1), ("generation", 1), ("created_at", 1)],
+        [("user_id", 1), ("generation", 1), ("spiral_index", 1)],
+    ],
+    "galaxy_layout": [[("user_id", 1), ("generation", 1)]],
+    "session_rollups": [[("user_id", 1), ("generation", 1), ("month", 1)]],
+}
+
+INDEX_VERSION = hashlib.sha1(
+    json.dumps(INDEX_SPECS, sort_keys=True).encode("utf-8")
+).hexdigest()[:12]
+
+_indexes_checked_pid: int | None = None
+
+
+def ensure_indexes(db: Database | None = None, force: bool = False) -> bool:
     """
     Create useful indexes. This is idempotent and safe to call at startup.
+
+    Skips the create_index round trips when the schema_meta marker already
+    records the current INDEX_VERSION. Returns True if indexes were built.
     """
-    db = get_db()
-    db.tasks.create_index([("user_id", 1), ("date", 1)])
-    db.sessions.create_index([("user_id", 1), ("started_at", 1)])
-    db.celestial_objects.create_index([("user_id", 1), ("created_at", 1)])
+    global _indexes_checked_pid
+    if db is None:
+        db = get_db()
+
+    marker = db.schema_meta.find_one({"_id": "indexes"})
+    if not force and marker and marker.get("version") == INDEX_VERSION:
+        _indexes_checked_pid = os.getpid()
+        return False
+
+    for collection, specs in INDEX_SPECS.items():
+        for keys in specs:
+            db[collection].create_index(keys)
+    db.schema_meta.update_one(
+        {"_id": "indexes"},
+        {"$set": {"version": INDEX_VERSION, "updated_at": datetime.now(timezone.utc)}},
+        upsert=True,
+    )
+    _indexes_checked_pid = os.getpid()
+    print(f"✓ MongoDB indexes ensured (version {INDEX_VERSION})")
+    return True
 
 
+def _ensure_indexes_lazily(db: Database) -> None:
+    # In lazy startup mode the first get_db() in each process does the check.
+    # Connectivity errors propagate (and are retried next time); anything
+    # else is logged once so a permissions problem can't fail every request.
+    global _indexes_checked_pid
+    try:
+        ensure_indexes(db)
+    except DB_UNAVAILABLE_ERRORS:
+        raise
+    except Exception as e:
+        _indexes_checked_pid = os.getpid()
+        print(f"⚠️  Warning: Could not initialize MongoDB indexes: {e}")
@@ -0,0 +1,261 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, Iterator, List, Set, Tuple
+
+from flask import Flask, Response, g, has_request_context
+
+from .json_provider import bson_default
+from .metrics import Counter
+
+
+# Push channel behind GET /api/events. The hub is per process: a write
+# reaches the subscribers connected to the same worker, so run the SSE
+# route on one worker (or sticky sessions) if that matters. Clients treat
+# "resync" as "refetch everything". Off unless EVENTS_ENABLED is set: each
+# stream pins a worker, which sync workers and serverless can't afford.
+EVENTS_ENABLED = (os.getenv("EVENTS_ENABLED") or "").strip().lower() in ("1", "true", "yes")
+EVENTS_HEARTBEAT = float(os.getenv("EVENTS_HEARTBEAT", "15"))
+EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", "256"))
+EVENTS_MAX_SUBSCRIBERS = int(os.getenv("EVENTS_MAX_SUBSCRIBERS", "100"))
+EVENTS_MAX_AGE = float(os.getenv("EVENTS_MAX_AGE", "300"))
+EVENTS_REPLAY = int(os.getenv("EVENTS_REPLAY", "100"))
+EVENTS_RETRY_MS = 3000
+
+events_published = Counter("events_published_total", "Server-sent events published, by event.")
+events_dropped = Counter("events_dropped_total", "Subscribers reset to a resync because they fell behind.")
+
+Event = Tuple[str, str, bytes]  # (id, name, json data)
+
+
+def _number(event_id: str) -> int:
+    return int(event_id.rsplit("-", 1)[1])
+
+
+def _frame(event: Event) -> bytes:
+    event_id, name, data = event
+    return f"id: {event_id}\nevent: {name}\ndata: ".encode("utf-8") + data + b"\n\n"
+
+
+class _WakingQueue(queue.Queue):
+    """
+    queue.Queue that also sets an asyncio.Event on its loop when an item
+    is put, so an ASGI stream can await events published from threads.
+    """
+
+    def __init__(self, maxsize: int, loop: asyncio.AbstractEventLoop) -> None:
+        super().__init__(maxsize)
+        self.loop = loop
+        self.ready = asyncio.Event()
+
+    def _put(self, item: Event) -> None:
+        super()._put(item)
+        self.loop.call_soon_threadsafe(self.ready.set)
+
+
+class Subscription:
+    def __init__(self, user_id: str, loop: asyncio.AbstractEventLoop | None = None) -> None:
+        self.user_id = user_id
+        self.queue: "queue.Queue[Event]" = (
+            queue.Queue(maxsize=EVENTS_QUEUE_SIZE) if loop is None else _WakingQueue(EVENTS_QUEUE_SIZE, loop)
+        )
+
+
+class EventHub:
+    """
+    In-process fan-out of per-user events to SSE subscribers.
+
+    Each subscriber has a bounded queue. When a slow client lets it fill
+    up, its backlog is discarded and replaced by a single "resync" event,
+    so one stalled connection can't grow memory or block publishers.
+    Recent events are kept per user so a reconnecting EventSource
+    (Last-Event-ID) gets what it missed.
+    """
+
+    def __init__(self) -> None:
+        # Event ids are "<boot>-<n>", so ids from before a restart are
+        # recognised as unknown and answered with a resync.
+        self.boot = uuid.uuid4().hex[:8]
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self._history: Dict[str, Deque[Event]] = {}
+        self._trimmed: Dict[str, int] = {}  # newest event number dropped from history
+
+    def _event(self, name: str, data: Dict[str, Any]) -> Event:
+        body = json.dumps(data, default=bson_default, separators=(",", ":")).encode("utf-8")
+        return f"{self.boot}-{next(self._ids)}", name, body
+
+    def subscribe(
+        self, user_id: str, last_event_id: str | None = None, loop: asyncio.AbstractEventLoop | None = None,
+    ) -> Subscription | None:
+        """
+        Register a subscriber, or return None when the process is at
+        EVENTS_MAX_SUBSCRIBERS (each WSGI stream holds a worker thread).
+        Pass the running loop for a subscriber read with astream().
+        """
+        sub = Subscription(user_id, loop)
+        with self._lock:
+            if self.subscriber_count() >= EVENTS_MAX_SUBSCRIBERS:
+                return None
+            self._subscribers.setdefault(user_id, set()).add(sub)
+            if last_event_id:
+                for event in self._missed(user_id, last_event_id):
+                    sub.queue.put_nowait(event)
+        return sub
+
+    def _missed(self, user_id: str, last_event_id: str) -> List[Event]:
+        boot, _, n = last_event_id.partition("-")
+        if boot == self.boot and n.isdigit() and self._trimmed.get(user_id, 0) <= int(n):
+            missed = [e for e in self._history.get(user_id, ()) if _number(e[0]) > int(n)]
+            if len(missed) < EVENTS_QUEUE_SIZE:
+                return missed
+        return [self._event("resync", {})]
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            subs = self._subscribers.get(sub.user_id)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._subscribers[sub.user_id]
+
+    def publish(self, user_id: str, name: str, data: Dict[str, Any] | None = None) -> None:
+        event = self._event(name, data or {})
+        events_published.inc(event=name)
+        with self._lock:
+            history = self._history.setdefault(user_id, deque(maxlen=EVENTS_REPLAY))
+            if len(history) == history.maxlen:
+                self._trimmed[user_id] = _number(history[0][0])
+            history.append(event)
+            subs = list(self._subscribers.get(user_id, ()))
+        for sub in subs:
+            try:
+                sub.queue.put_nowait(event)
+            except queue.Full:
+                self._reset(sub)
+
+    def _reset(self, sub: Subscription) -> None:
+        events_dropped.inc()
+        while True:
+            try:
+                sub.queue.get_nowait()
+            except queue.Empty:
+                break
+        try:
+            sub.queue.put_nowait(self._event("resync", {}))
+        except queue.Full:  # pragma: no cover - another publisher refilled it
+            pass
+
+    def subscriber_count(self) -> int:
+        return sum(len(s) for s in self._subscribers.values())
+
+    def stream(self, sub: Subscription) -> Iterator[bytes]:
+        """
+        SSE wire format for sub: queued events, a comment line as a
+        heartbeat when idle, and a clean end after EVENTS_MAX_AGE so
+        long-lived connections get recycled (EventSource reconnects).
+        """
+        deadline = time.monotonic() + EVENTS_MAX_AGE
+        try:
+            yield f"retry: {EVENTS_RETRY_MS}\n\n".encode("utf-8")
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                try:
+                    event = sub.queue.get(timeout=min(EVENTS_HEARTBEAT, remaining))
+                except queue.Empty:
+                    yield b": keepalive\n\n"
+                    continue
+                yield _frame(event)
+        finally:
+            self.unsubscribe(sub)
+
+    async def astream(self, sub: Subscription) -> AsyncIterator[bytes]:
+        """
+        stream() for ASGI: waits on the subscription's loop instead of
+        blocking a thread, so open streams cost no executor threads.
+        """
+        ready = sub.queue.ready
+        deadline = time.monotonic() + EVENTS_MAX_AGE
+        try:
+            yield f"retry: {EVENTS_RETRY_MS}\n\n".encode("utf-8")
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                try:
+                    yield _frame(sub.queue.get_nowait())
+                    continue
+                except queue.Empty:
+                    pass
+                ready.clear()
+                if not sub.queue.empty():  # put between get_nowait() and clear()
+                    continue
+                try:
+                    await asyncio.wait_for(ready.wait(), min(EVENTS_HEARTBEAT, remaining))
+                except asyncio.TimeoutError:
+                    yield b": keepalive\n\n"
+        finally:
+            self.unsubscribe(sub)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": events_enabled(),
+                "subscribers": self.subscriber_count(),
+                "users": len(self._subscribers),
+                "max_subscribers": EVENTS_MAX_SUBSCRIBERS,
+                "heartbeat_seconds": EVENTS_HEARTBEAT,
+            }
+
+
+hub = EventHub()
+
+
+def events_enabled() -> bool:
+    """
+    EVENTS_ENABLED, except on Vercel/Lambda where a function can't hold
+    a stream open.
+    """
+    if os.getenv("VERCEL") or os.getenv("AWS_LAMBDA_FUNCTION_NAME"):
+        return False
+    return EVENTS_ENABLED
+
+
+def publish(user_id: str, name: str, data: Dict[str, Any] | None = None) -> None:
+    """
+    Publish an event for user_id. Inside a request it is held until the
+    response is ready, i.e. after bumps_versions has run, so a client
+    that refetches on the event never gets the pre-write cache entry.
+    """
+    if not events_enabled():
+        return
+    if has_request_context() and not g.get("_events_sent"):
+        g.setdefault("_pending_events", []).append((user_id, name, data))
+        return
+    # Never let a push failure turn a committed write into an error.
+    try:
+        hub.publish(user_id, name, data)
+    except Exception as e:  # pragma: no cover - defensive
+        print(f"⚠️  Could not publish {name} event: {e}")
+
+
+def _send_pending_events(response: Response) -> Response:
+    g._events_sent = True
+    for user_id, name, data in g.pop("_pending_events", ()):
+        publish(user_id, name, data)
+    return response
+
+
+def init_events(app: Flask) -> None:
+    app.after_request(_send_pending_events)
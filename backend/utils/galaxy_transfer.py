@@ -0,0 +1,301 @@
+"""
+Galaxy export/import as NDJSON.
+
+One JSON document per line, in MongoDB relaxed Extended JSON so ObjectIds
+and dates survive the round trip:
+
+    {"kind": "header", "format": "codegalaxy-galaxy", "version": 1, ...}
+    {"kind": "session", "doc": {...}}
+    {"kind": "star", "doc": {...}}
+    {"kind": "layout", "doc": {...}}
+    {"kind": "rollup", "doc": {...}}
+    {"kind": "footer", "counts": {"session": 12, "star": 12, "layout": 0, "rollup": 3}}
+
+Both directions stream: export reads straight from cursors and import
+writes fixed-size batches, so memory use doesn't grow with the galaxy.
+user_id and generation are not exported; import assigns the caller's.
+Rollups carry the months archived out of sessions (see
+utils.session_archive), so a backup keeps the full history.
+"""
+from __future__ import annotations
+
+import gzip
+import os
+import time
+import zlib
+from datetime import datetime, timezone
+from typing import Any, Dict, IO, Iterable, Iterator, List
+
+from bson import json_util
+from pymongo import ReplaceOne, UpdateOne
+from pymongo.errors import BulkWriteError
+
+from .generations import galaxy_scope, generation_clause
+from .spiral import place_stars
+
+
+EXPORT_FORMAT = "codegalaxy-galaxy"
+EXPORT_VERSION = 1
+
+# kind -> (collection, sort key)
+EXPORT_KINDS = {
+    "session": ("sessions", "started_at"),
+    "star": ("celestial_objects", "created_at"),
+    "layout": ("galaxy_layout", "_id"),
+    "rollup": ("session_rollups", "start"),
+}
+
+EXPORT_CHUNK_BYTES = 64 * 1024
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "1000"))
+IMPORT_PROGRESS_EVERY = int(os.getenv("IMPORT_PROGRESS_EVERY", "50000"))
+
+# Fields that belong to the owning account, not to the galaxy itself.
+_OWNER_FIELDS = ("user_id", "generation")
+_DUPLICATE_KEY = 11000
+
+
+class ImportFormatError(ValueError):
+    pass
+
+
+def _line(record: Dict[str, Any]) -> bytes:
+    return json_util.dumps(
+        record, json_options=json_util.RELAXED_JSON_OPTIONS, separators=(",", ":")
+    ).encode("utf-8") + b"\n"
+
+
+def export_lines(db, user_id: str, generation: int) -> Iterator[bytes]:
+    """
+    NDJSON lines for the user's galaxy in the given generation.
+    """
+    yield _line({
+        "kind": "header",
+        "format": EXPORT_FORMAT,
+        "version": EXPORT_VERSION,
+        "exported_at": datetime.now(timezone.utc),
+    })
+    scope = galaxy_scope(user_id, generation)
+    exclude = {f: 0 for f in _OWNER_FIELDS}
+    counts = {}
+    for kind, (collection, sort_key) in EXPORT_KINDS.items():
+        counts[kind] = 0
+        cursor = db[collection].find(scope, exclude).sort(sort_key, 1).batch_size(IMPORT_BATCH_SIZE)
+        for doc in cursor:
+            counts[kind] += 1
+            if kind == "star" and doc.get("spiral_index") is not None:
+                # Spiral positions depend on the owner's seed: export the
+                # resolved x/y so the galaxy looks the same for whoever
+                # imports it. Dragged positions travel as layout records.
+                place_stars(user_id, [doc])
+                del doc["spiral_index"]
+            yield _line({"kind": kind, "doc": doc})
+    yield _line({"kind": "footer", "counts": counts})
+
+
+def chunked(lines: Iterable[bytes], size: int = EXPORT_CHUNK_BYTES) -> Iterator[bytes]:
+    # One write per line is a lot of tiny socket sends; group them.
+    buf: List[bytes] = []
+    pending = 0
+    for line in lines:
+        buf.append(line)
+        pending += len(line)
+        if pending >= size:
+            yield b"".join(buf)
+            buf, pending = [], 0
+    if buf:
+        yield b"".join(buf)
+
+
+def gzipped(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """
+    Incremental gzip (with header and trailer) over a chunk stream.
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        out = compressor.compress(chunk)
+        if out:
+            yield out
+    yield compressor.flush()
+
+
+def open_upload(stream: IO[bytes]) -> IO[bytes]:
+    """
+    Wrap a request body for line iteration, un-gzipping if needed.
+    Sniffs the gzip magic so clients don't have to set a header.
+    """
+    if not hasattr(stream, "peek"):
+        stream = _PeekableStream(stream)
+    if stream.peek(2)[:2] == b"\x1f\x8b":
+        return gzip.GzipFile(fileobj=stream, mode="rb")
+    return stream
+
+
+class _PeekableStream:
+    """
+    Minimal buffered reader over a raw request stream (werkzeug's
+    LimitedStream has no peek()).
+    """
+
+    def __init__(self, raw: IO[bytes]) -> None:
+        self.raw = raw
+        self._head = b""
+
+    def peek(self, n: int) -> bytes:
+        if len(self._head) < n:
+            self._head += self.raw.read(n - len(self._head))
+        return self._head
+
+    def read(self, n: int = -1) -> bytes:
+        head, self._head = self._head, b""
+        if n is None or n < 0:
+            return head + self.raw.read()
+        if len(head) >= n:
+            self._head = head[n:]
+            return head[:n]
+        return head + self.raw.read(n - len(head))
+
+    def readline(self, limit: int = -1) -> bytes:
+        head, self._head = self._head, b""
+        if b"\n" in head:
+            line, _, rest = head.partition(b"\n")
+            self._head = rest
+            return line + b"\n"
+        return head + self.raw.readline()
+
+    def __iter__(self) -> Iterator[bytes]:
+        while True:
+            line = self.readline()
+            if not line:
+                return
+            yield line
+
+
+class GalaxyImporter:
+    """
+    Writes parsed export records for one user in unordered batches.
+
+    Documents keep their _id, so re-running an import skips what is
+    already there (reported as duplicates). Ids still held by the same
+    user's older generations, as after a reset, are moved into the
+    current generation instead.
+    """
+
+    def __init__(self, db, user_id: str, generation: int, batch_size: int = IMPORT_BATCH_SIZE) -> None:
+        self.db = db
+        self.user_id = user_id
+        self.generation = generation
+        self.batch_size = batch_size
+        self.batches: Dict[str, List[Dict[str, Any]]] = {kind: [] for kind in EXPORT_KINDS}
+        self.counts = {kind: {"inserted": 0, "restored": 0, "duplicates": 0, "errors": 0} for kind in EXPORT_KINDS}
+        self.lines = 0
+        self.skipped = 0
+        self.complete = False
+        self.started = time.perf_counter()
+
+    def add(self, kind: str, doc: Dict[str, Any]) -> None:
+        batch = self.batches[kind]
+        doc.update(user_id=self.user_id, generation=self.generation)
+        batch.append(doc)
+        if len(batch) >= self.batch_size:
+            self.flush(kind)
+
+    def flush(self, kind: str) -> None:
+        batch = self.batches[kind]
+        if not batch:
+            return
+        self.batches[kind] = []
+        counts = self.counts[kind]
+        collection = self.db[EXPORT_KINDS[kind][0]]
+        if kind == "rollup":
+            self._upsert_rollups(collection, batch, counts)
+            return
+        try:
+            counts["inserted"] += len(collection.insert_many(batch, ordered=False).inserted_ids)
+            return
+        except BulkWriteError as e:
+            details = e.details
+        counts["inserted"] += details.get("nInserted", 0)
+        clashes = []
+        for err in details.get("writeErrors", []):
+            if err.get("code") == _DUPLICATE_KEY:
+                clashes.append(batch[err["index"]])
+            else:
+                counts["errors"] += 1
+        if not clashes:
+            return
+        # Only take over ids this user left behind in an older generation.
+        stale = {"user_id": self.user_id, "$nor": [generation_clause(self.generation)]}
+        restored = collection.bulk_write(
+            [ReplaceOne({**stale, "_id": d["_id"]}, d) for d in clashes if "_id" in d], ordered=False
+        ).modified_count
+        counts["restored"] += restored
+        counts["duplicates"] += len(clashes) - restored
+
+    @staticmethod
+    def _upsert_rollups(collection, batch: List[Dict[str, Any]], counts: Dict[str, int]) -> None:
+        # One rollup per (user, generation, month), like the archiver
+        # writes them: an imported month replaces the galaxy's own.
+        ops = []
+        for doc in batch:
+            doc.pop("_id", None)
+            key = {"user_id": doc["user_id"], "generation": doc["generation"], "month": doc.get("month")}
+            ops.append(UpdateOne(key, {"$set": doc}, upsert=True))
+        result = collection.bulk_write(ops, ordered=False)
+        counts["inserted"] += result.upserted_count
+        counts["restored"] += result.modified_count
+        counts["duplicates"] += result.matched_count - result.modified_count
+
+    def flush_all(self) -> None:
+        for kind in EXPORT_KINDS:
+            self.flush(kind)
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "lines": self.lines,
+            "skipped": self.skipped,
+            "complete": self.complete,
+            "counts": self.counts,
+            "elapsed_ms": round((time.perf_counter() - self.started) * 1000, 1),
+        }
+
+
+def read_header(lines: Iterator[bytes]) -> Dict[str, Any]:
+    for raw in lines:
+        if raw.strip():
+            try:
+                header = json_util.loads(raw)
+            except ValueError as e:
+                raise ImportFormatError(f"header is not JSON: {e}") from e
+            if not isinstance(header, dict) or header.get("format") != EXPORT_FORMAT:
+                raise ImportFormatError("not a CodeGalaxy galaxy export")
+            if header.get("version") != EXPORT_VERSION:
+                raise ImportFormatError(f"unsupported export version {header.get('version')!r}")
+            return header
+    raise ImportFormatError("empty upload")
+
+
+def import_records(importer: GalaxyImporter, lines: Iterator[bytes]) -> Iterator[Dict[str, Any]]:
+    """
+    Feed the lines after the header to importer, yielding a progress
+    report every IMPORT_PROGRESS_EVERY lines and once at the end.
+    """
+    for raw in lines:
+        if not raw.strip():
+            continue
+        importer.lines += 1
+        try:
+            record = json_util.loads(raw)
+        except ValueError:
+            importer.skipped += 1
+            continue
+        kind = record.get("kind") if isinstance(record, dict) else None
+        if kind in EXPORT_KINDS and isinstance(record.get("doc"), dict):
+            importer.add(kind, record["doc"])
+        elif kind == "footer":
+            importer.complete = True
+        else:
+            importer.skipped += 1
+        if importer.lines % IMPORT_PROGRESS_EVERY == 0:
+            yield importer.report()
+    importer.flush_all()
+    yield importer.report()
@@ -0,0 +1,139 @@
+"""
+Galaxy generations: O(1) reset with background cleanup.
+
+Every star, session and layout document carries the user's galaxy
+generation at insert time (documents from before generations existed
+have none, which counts as generation 0). Reads are scoped to the current
+generation, so a reset only has to increment it; a background reaper
+then deletes older generations in small, throttled batches.
+
+Run the reaper by hand (e.g. from a cron job on serverless, where
+background threads don't outlive the request):
+
+    python -m backend.utils.generations
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import Any, Dict
+
+from ..repositories import get_repositories
+from ..repositories.mongo import generation_clause
+from .db import DB_UNAVAILABLE_ERRORS
+from .versions import get_versions
+
+
+# Collections whose documents belong to a generation.
+GENERATION_COLLECTIONS = ("celestial_objects", "sessions", "galaxy_layout")
+
+REAPER_BATCH_SIZE = int(os.getenv("REAPER_BATCH_SIZE", "500"))
+REAPER_PAUSE_MS = float(os.getenv("REAPER_PAUSE_MS", "100"))
+REAPER_INTERVAL = float(os.getenv("REAPER_INTERVAL", "600"))
+
+
+def current_generation(user_id: str) -> int:
+    # Lives in the user_versions document, which requests read anyway.
+    return int(get_versions(user_id).get("generation", 0))
+
+
+def galaxy_scope(user_id: str, generation: int | None = None) -> Dict[str, Any]:
+    """
+    Filter for the user's documents in the current (or given) generation.
+    """
+    if generation is None:
+        generation = current_generation(user_id)
+    return {"user_id": user_id, **generation_clause(generation)}
+
+
+def start_new_generation(user_id: str) -> int:
+    """
+    Reset the user's galaxy with a single write: move to a new generation
+    and bump the versions of everything scoped by it. Returns the new
+    generation and wakes the reaper.
+    """
+    generation = get_repositories().versions.start_generation(user_id, GENERATION_COLLECTIONS)
+    reaper.wake()
+    return generation
+
+
+def reap_user(user_id: str, generation: int, batch_size: int = REAPER_BATCH_SIZE,
+              pause: float = REAPER_PAUSE_MS / 1000.0) -> int:
+    """
+    Delete the user's documents older than generation, batch_size at a
+    time with a pause between batches. Returns the number deleted.
+    """
+    repos = get_repositories()
+    deleted = 0
+    for repo in (repos.celestial, repos.sessions, repos.rollups):
+        while True:
+            n = repo.delete_before_generation(user_id, generation, batch_size)
+            deleted += n
+            if n < batch_size:
+                break
+            time.sleep(pause)
+    repos.versions.mark_reaped(user_id, generation)
+    return deleted
+
+
+def reap_pending() -> int:
+    """
+    Reap every user whose generation moved past the last reaped one.
+    """
+    deleted = 0
+    for user_id, generation in get_repositories().versions.pending_reaps():
+        deleted += reap_user(user_id, generation)
+    return deleted
+
+
+class GenerationReaper:
+    """
+    Daemon thread that runs reap_pending() when woken by a reset and every
+    REAPER_INTERVAL seconds, so work left by a crashed worker still gets done.
+    """
+
+    def __init__(self) -> None:
+        self._event = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._pid: int | None = None
+        self.deleted = 0
+        self.runs = 0
+
+    def wake(self) -> None:
+        if self._thread is None or self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="generation-reaper", daemon=True)
+            self._thread.start()
+        self._event.set()
+
+    def _run(self) -> None:
+        while True:
+            self._event.wait(REAPER_INTERVAL)
+            self._event.clear()
+            try:
+                deleted = reap_pending()
+                self.deleted += deleted
+                self.runs += 1
+                if deleted:
+                    print(f"✓ Reaped {deleted} documents from old galaxy generations")
+            except DB_UNAVAILABLE_ERRORS as e:
+                print(f"⚠️  Generation reaper skipped a run: {e}")
+            except Exception as e:
+                print(f"❌ Generation reaper error: {e}")
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "running": self._thread is not None and self._thread.is_alive(),
+            "runs": self.runs,
+            "deleted": self.deleted,
+            "batch_size": REAPER_BATCH_SIZE,
+            "pause_ms": REAPER_PAUSE_MS,
+        }
+
+
+reaper = GenerationReaper()
+
+
+if __name__ == "__main__":
+    print(f"✓ Reaped {reap_pending()} documents from old galaxy generations")
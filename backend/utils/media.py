@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import hashlib
+import mmap
+import os
+import threading
+from dataclasses import dataclass
+from typing import Dict, Iterator
+
+from flask import Response, abort, request, url_for
+from werkzeug.security import safe_join
+from werkzeug.wsgi import ClosingIterator
+
+
+MEDIA_DIR = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "..", "frontend", "static", "media")
+)
+
+# Chunk size used when streaming a range out of the mapping.
+STREAM_CHUNK = 64 * 1024
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+MIME_TYPES = {
+    ".wav": "audio/wav",
+    ".mp3": "audio/mpeg",
+    ".ogg": "audio/ogg",
+}
+
+
+@dataclass
+class MediaFile:
+    path: str
+    size: int
+    mtime: float
+    digest: str
+    data: mmap.mmap | bytes
+    # Responses still streaming from data; a replaced mapping is closed
+    # once the last of them finishes.
+    readers: int = 0
+    retired: bool = False
+
+    @property
+    def etag(self) -> str:
+        return self.digest[:32]
+
+    @property
+    def short_digest(self) -> str:
+        return self.digest[:12]
+
+    @property
+    def mimetype(self) -> str:
+        ext = os.path.splitext(self.path)[1].lower()
+        return MIME_TYPES.get(ext, "application/octet-stream")
+
+
+_files: Dict[str, MediaFile] = {}
+_lock = threading.Lock()
+
+
+def _open_media(path: str, st: os.stat_result) -> MediaFile:
+    if st.st_size == 0:
+        data: mmap.mmap | bytes = b""
+    else:
+        with open(path, "rb") as f:
+            # The mapping stays valid after the file object is closed and is
+            # backed by the shared page cache, so workers don't each hold a copy.
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    digest = hashlib.sha256(data).hexdigest()
+    return MediaFile(path=path, size=st.st_size, mtime=st.st_mtime, digest=digest, data=data)
+
+
+def _close_media(media: MediaFile) -> None:
+    if isinstance(media.data, mmap.mmap):
+        media.data.close()
+
+
+def get_media_file(filename: str) -> MediaFile | None:
+    """
+    Return the mapped media file, re-mapping it if it changed on disk.
+    """
+    path = safe_join(MEDIA_DIR, filename)
+    if path is None:
+        return None
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    if not os.path.isfile(path):
+        return None
+
+    cached = _files.get(path)
+    if cached is not None and cached.mtime == st.st_mtime and cached.size == st.st_size:
+        return cached
+
+    with _lock:
+        cached = _files.get(path)
+        if cached is None or cached.mtime != st.st_mtime or cached.size != st.st_size:
+            old, cached = cached, _open_media(path, st)
+            _files[path] = cached
+            if old is not None:
+                old.retired = True
+                if old.readers == 0:
+                    _close_media(old)
+        return cached
+
+
+def _acquire_media(filename: str) -> MediaFile | None:
+    """
+    Like get_media_file, but holds the mapping open until _release_media.
+    """
+    while True:
+        media = get_media_file(filename)
+        if media is None:
+            return None
+        with _lock:
+            # Retired between the lookup and here: look up the new mapping.
+            if not media.retired:
+                media.readers += 1
+                return media
+
+
+def _release_media(media: MediaFile) -> None:
+    with _lock:
+        media.readers -= 1
+        if media.retired and media.readers == 0:
+            _close_media(media)
+
+
+def media_url(filename: str) -> str:
+    """
+    Content-hashed URL for a media file; safe to cache forever.
+    Falls back to the plain static URL if the file is missing.
+    """
+    media = get_media_file(filename)
+    if media is None:
+        return url_for("static", filename=f"media/{filename}")
+    return url_for("media.hashed_media", digest=media.short_digest, filename=filename)
+
+
+def _iter_range(data: mmap.mmap | bytes, start: int, stop: int) -> Iterator[bytes]:
+    pos = start
+    while pos < stop:
+        end = min(pos + STREAM_CHUNK, stop)
+        yield data[pos:end]
+        pos = end
+
+
+def send_media(filename: str, cache_control: str = REVALIDATE_CACHE_CONTROL) -> Response:
+    """
+    Serve a media file with strong ETags, If-None-Match and byte ranges.
+    """
+    media = _acquire_media(filename)
+    if media is None:
+        abort(404)
+    resp = _media_response(media, cache_control)
+    release = lambda: _release_media(media)  # noqa: E731
+    if resp.direct_passthrough:
+        # Passthrough bodies go to the server as-is, skipping the response's
+        # own close callbacks; the server closes this iterator instead.
+        resp.response = ClosingIterator(resp.response, release)
+    else:
+        resp.call_on_close(release)
+    return resp
+
+
+def _media_response(media: MediaFile, cache_control: str) -> Response:
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Cache-Control": cache_control,
+    }
+
+    if request.if_none_match.contains(media.etag):
+        resp = Response(status=304, headers=headers)
+        resp.set_etag(media.etag)
+        return resp
+
+    byte_range = request.range
+    if_range = request.if_range
+    if byte_range is not None and (if_range.etag or if_range.date):
+        # If-Range with a stale (or date) validator means "send the whole thing".
+        if if_range.etag != media.etag:
+            byte_range = None
+    if byte_range is not None and (byte_range.units != "bytes" or len(byte_range.ranges) != 1):
+        # Multiple ranges would need multipart/byteranges; RFC 9110 lets a
+        # server ignore Range, so send the whole file instead.
+        byte_range = None
+
+    if byte_range is not None:
+        bounds = byte_range.range_for_length(media.size)
+        if bounds is None:
+            resp = Response(status=416, headers=headers)
+            resp.headers["Content-Range"] = f"bytes */{media.size}"
+            return resp
+        start, stop = bounds
+        resp = Response(
+            _iter_range(media.data, start, stop),
+            status=206,
+            mimetype=media.mimetype,
+            headers=headers,
+            direct_passthrough=True,
+        )
+        resp.headers["Content-Range"] = f"bytes {start}-{stop - 1}/{media.size}"
+        resp.content_length = stop - start
+    else:
+        resp = Response(
+            _iter_range(media.data, 0, media.size),
+            mimetype=media.mimetype,
+            headers=headers,
+            direct_passthrough=True,
+        )
+        resp.content_length = media.size
+
+    resp.set_etag(media.etag)
+    return resp
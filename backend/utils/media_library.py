@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import os
+import struct
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Tuple
+
+from .media import MEDIA_DIR, MIME_TYPES, media_url
+from .reference_cache import compute_etag
+
+
+TRACK_ARTIST = "CodeGalaxy"
+# The original playlist, in its order, so those tracks keep ids 1-3;
+# other files follow sorted by name.
+TRACK_ORDER = ("nebula-drift.wav", "starlight-echoes.wav", "comet-trail.wav")
+
+FileKey = Tuple[str, int, int]  # (name, size, mtime_ns)
+
+
+@dataclass
+class AudioInfo:
+    size_bytes: int
+    duration_seconds: float | None = None
+    sample_rate: int | None = None
+    channels: int | None = None
+    bits_per_sample: int | None = None
+
+
+@dataclass
+class Catalog:
+    files: Tuple[FileKey, ...]
+    tracks: List[Dict[str, Any]]
+    etag: str
+
+
+def parse_wav_header(path: str) -> AudioInfo:
+    """
+    Read the RIFF fmt/data chunks of a WAV file without loading the samples.
+    """
+    size = os.path.getsize(path)
+    info = AudioInfo(size_bytes=size)
+    with open(path, "rb") as f:
+        riff = f.read(12)
+        if len(riff) < 12 or riff[:4] != b"RIFF" or riff[8:12] != b"WAVE":
+            return info
+
+        byte_rate = None
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                break
+            chunk_id, chunk_size = struct.unpack("<4sI", header)
+            if chunk_id == b"fmt ":
+                fmt = f.read(chunk_size)
+                if len(fmt) < 16:
+                    break
+                _, channels, sample_rate, byte_rate, _, bits = struct.unpack("<HHIIHH", fmt[:16])
+                info.channels = channels
+                info.sample_rate = sample_rate
+                info.bits_per_sample = bits
+                if chunk_size % 2:
+                    f.seek(1, os.SEEK_CUR)
+            elif chunk_id == b"data":
+                if byte_rate:
+                    # Some encoders write 0/0xFFFFFFFF when streaming; clamp to the file.
+                    data_size = min(chunk_size, size - f.tell())
+                    info.duration_seconds = data_size / byte_rate
+                break
+            else:
+                # Chunks are word aligned.
+                f.seek(chunk_size + (chunk_size % 2), os.SEEK_CUR)
+    return info
+
+
+def format_duration(seconds: float | None) -> str | None:
+    if seconds is None:
+        return None
+    total = int(round(seconds))
+    return f"{total // 60}:{total % 60:02d}"
+
+
+def _title_from_filename(filename: str) -> str:
+    stem = os.path.splitext(filename)[0]
+    return " ".join(part.capitalize() for part in stem.replace("_", "-").split("-") if part)
+
+
+def _scan_directory() -> Tuple[FileKey, ...]:
+    files = [
+        (entry.name, stat.st_size, stat.st_mtime_ns)
+        for entry in os.scandir(MEDIA_DIR)
+        if entry.is_file() and os.path.splitext(entry.name)[1].lower() in MIME_TYPES
+        for stat in (entry.stat(),)
+    ]
+    rank = {name: i for i, name in enumerate(TRACK_ORDER)}
+    files.sort(key=lambda f: (rank.get(f[0], len(rank)), f[0]))
+    return tuple(files)
+
+
+def _index_directory(files: Tuple[FileKey, ...]) -> List[Dict[str, Any]]:
+    tracks = []
+    for idx, (name, size, _) in enumerate(files, start=1):
+        path = os.path.join(MEDIA_DIR, name)
+        if name.lower().endswith(".wav"):
+            info = parse_wav_header(path)
+        else:
+            info = AudioInfo(size_bytes=size)
+        tracks.append(
+            {
+                "id": idx,
+                "title": _title_from_filename(name),
+                "artist": TRACK_ARTIST,
+                "filename": name,
+                "duration": format_duration(info.duration_seconds),
+                "duration_seconds": info.duration_seconds,
+                "sample_rate": info.sample_rate,
+                "channels": info.channels,
+                "size_bytes": info.size_bytes,
+                "url": media_url(name),
+            }
+        )
+    return tracks
+
+
+_catalog: Catalog | None = None
+_lock = threading.Lock()
+
+
+def get_catalog() -> Catalog:
+    """
+    Return the indexed track list, re-indexing only when a file's name,
+    size or mtime changes. The directory mtime alone misses a file
+    rewritten in place (same name, new audio).
+    Must be called with an app context since track URLs use url_for.
+    """
+    global _catalog
+    try:
+        files = _scan_directory()
+    except OSError:
+        return Catalog(files=(), tracks=[], etag=compute_etag([]))
+
+    catalog = _catalog
+    if catalog is not None and catalog.files == files:
+        return catalog
+
+    with _lock:
+        if _catalog is None or _catalog.files != files:
+            tracks = _index_directory(files)
+            _catalog = Catalog(files=files, tracks=tracks, etag=compute_etag(tracks))
+        return _catalog
@@ -0,0 +1,259 @@
+from __future__ import annotations
+
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Dict, List, Sequence, Tuple
+
+from flask import Flask, Response, request
+from pymongo import monitoring
+
+
+# Latency bucket upper bounds in seconds (Prometheus "le" labels).
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram with one series per label set.
+    """
+
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float] = LATENCY_BUCKETS) -> None:
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self._series: Dict[LabelKey, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # [bucket counts..., +Inf count, sum]
+                series = self._series[key] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            else:
+                series[len(self.buckets)] += 1
+            series[-1] += value
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+    def series(self) -> Dict[LabelKey, List[float]]:
+        with self._lock:
+            return {k: list(v) for k, v in self._series.items()}
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for key, series in sorted(self.series().items()):
+            cumulative = 0.0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_labels(key, le=_fmt(bound))} {_fmt(cumulative)}")
+            cumulative += series[len(self.buckets)]
+            lines.append(f"{self.name}_bucket{_labels(key, le='+Inf')} {_fmt(cumulative)}")
+            lines.append(f"{self.name}_sum{_labels(key)} {series[-1]!r}")
+            lines.append(f"{self.name}_count{_labels(key)} {_fmt(cumulative)}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str) -> None:
+        self.name = name
+        self.help_text = help_text
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        lines.extend(f"{self.name}{_labels(key)} {_fmt(v)}" for key, v in values)
+        return lines
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(key: LabelKey, **extra: str) -> str:
+    items = list(key) + list(extra.items())
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in items) + "}"
+
+
+def _fmt(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+def _gauge(name: str, help_text: str, value: float, **labels: str) -> List[str]:
+    return [
+        f"# HELP {name} {help_text}",
+        f"# TYPE {name} gauge",
+        f"{name}{_labels(tuple(sorted(labels.items())))} {_fmt(value)}",
+    ]
+
+
+http_route_latency = Histogram(
+    "http_request_duration_seconds", "Request latency by route (endpoint, method, status)."
+)
+http_blueprint_latency = Histogram(
+    "http_blueprint_request_duration_seconds", "Request latency aggregated per blueprint."
+)
+mongo_command_latency = Histogram(
+    "mongodb_command_duration_seconds", "MongoDB command latency by command and endpoint."
+)
+mongo_command_failures = Counter(
+    "mongodb_command_failures_total", "Failed MongoDB commands by command and endpoint."
+)
+
+
+@dataclass
+class RequestStats:
+    """
+    Per-request accumulator; Mongo commands add to it from the listener.
+    """
+
+    endpoint: str
+    started: float = field(default_factory=time.perf_counter)
+    db_commands: int = 0
+    db_seconds: float = 0.0
+
+
+_current: ContextVar[RequestStats | None] = ContextVar("codegalaxy_request_stats", default=None)
+
+
+def current_request_stats() -> RequestStats | None:
+    return _current.get()
+
+
+class CommandMetricsListener(monitoring.CommandListener):
+    """
+    Attributes MongoDB commands to the request that issued them.
+
+    pymongo calls listeners synchronously on the thread (and context) that
+    ran the command, so the request's ContextVar is visible here.
+    """
+
+    def started(self, event) -> None:
+        pass
+
+    def _record(self, event, failed: bool) -> None:
+        seconds = event.duration_micros / 1e6
+        stats = _current.get()
+        endpoint = stats.endpoint if stats is not None else "background"
+        mongo_command_latency.observe(seconds, command=event.command_name, endpoint=endpoint)
+        if failed:
+            mongo_command_failures.inc(command=event.command_name, endpoint=endpoint)
+        if stats is not None:
+            stats.db_commands += 1
+            stats.db_seconds += seconds
+
+    def succeeded(self, event) -> None:
+        self._record(event, failed=False)
+
+    def failed(self, event) -> None:
+        self._record(event, failed=True)
+
+
+command_metrics = CommandMetricsListener()
+
+
+def begin_request(endpoint: str) -> RequestStats:
+    stats = RequestStats(endpoint=endpoint)
+    _current.set(stats)
+    return stats
+
+
+def end_request(stats: RequestStats, blueprint: str, method: str, status: int) -> str:
+    """
+    Record the request's latency; returns its Server-Timing header value.
+    """
+    elapsed = time.perf_counter() - stats.started
+    http_route_latency.observe(
+        elapsed,
+        blueprint=blueprint,
+        endpoint=stats.endpoint,
+        method=method,
+        status=str(status),
+    )
+    http_blueprint_latency.observe(elapsed, blueprint=blueprint)
+    _current.set(None)
+    return f'app;dur={elapsed * 1000:.2f}, db;dur={stats.db_seconds * 1000:.2f};desc="{stats.db_commands} cmds"'
+
+
+def _before_request() -> None:
+    begin_request(request.endpoint or "unmatched")
+
+
+def _after_request(response: Response) -> Response:
+    stats = _current.get()
+    if stats is None:
+        return response
+    timing = end_request(stats, request.blueprint or "app", request.method, response.status_code)
+    response.headers.add("Server-Timing", timing)
+    return response
+
+
+def render_prometheus() -> str:
+    """
+    All metrics in Prometheus text exposition format (version 0.0.4).
+    """
+    from .db import db_breaker, get_pool_stats
+    from .events import events_dropped, events_published, hub
+    from .single_flight import flight, single_flight_requests
+    from .user_cache import user_cache_requests
+
+    lines: List[str] = []
+    for metric in (http_route_latency, http_blueprint_latency, mongo_command_latency):
+        lines.extend(metric.render())
+    lines.extend(mongo_command_failures.render())
+    lines.extend(user_cache_requests.render())
+    lines.extend(single_flight_requests.render())
+    lines.extend(_gauge("single_flight_in_flight", "Coalescable view runs currently in progress.", flight.in_flight()))
+    lines.extend(events_published.render())
+    lines.extend(events_dropped.render())
+    lines.extend(_gauge("sse_subscribers", "Open /api/events streams in this process.", hub.subscriber_count()))
+
+    pool = get_pool_stats()
+    lines.append("# HELP mongodb_pool_checkout_wait_seconds Time spent waiting for a pooled connection.")
+    lines.append("# TYPE mongodb_pool_checkout_wait_seconds histogram")
+    for bound, count in pool["wait_seconds_buckets"].items():
+        lines.append(f'mongodb_pool_checkout_wait_seconds_bucket{{le="{bound}"}} {count}')
+    lines.append(f"mongodb_pool_checkout_wait_seconds_sum {pool['wait_seconds_total']!r}")
+    lines.append(f"mongodb_pool_checkout_wait_seconds_count {pool['checkouts']}")
+    lines.extend(_gauge("mongodb_pool_connections_in_use", "Connections currently checked out.", pool["in_use"]))
+    lines.extend(_gauge("mongodb_pool_max_size", "Configured maxPoolSize.", pool["options"]["maxPoolSize"]))
+    lines.extend(_gauge(
+        "mongodb_pool_checkout_failures", "Checkouts that failed (timeouts, errors).", pool["checkout_failures"]
+    ))
+    lines.extend(_gauge(
+        "mongodb_circuit_open", "1 while the MongoDB circuit breaker is open.", 1 if db_breaker.is_open else 0
+    ))
+    return "\n".join(lines) + "\n"
+
+
+def init_metrics(app: Flask) -> None:
+    """
+    Time every request and add a Server-Timing header.
+    """
+    app.before_request(_before_request)
+    app.after_request(_after_request)
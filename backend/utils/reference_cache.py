@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List
+
+from flask import Response, jsonify, request
+
+from ..repositories import get_repositories
+from .db import DB_UNAVAILABLE_ERRORS
+
+
+# Reference data only changes when a seed script runs. Seeds bump a stored
+# version (bump_reference_version), which every process polls at most once
+# per REFERENCE_VERSION_CHECK seconds; the TTL bounds staleness otherwise.
+REFERENCE_CACHE_TTL = float(os.getenv("REFERENCE_CACHE_TTL", "300"))
+REFERENCE_VERSION_CHECK = float(os.getenv("REFERENCE_VERSION_CHECK", "5"))
+# Defaults served because the data was missing or unreachable are retried sooner.
+REFERENCE_FALLBACK_TTL = float(os.getenv("REFERENCE_FALLBACK_TTL", "10"))
+
+# The stored version lives with the per-user write counters, under a
+# name no user can have.
+REFERENCE_VERSION_OWNER = "_reference"
+REFERENCE_VERSION_NAME = "reference"
+
+
+DEFAULT_MOOD_PALETTE: Dict[str, str] = {
+    # Core palette mapping, used when the moods collection is empty
+    "calm": "#5D8BF4",     # Stellar Blue
+    "focus": "#1F4068",    # Steel Nebula
+    "happy": "#F7F7FF",    # Soft White (bright star)
+    "energy": "#182952",   # Navy Cosmo
+    "neutral": "#0F1C3D",  # Deep Space Blue
+}
+
+
+@dataclass
+class Fallback:
+    """Returned by a loader whose value is a stand-in, cached for REFERENCE_FALLBACK_TTL."""
+
+    value: Any
+
+
+@dataclass
+class CacheEntry:
+    value: Any
+    etag: str
+    loaded_at: float
+    fallback: bool = False
+
+    def is_fresh(self) -> bool:
+        ttl = REFERENCE_FALLBACK_TTL if self.fallback else REFERENCE_CACHE_TTL
+        return (time.monotonic() - self.loaded_at) < ttl
+
+
+_loaders: Dict[str, Callable[[], Any]] = {}
+_dependents: Dict[str, List[str]] = {}
+_entries: Dict[str, CacheEntry] = {}
+_lock = threading.RLock()
+_version: int | None = None
+_version_checked_at = 0.0
+
+
+def register(name: str, loader: Callable[[], Any], depends_on: Iterable[str] = ()) -> None:
+    """
+    Register a loader for a named piece of reference data.
+
+    Entries listed in depends_on are derived from; invalidating any of them
+    also drops this entry.
+    """
+    with _lock:
+        _loaders[name] = loader
+        for parent in depends_on:
+            _dependents.setdefault(parent, []).append(name)
+        _entries.pop(name, None)
+
+
+def compute_etag(value: Any) -> str:
+    payload = json.dumps(value, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def _stored_version() -> int:
+    versions = get_repositories().versions.get(REFERENCE_VERSION_OWNER)
+    return int(versions.get(REFERENCE_VERSION_NAME, 0))
+
+
+def bump_reference_version() -> None:
+    """
+    Tell every process to reload reference data (call after seeding it).
+    """
+    get_repositories().versions.bump(REFERENCE_VERSION_OWNER, [REFERENCE_VERSION_NAME])
+    invalidate()
+
+
+def _check_version() -> None:
+    # Drop everything once the stored version has moved on.
+    global _version, _version_checked_at
+    if time.monotonic() - _version_checked_at < REFERENCE_VERSION_CHECK:
+        return
+    with _lock:
+        if time.monotonic() - _version_checked_at < REFERENCE_VERSION_CHECK:
+            return
+        _version_checked_at = time.monotonic()
+        try:
+            version = _stored_version()
+        except DB_UNAVAILABLE_ERRORS:
+            # Keep serving what we have; the loaders report outages.
+            return
+        if _version is not None and version != _version:
+            _entries.clear()
+        _version = version
+
+
+def get_entry(name: str) -> CacheEntry:
+    """
+    Return the cached entry for name, loading it if missing, expired or
+    superseded by a seed.
+    """
+    _check_version()
+    entry = _entries.get(name)
+    if entry is not None and entry.is_fresh():
+        return entry
+
+    with _lock:
+        # Another thread may have refreshed it while we waited.
+        entry = _entries.get(name)
+        if entry is not None and entry.is_fresh():
+            return entry
+        loader = _loaders.get(name)
+        if loader is None:
+            raise KeyError(f"Unknown reference data: {name}")
+        value = loader()
+        fallback = isinstance(value, Fallback)
+        if fallback:
+            value = value.value
+        entry = CacheEntry(value=value, etag=compute_etag(value), loaded_at=time.monotonic(), fallback=fallback)
+        _entries[name] = entry
+        return entry
+
+
+def get(name: str) -> Any:
+    return get_entry(name).value
+
+
+def invalidate(name: str | None = None) -> None:
+    """
+    Drop one entry (and everything derived from it), or the whole cache.
+    """
+    with _lock:
+        if name is None:
+            _entries.clear()
+            return
+        pending = [name]
+        while pending:
+            current = pending.pop()
+            _entries.pop(current, None)
+            pending.extend(_dependents.get(current, []))
+
+
+def reference_json(name: str) -> Response:
+    """
+    JSON response for a cached entry, answering If-None-Match with 304.
+    """
+    entry = get_entry(name)
+    resp = jsonify(entry.value)
+    resp.set_etag(entry.etag)
+    resp.headers["Cache-Control"] = "no-cache"
+    return resp.make_conditional(request)
+
+
+def serialize_mood(doc: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": str(doc["_id"]),
+        "key": doc.get("key"),
+        "label": doc.get("label"),
+        "color": doc.get("color"),
+        "playlist_id": doc.get("playlist_id"),
+    }
+
+
+def _load_moods() -> List[Dict[str, Any]] | Fallback:
+    docs = get_repositories().moods.list()
+    moods = [serialize_mood(d) for d in docs]
+    # Not seeded yet (or mid-seed): look again soon.
+    return moods if moods else Fallback(moods)
+
+
+def _load_palette() -> Dict[str, str] | Fallback:
+    palette = dict(DEFAULT_MOOD_PALETTE)
+    try:
+        entry = get_entry("moods")
+    except Exception as e:
+        print(f"⚠️  Could not load moods for palette, using defaults: {e}")
+        return Fallback(palette)
+    moods = entry.value
+    for mood in moods:
+        if mood.get("key") and mood.get("color"):
+            palette[mood["key"]] = mood["color"]
+    return Fallback(palette) if entry.fallback else palette
+
+
+def get_mood_palette() -> Dict[str, str]:
+    return get("palette")
+
+
+register("moods", _load_moods)
+register("palette", _load_palette, depends_on=("moods",))
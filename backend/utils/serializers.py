@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Sequence, Tuple
+
+
+@dataclass(frozen=True)
+class Field:
+    """
+    One output key of an API row.
+
+    convert is one of None (copy as-is), "str" (required, str()),
+    "optional_str" (str() unless falsy, else None) or "bool".
+    """
+
+    name: str
+    source: str | None = None
+    default: Any = None
+    convert: str | None = None
+
+    @property
+    def key(self) -> str:
+        return self.source or self.name
+
+
+def _optional_str(value: Any) -> str | None:
+    return str(value) if value else None
+
+
+_CONVERTERS: Dict[str | None, Callable[[Any], Any] | None] = {
+    None: None,
+    "str": str,
+    "optional_str": _optional_str,
+    "bool": bool,
+}
+
+
+class Serializer:
+    """
+    Row serializer for fields: serialize(doc) -> API dict.
+
+    The per-field work (key lookup, default, converter) is resolved once
+    here into a tuple of steps, so a call is one loop over plain tuples.
+    projection is the Mongo projection for the fields it reads.
+    """
+
+    def __init__(self, name: str, fields: Sequence[Field]) -> None:
+        self.__name__ = name
+        self.fields = tuple(fields)
+        self.projection = projection_for(self.fields)
+        self._steps: Tuple[Tuple[str, str, Any, bool, Callable[[Any], Any] | None], ...] = tuple(
+            (f.name, f.key, f.default, f.convert == "str", _CONVERTERS[f.convert]) for f in self.fields
+        )
+
+    def __call__(self, doc: Dict[str, Any]) -> Dict[str, Any]:
+        get = doc.get
+        row = {}
+        for name, key, default, required, convert in self._steps:
+            value = doc[key] if required else get(key, default)
+            row[name] = value if convert is None else convert(value)
+        return row
+
+    def __repr__(self) -> str:
+        return f"<Serializer {self.__name__}>"
+
+
+def projection_for(fields: Sequence[Field]) -> Dict[str, int]:
+    """
+    Mongo projection fetching only the keys the serializer reads, so the
+    server ships (and the driver decodes) nothing else.
+    """
+    projection = {f.key: 1 for f in fields}
+    projection.setdefault("_id", 1)
+    return projection
@@ -0,0 +1,244 @@
+"""
+Session archival: old sessions compacted into monthly rollups.
+
+Once a calendar month lies entirely before the horizon
+(SESSION_ARCHIVE_DAYS ago), its sessions are summarised into one rollup
+document per (user, generation, month):
+
+    {"month": "2025-03", "start": ..., "end": ..., "sessions": 41,
+     "minutes": 1230.0, "moods": {"calm": 600.0, ...},
+     "days": {"2025-03-02": {"sessions": 2, "minutes": 50.0, "last": "..."}, ...}}
+
+and the raw sessions are deleted in throttled batches. Writing the
+rollup is what archives the month: stats read rollups plus only the raw
+sessions started from the newest rollup's end on, so raw rows still
+waiting for deletion are never counted twice, and a run that dies
+half-way is finished by the next one. "last" (the day's latest start)
+keeps streaks exact when their window starts mid-day.
+
+Run by hand or from cron (serverless):
+
+    python -m backend.utils.session_archive
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Tuple
+
+from ..repositories import get_repositories
+from .db import DB_UNAVAILABLE_ERRORS
+from .generations import current_generation
+
+# Sessions older than this many days are rolled up by month; 0 disables archival.
+SESSION_ARCHIVE_DAYS = int(os.getenv("SESSION_ARCHIVE_DAYS", "365"))
+SESSION_ARCHIVE_BATCH_SIZE = int(os.getenv("SESSION_ARCHIVE_BATCH_SIZE", "500"))
+SESSION_ARCHIVE_PAUSE_MS = float(os.getenv("SESSION_ARCHIVE_PAUSE_MS", "100"))
+SESSION_ARCHIVE_INTERVAL = float(os.getenv("SESSION_ARCHIVE_INTERVAL", "21600"))
+
+Doc = Dict[str, Any]
+
+
+@dataclass
+class SessionArchive:
+    """
+    A user's rollups, as the stats views combine them with raw sessions.
+    """
+
+    rollups: List[Doc] = field(default_factory=list)
+
+    @property
+    def boundary(self) -> datetime | None:
+        """Sessions started before this are in rollups; None if nothing is archived."""
+        return max((r["end"] for r in self.rollups), default=None)
+
+    @property
+    def sessions(self) -> int:
+        return sum(int(r.get("sessions") or 0) for r in self.rollups)
+
+    @property
+    def minutes(self) -> float:
+        return sum(float(r.get("minutes") or 0) for r in self.rollups)
+
+    def raw_since(self, since: datetime | None) -> datetime | None:
+        """Where raw session reads for a window starting at since should start."""
+        boundary = self.boundary
+        if boundary is None or (since is not None and since >= boundary):
+            return since
+        return boundary
+
+    def days_since(self, since: datetime) -> List[Doc]:
+        """
+        One session-shaped {"started_at", "duration_minutes"} per archived
+        day with a session at or after since, carrying the day's minutes
+        (whole days, so since should be midnight when minutes matter).
+        """
+        out = []
+        for rollup in self.rollups:
+            if rollup["end"] <= since:
+                continue
+            for day in (rollup.get("days") or {}).values():
+                last = datetime.fromisoformat(day["last"])
+                if last >= since:
+                    out.append({"started_at": last, "duration_minutes": float(day.get("minutes") or 0)})
+        return out
+
+
+def session_archive(user_id: str, generation: int) -> SessionArchive:
+    # Read even when archival is off: rollups written earlier still count.
+    return SessionArchive(get_repositories().rollups.list(user_id, generation))
+
+
+def _month_start(value: datetime) -> datetime:
+    return datetime(value.year, value.month, 1)
+
+
+def _next_month(start: datetime) -> datetime:
+    return datetime(start.year + start.month // 12, start.month % 12 + 1, 1)
+
+
+def build_rollup(user_id: str, generation: int, start: datetime, end: datetime, sessions: Iterable[Doc]) -> Doc:
+    """
+    The rollup document for sessions started in [start, end).
+    """
+    total, minutes, moods, days = 0, 0.0, {}, {}
+    for s in sessions:
+        started = s.get("started_at")
+        duration = float(s.get("duration_minutes", 0) or 0)
+        total += 1
+        minutes += duration
+        # Moods are free text from the client; keep them valid as field names.
+        mood = str(s.get("mood") or "neutral").replace(".", "_").replace("$", "_")
+        moods[mood] = moods.get(mood, 0.0) + duration
+        if isinstance(started, datetime):
+            day = days.setdefault(started.date().isoformat(), {"sessions": 0, "minutes": 0.0, "last": ""})
+            day["sessions"] += 1
+            day["minutes"] += duration
+            day["last"] = max(day["last"], started.isoformat())
+    return {
+        "user_id": user_id,
+        "generation": generation,
+        "month": f"{start:%Y-%m}",
+        "start": start,
+        "end": end,
+        "sessions": total,
+        "minutes": minutes,
+        "moods": moods,
+        "days": days,
+        "archived_at": datetime.utcnow(),
+    }
+
+
+def _delete_before(user_id: str, generation: int, before: datetime, batch_size: int, pause: float) -> int:
+    sessions = get_repositories().sessions
+    deleted = 0
+    while True:
+        n = sessions.delete_started_before(user_id, generation, before, batch_size)
+        deleted += n
+        if n < batch_size:
+            return deleted
+        time.sleep(pause)
+
+
+def archive_user(user_id: str, horizon: datetime, batch_size: int = SESSION_ARCHIVE_BATCH_SIZE,
+                 pause: float = SESSION_ARCHIVE_PAUSE_MS / 1000.0) -> Tuple[int, int]:
+    """
+    Roll up each whole month of the user's current galaxy that ended
+    before horizon, oldest first, deleting the archived sessions.
+    Returns (months archived, sessions deleted).
+    """
+    repos = get_repositories()
+    generation = current_generation(user_id)
+    archive = session_archive(user_id, generation)
+    months = 0
+    # Leftovers of a run that stopped before its deletes finished.
+    deleted = _delete_before(user_id, generation, archive.boundary, batch_size, pause) if archive.boundary else 0
+    while True:
+        oldest = repos.sessions.oldest_started(user_id, generation, archive.boundary)
+        if oldest is None:
+            break
+        start = _month_start(oldest)
+        end = _next_month(start)
+        if end > horizon:
+            break
+        projection = {"started_at": 1, "duration_minutes": 1, "mood": 1}
+        sessions = repos.sessions.between(user_id, generation, start, end - timedelta(microseconds=1), projection)
+        rollup = build_rollup(user_id, generation, start, end, sessions)
+        repos.rollups.save(rollup)
+        archive.rollups.append(rollup)
+        months += 1
+        deleted += _delete_before(user_id, generation, end, batch_size, pause)
+    return months, deleted
+
+
+def archive_pending(days: int = SESSION_ARCHIVE_DAYS) -> Tuple[int, int]:
+    """
+    Archive every user with sessions older than days. Returns (months, sessions deleted).
+    """
+    if days <= 0:
+        return 0, 0
+    horizon = datetime.utcnow() - timedelta(days=days)
+    months = deleted = 0
+    for user_id in get_repositories().sessions.users_started_before(_month_start(horizon)):
+        m, d = archive_user(user_id, horizon)
+        months += m
+        deleted += d
+    return months, deleted
+
+
+class SessionArchiver:
+    """
+    Daemon thread that runs archive_pending() every SESSION_ARCHIVE_INTERVAL seconds.
+    """
+
+    def __init__(self) -> None:
+        self._thread: threading.Thread | None = None
+        self._pid: int | None = None
+        self.months = 0
+        self.deleted = 0
+        self.runs = 0
+
+    def start(self) -> None:
+        if SESSION_ARCHIVE_DAYS <= 0 or SESSION_ARCHIVE_INTERVAL <= 0:
+            return
+        if self._thread is None or self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="session-archiver", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(SESSION_ARCHIVE_INTERVAL)
+            try:
+                months, deleted = archive_pending()
+                self.months += months
+                self.deleted += deleted
+                self.runs += 1
+                if months or deleted:
+                    print(f"✓ Archived {months} months of sessions ({deleted} raw sessions removed)")
+            except DB_UNAVAILABLE_ERRORS as e:
+                print(f"⚠️  Session archiver skipped a run: {e}")
+            except Exception as e:
+                print(f"❌ Session archiver error: {e}")
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "running": self._thread is not None and self._thread.is_alive(),
+            "horizon_days": SESSION_ARCHIVE_DAYS,
+            "runs": self.runs,
+            "months": self.months,
+            "deleted": self.deleted,
+            "batch_size": SESSION_ARCHIVE_BATCH_SIZE,
+            "pause_ms": SESSION_ARCHIVE_PAUSE_MS,
+        }
+
+
+archiver = SessionArchiver()
+
+
+if __name__ == "__main__":
+    months, deleted = archive_pending()
+    print(f"✓ Archived {months} months of sessions ({deleted} raw sessions removed)")
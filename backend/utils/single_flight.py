@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+from functools import wraps
+from typing import Any, Awaitable, Callable, Dict, List, Sequence, Tuple
+
+from flask import current_app, make_response, request
+
+from .conditional import ConditionalSpec
+from .db import get_default_user_id
+from .metrics import Counter
+
+
+# How long a follower waits for the leader before giving up and running
+# the view itself (a hung query shouldn't take every duplicate with it).
+SINGLE_FLIGHT_WAIT = float(os.getenv("SINGLE_FLIGHT_WAIT", "10"))
+
+single_flight_requests = Counter(
+    "single_flight_requests_total", "Coalescable GETs by view and role (leader ran it, coalesced shared it)."
+)
+
+
+class _Call:
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self) -> None:
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls with the same key into one: the first
+    caller (leader) runs fn, callers arriving while it runs wait for and
+    share its result or exception. Nothing is kept once it finishes.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Returns (result, shared); shared is True for followers.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            if not call.event.wait(SINGLE_FLIGHT_WAIT):
+                return fn(), False
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+            return call.result, False
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+
+class AsyncSingleFlight:
+    """
+    SingleFlight for coroutines on one event loop (the ASGI views).
+    """
+
+    def __init__(self) -> None:
+        self._calls: Dict[str, asyncio.Future] = {}
+
+    async def do(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        loop = asyncio.get_running_loop()
+        future = self._calls.get(key)
+        if future is not None and future.get_loop() is loop:
+            # shield: a follower that disconnects mustn't cancel the leader.
+            return await asyncio.shield(future), True
+
+        future = self._calls[key] = loop.create_future()
+        try:
+            result = await factory()
+            future.set_result(result)
+            return result, False
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # mark retrieved when nobody was waiting
+            raise
+        finally:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+
+
+flight = SingleFlight()
+async_flight = AsyncSingleFlight()
+
+
+def coalesced_view(name: str, collections: Sequence[str], vary: Sequence[str] = (), daily: bool = False) -> Callable:
+    """
+    Share one run of a read view between concurrent identical requests
+    in this process: same user, same listed query args and the same write
+    versions, so a request that starts after a write never gets a body
+    computed before it.
+    """
+    spec = ConditionalSpec(name, tuple(collections), tuple(vary), daily)
+
+    def decorator(view: Callable) -> Callable:
+        @wraps(view)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            def run() -> Tuple[bytes, int, List[Tuple[str, str]]]:
+                # Followers get their own Response built from these parts.
+                response = make_response(view(*args, **kwargs))
+                return response.get_data(), response.status_code, list(response.headers.items())
+
+            (body, status, headers), shared = flight.do(spec.key(get_default_user_id(), request.args), run)
+            single_flight_requests.inc(view=name, role="coalesced" if shared else "leader")
+            return current_app.response_class(body, status=status, headers=headers)
+
+        return wrapper
+
+    return decorator
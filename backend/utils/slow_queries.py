@@ -0,0 +1,314 @@
+from __future__ import annotations
+
+import os
+import queue
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Tuple
+
+from pymongo import monitoring
+from pymongo.errors import CollectionInvalid
+
+from .metrics import current_request_stats
+
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "100"))
+# Fraction of slow commands that also get an executionStats explain.
+SLOW_QUERY_EXPLAIN_SAMPLE = float(os.getenv("SLOW_QUERY_EXPLAIN_SAMPLE", "0.2"))
+SLOW_QUERY_LOG_SIZE_MB = int(os.getenv("SLOW_QUERY_LOG_SIZE_MB", "16"))
+
+SLOW_QUERY_COLLECTION = "slow_queries"
+
+# Commands whose filter shape we record, and which explain supports.
+EXPLAINABLE_COMMANDS = {"find", "aggregate", "count", "distinct", "update", "delete", "findAndModify"}
+RECORDED_COMMANDS = EXPLAINABLE_COMMANDS | {"insert", "getMore"}
+
+# Envelope keys the driver adds; explain rejects most of them.
+_ENVELOPE_KEYS = {"lsid", "txnNumber", "autocommit", "startTransaction", "readConcern", "writeConcern"}
+
+
+def redact(value: Any) -> Any:
+    """
+    Keep keys and $operators, replace every literal with "?".
+    """
+    if isinstance(value, dict):
+        return {k: redact(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        if value and all(not isinstance(v, (dict, list, tuple)) for v in value):
+            return ["?"]
+        return [redact(v) for v in value]
+    return "?"
+
+
+def filter_shape(command_name: str, command: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    The parts of a command that identify the query, with values redacted.
+    """
+    shape: Dict[str, Any] = {}
+    if command_name == "find":
+        shape["filter"] = redact(command.get("filter", {}))
+        if "sort" in command:
+            shape["sort"] = dict(command["sort"])
+    elif command_name == "aggregate":
+        stages = []
+        for stage in command.get("pipeline", []):
+            name = next(iter(stage), "?")
+            # $match/$sort keep their structure; other stages only their name.
+            if name in ("$match", "$sort", "$group"):
+                stages.append({name: redact(stage[name]) if name != "$sort" else dict(stage[name])})
+            else:
+                stages.append(name)
+        shape["pipeline"] = stages
+    elif command_name in ("count", "distinct"):
+        shape["filter"] = redact(command.get("query", {}))
+        if command_name == "distinct":
+            shape["key"] = command.get("key")
+    elif command_name == "update":
+        shape["filter"] = [redact(u.get("q", {})) for u in command.get("updates", [])[:1]]
+        shape["n"] = len(command.get("updates", []))
+    elif command_name == "delete":
+        shape["filter"] = [redact(d.get("q", {})) for d in command.get("deletes", [])[:1]]
+        shape["n"] = len(command.get("deletes", []))
+    elif command_name == "findAndModify":
+        shape["filter"] = redact(command.get("query", {}))
+    elif command_name == "insert":
+        shape["n"] = len(command.get("documents", []))
+    return shape
+
+
+def _summarize_plan(plan: Dict[str, Any]) -> str:
+    """
+    "FETCH > IXSCAN(user_id_1_created_at_1)" style summary, without bounds.
+    """
+    parts = []
+    node: Dict[str, Any] | None = plan
+    while node:
+        stage = node.get("stage", "?")
+        if node.get("indexName"):
+            stage += f"({node['indexName']})"
+        parts.append(stage)
+        node = node.get("inputStage") or (node.get("inputStages") or [None])[0]
+    return " > ".join(parts)
+
+
+def _explain_summary(explain: Dict[str, Any]) -> Dict[str, Any]:
+    # aggregate explains nest the find-layer plan under stages[0].$cursor.
+    if "stages" in explain and explain["stages"]:
+        explain = explain["stages"][0].get("$cursor", explain)
+    planner = explain.get("queryPlanner", {})
+    stats = explain.get("executionStats", {})
+    winning = planner.get("winningPlan", {})
+    winning = winning.get("queryPlan", winning)  # SBE layout
+    return {
+        "plan": _summarize_plan(winning),
+        "docs_examined": stats.get("totalDocsExamined"),
+        "keys_examined": stats.get("totalKeysExamined"),
+        "n_returned": stats.get("nReturned"),
+        "execution_ms": stats.get("executionTimeMillis"),
+    }
+
+
+def _collection_of(command_name: str, command: Dict[str, Any]) -> Any:
+    # getMore carries the cursor id under its own name.
+    if command_name == "getMore":
+        return command.get("collection")
+    return command.get(command_name)
+
+
+def _docs_returned(command_name: str, reply: Dict[str, Any]) -> int | None:
+    cursor = reply.get("cursor")
+    if isinstance(cursor, dict):
+        batch = cursor.get("firstBatch", cursor.get("nextBatch"))
+        if batch is not None:
+            return len(batch)
+    if command_name in ("count", "insert", "update", "delete") and "n" in reply:
+        return reply["n"]
+    return None
+
+
+class SlowQueryRecorder(monitoring.CommandListener):
+    """
+    Records commands slower than SLOW_QUERY_MS into a capped collection.
+
+    Listener callbacks only copy what they need onto a bounded queue; a
+    background thread runs explain and writes the records, because issuing
+    commands from inside a listener would re-enter it on the same thread.
+    """
+
+    def __init__(self) -> None:
+        self._inflight: Dict[Tuple[int, Any], Tuple[Dict[str, Any], str]] = {}
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=1000)
+        self._worker: threading.Thread | None = None
+        self._worker_pid: int | None = None
+        self._local = threading.local()
+        self._collection_ready = False
+        self.recorded = 0
+        self.dropped = 0
+
+    def _is_internal(self) -> bool:
+        return getattr(self._local, "internal", False)
+
+    def started(self, event) -> None:
+        if event.command_name not in RECORDED_COMMANDS or self._is_internal():
+            return
+        if _collection_of(event.command_name, event.command) == SLOW_QUERY_COLLECTION:
+            return
+        self._inflight[(event.request_id, event.connection_id)] = (event.command, event.database_name)
+
+    def succeeded(self, event) -> None:
+        self._finish(event, event.reply)
+
+    def failed(self, event) -> None:
+        self._finish(event, {})
+
+    def _finish(self, event, reply: Dict[str, Any]) -> None:
+        entry = self._inflight.pop((event.request_id, event.connection_id), None)
+        if entry is None:
+            return
+        duration_ms = event.duration_micros / 1000.0
+        if duration_ms < SLOW_QUERY_MS:
+            return
+        command, database = entry
+        stats = current_request_stats()
+        record = {
+            "ts": datetime.now(timezone.utc),
+            "duration_ms": round(duration_ms, 3),
+            "command": event.command_name,
+            "database": database,
+            "collection": _collection_of(event.command_name, command),
+            "shape": filter_shape(event.command_name, command),
+            "endpoint": stats.endpoint if stats is not None else "background",
+            "docs_returned": _docs_returned(event.command_name, reply),
+            # Command replies don't report documents examined (only explain
+            # and the server profiler do), so this is filled in for the
+            # sampled explains and stays None otherwise.
+            "docs_examined": None,
+            "failed": not reply,
+        }
+        if event.command_name in EXPLAINABLE_COMMANDS and random.random() < SLOW_QUERY_EXPLAIN_SAMPLE:
+            record["_explain_command"] = {
+                k: v for k, v in command.items() if not k.startswith("$") and k not in _ENVELOPE_KEYS
+            }
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            return
+        self._ensure_worker()
+
+    def _ensure_worker(self) -> None:
+        if self._worker is not None and self._worker_pid == os.getpid():
+            return
+        self._worker_pid = os.getpid()
+        self._worker = threading.Thread(target=self._run, name="slow-query-recorder", daemon=True)
+        self._worker.start()
+
+    def _ensure_collection(self, db) -> None:
+        if self._collection_ready:
+            return
+        try:
+            db.create_collection(
+                SLOW_QUERY_COLLECTION, capped=True, size=SLOW_QUERY_LOG_SIZE_MB * 1024 * 1024
+            )
+        except CollectionInvalid:
+            pass  # already exists
+        self._collection_ready = True
+
+    def _run(self) -> None:
+        from .db import get_client
+
+        self._local.internal = True
+        while True:
+            record = self._queue.get()
+            try:
+                client = get_client()
+                if client is None:
+                    continue
+                explain_command = record.pop("_explain_command", None)
+                if explain_command is not None:
+                    started = time.perf_counter()
+                    try:
+                        explain = client[record["database"]].command(
+                            {"explain": explain_command, "verbosity": "executionStats"}
+                        )
+                        record["explain"] = _explain_summary(explain)
+                        record["docs_examined"] = record["explain"]["docs_examined"]
+                    except Exception as e:
+                        record["explain"] = {"error": str(e)}
+                    record["explain_overhead_ms"] = round((time.perf_counter() - started) * 1000, 3)
+                db = client[record["database"]]
+                self._ensure_collection(db)
+                db[SLOW_QUERY_COLLECTION].insert_one(record)
+                self.recorded += 1
+            except Exception as e:
+                print(f"⚠️  Could not record slow query: {e}")
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "threshold_ms": SLOW_QUERY_MS,
+            "explain_sample": SLOW_QUERY_EXPLAIN_SAMPLE,
+            "recorded": self.recorded,
+            "dropped": self.dropped,
+            "queued": self._queue.qsize(),
+        }
+
+
+slow_query_recorder = SlowQueryRecorder()
+
+
+def recent_slow_queries(db, limit: int = 50, min_ms: float = 0.0) -> List[Dict[str, Any]]:
+    """
+    Newest records first; the capped collection keeps insertion order.
+    """
+    query: Dict[str, Any] = {}
+    if min_ms:
+        query["duration_ms"] = {"$gte": min_ms}
+    return list(db[SLOW_QUERY_COLLECTION].find(query, {"_id": 0}).sort("$natural", -1).limit(limit))
+
+
+def group_by_shape(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Aggregate records with the same command/collection/shape.
+    """
+    groups: Dict[str, Dict[str, Any]] = {}
+    for r in records:
+        key = repr((r.get("command"), r.get("collection"), r.get("shape")))
+        g = groups.get(key)
+        if g is None:
+            g = groups[key] = {
+                "command": r.get("command"),
+                "collection": r.get("collection"),
+                "shape": r.get("shape"),
+                "endpoints": set(),
+                "count": 0,
+                "total_ms": 0.0,
+                "max_ms": 0.0,
+                "last_plan": None,
+                "docs_examined_max": None,
+                "docs_examined_samples": 0,
+            }
+        g["count"] += 1
+        g["total_ms"] += r.get("duration_ms", 0.0)
+        g["max_ms"] = max(g["max_ms"], r.get("duration_ms", 0.0))
+        g["endpoints"].add(r.get("endpoint"))
+        if r.get("docs_examined") is not None:
+            g["docs_examined_max"] = max(g["docs_examined_max"] or 0, r["docs_examined"])
+            g["docs_examined_samples"] += 1
+        if g["last_plan"] is None and r.get("explain") and "error" not in r["explain"]:
+            g["last_plan"] = r["explain"]
+    out = []
+    for g in groups.values():
+        g["avg_ms"] = g["total_ms"] / g["count"]
+        g["endpoints"] = sorted(e for e in g["endpoints"] if e)
+        out.append(g)
+    return sorted(out, key=lambda g: g["total_ms"], reverse=True)
+
+
+def rank_by_docs_examined(rows: List[Dict[str, Any]], key: str = "docs_examined") -> List[Dict[str, Any]]:
+    """
+    rows with a known docs-examined count, most first. Rows without one
+    (not sampled for explain) are left out rather than ranked as zero.
+    """
+    return sorted((r for r in rows if r.get(key) is not None), key=lambda r: r[key], reverse=True)
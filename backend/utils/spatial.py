@@ -0,0 +1,297 @@
+"""
+Spatial lookups over star positions.
+
+KDTree answers nearest-neighbour queries over a fixed point set
+(constellation templates, a selection of stars). SpatialGrid is a
+spatial hash that can be changed in place, and galaxy_indexes keeps one
+per user for the current galaxy, patched as stars are created, moved
+and deleted, so region, nearest and hit-test queries don't load every
+star.
+"""
+from __future__ import annotations
+
+import heapq
+import math
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Sequence, Tuple
+
+from ..repositories import get_repositories
+from .generations import current_generation
+from .versions import get_versions
+
+# Side of a grid cell in canvas units; ~25 stars per cell for a 100k-star spiral.
+GALAXY_INDEX_CELL = float(os.getenv("GALAXY_INDEX_CELL", "64"))
+# Users whose galaxy index stays in memory (least recently used are dropped).
+GALAXY_INDEX_USERS = int(os.getenv("GALAXY_INDEX_USERS", "64"))
+
+Position = Tuple[float, float]
+
+
+class KDTree:
+    """
+    Static 2-d tree with small leaf buckets. nearest() returns
+    (squared distance, index into points).
+    """
+
+    LEAF_SIZE = 8
+
+    def __init__(self, points: Sequence[Position]) -> None:
+        self.points = list(points)
+        self._root = self._build(list(range(len(self.points))), 0) if self.points else None
+
+    def _build(self, indexes: List[int], depth: int):
+        if len(indexes) <= self.LEAF_SIZE:
+            return (None, [(self.points[i][0], self.points[i][1], i) for i in indexes])
+        axis = depth & 1
+        indexes.sort(key=lambda i: self.points[i][axis])
+        mid = len(indexes) // 2
+        split = self.points[indexes[mid]][axis]
+        return (axis, split, self._build(indexes[:mid], depth + 1), self._build(indexes[mid:], depth + 1))
+
+    def nearest(self, x: float, y: float) -> Tuple[float, int]:
+        best = [math.inf, -1]
+        if self._root is not None:
+            self._nearest(self._root, x, y, best)
+        return best[0], best[1]
+
+    def _nearest(self, node, x: float, y: float, best: List) -> None:
+        axis = node[0]
+        if axis is None:
+            for px, py, i in node[1]:
+                d = (px - x) * (px - x) + (py - y) * (py - y)
+                if d < best[0]:
+                    best[0], best[1] = d, i
+            return
+        diff = (x if axis == 0 else y) - node[1]
+        near, far = (node[2], node[3]) if diff < 0 else (node[3], node[2])
+        self._nearest(near, x, y, best)
+        if diff * diff < best[0]:
+            self._nearest(far, x, y, best)
+
+
+class SpatialGrid:
+    """
+    Star ids hashed into square cells by position. Insert, move and
+    remove are O(1); rectangle and nearest queries visit only the cells
+    they need. Safe to share between threads.
+    """
+
+    def __init__(self, cell: float = GALAXY_INDEX_CELL) -> None:
+        self.cell = cell
+        self.positions: Dict[str, Position] = {}
+        self.radii: Dict[str, float] = {}
+        # Grow-only: removals never shrink them, which only costs a little scanning.
+        self.max_radius = 0.0
+        self._bounds: Tuple[int, int, int, int] | None = None
+        self._cells: Dict[Tuple[int, int], Dict[str, Position]] = {}
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def _key(self, x: float, y: float) -> Tuple[int, int]:
+        return int(math.floor(x / self.cell)), int(math.floor(y / self.cell))
+
+    def add(self, star_id: str, x: float, y: float, radius: float | None = None) -> None:
+        """Insert star_id, or move it (keeping its radius unless one is given)."""
+        with self._lock:
+            if star_id in self.positions:
+                self._unlink(star_id)
+            key = self._key(x, y)
+            self.positions[star_id] = (x, y)
+            self._cells.setdefault(key, {})[star_id] = (x, y)
+            if radius is not None:
+                self.radii[star_id] = radius
+                self.max_radius = max(self.max_radius, radius)
+            b = self._bounds
+            self._bounds = (key[0], key[1], key[0], key[1]) if b is None else (
+                min(b[0], key[0]), min(b[1], key[1]), max(b[2], key[0]), max(b[3], key[1])
+            )
+
+    def remove(self, star_id: str) -> bool:
+        with self._lock:
+            if not self._unlink(star_id):
+                return False
+            self.radii.pop(star_id, None)
+            return True
+
+    def _unlink(self, star_id: str) -> bool:
+        position = self.positions.pop(star_id, None)
+        if position is None:
+            return False
+        key = self._key(*position)
+        cell = self._cells[key]
+        del cell[star_id]
+        if not cell:
+            del self._cells[key]
+        return True
+
+    def in_rect(self, x0: float, y0: float, x1: float, y1: float) -> List[Tuple[str, float, float]]:
+        """(id, x, y) of stars with x0 <= x <= x1 and y0 <= y <= y1."""
+        (cx0, cy0), (cx1, cy1) = self._key(x0, y0), self._key(x1, y1)
+        found = []
+        with self._lock:
+            if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > len(self._cells):
+                # Huge rectangles: scanning the occupied cells is cheaper.
+                cells = (c for (cx, cy), c in self._cells.items() if cx0 <= cx <= cx1 and cy0 <= cy <= cy1)
+            else:
+                cells = (self._cells.get((cx, cy)) for cx in range(cx0, cx1 + 1) for cy in range(cy0, cy1 + 1))
+            for cell in cells:
+                if cell:
+                    found.extend((i, x, y) for i, (x, y) in cell.items() if x0 <= x <= x1 and y0 <= y <= y1)
+        return found
+
+    def _ring(self, cx: int, cy: int, r: int) -> List[Tuple[int, int]]:
+        # Cells at Chebyshev distance r from (cx, cy), clipped to the occupied bounds.
+        bx0, by0, bx1, by1 = self._bounds
+        x0, x1 = max(cx - r, bx0), min(cx + r, bx1)
+        y0, y1 = max(cy - r + 1, by0), min(cy + r - 1, by1)
+        keys = []
+        for y in (cy - r, cy + r) if r else (cy,):
+            if by0 <= y <= by1:
+                keys.extend((x, y) for x in range(x0, x1 + 1))
+        if r:
+            for x in (cx - r, cx + r):
+                if bx0 <= x <= bx1:
+                    keys.extend((x, y) for y in range(y0, y1 + 1))
+        return keys
+
+    def nearest(self, x: float, y: float, k: int = 1) -> List[Tuple[float, str, float, float]]:
+        """
+        Up to k (distance, id, x, y) closest to (x, y), nearest first.
+        Searches rings of cells outwards from the point's cell and stops
+        once no unvisited cell can hold anything closer.
+        """
+        with self._lock:
+            if not self.positions or k <= 0:
+                return []
+            cx, cy = self._key(x, y)
+            bx0, by0, bx1, by1 = self._bounds
+            # Rings that miss the occupied bounds entirely are skipped.
+            r = max(bx0 - cx, cx - bx1, by0 - cy, cy - by1, 0)
+            last = max(cx - bx0, bx1 - cx, cy - by0, by1 - cy)
+            found: List[Tuple[float, str, float, float]] = []
+            while r <= last:
+                for key in self._ring(cx, cy, r):
+                    cell = self._cells.get(key)
+                    if cell:
+                        found.extend(
+                            ((px - x) * (px - x) + (py - y) * (py - y), i, px, py) for i, (px, py) in cell.items()
+                        )
+                if len(found) >= k:
+                    found = heapq.nsmallest(k, found)
+                    reach = r * self.cell
+                    if found[-1][0] <= reach * reach:
+                        break
+                r += 1
+            return [(math.sqrt(d), i, px, py) for d, i, px, py in sorted(found)[:k]]
+
+    def at(self, x: float, y: float, tolerance: float = 0.0) -> List[Tuple[float, str]]:
+        """
+        (distance, id) of stars whose disc (radius plus tolerance) covers
+        (x, y), nearest centre first.
+        """
+        reach = self.max_radius + tolerance
+        hits = []
+        for star_id, px, py in self.in_rect(x - reach, y - reach, x + reach, y + reach):
+            d = math.hypot(px - x, py - y)
+            if d <= self.radii.get(star_id, 0.0) + tolerance:
+                hits.append((d, star_id))
+        hits.sort()
+        return hits
+
+
+Stamp = Tuple[int, int]
+
+
+class GalaxyIndexes:
+    """
+    A SpatialGrid per user for the current generation.
+
+    Each grid is tagged with the (generation, celestial_objects version)
+    it reflects. Writes in this process patch the grid through added(),
+    moved() and removed() and advance the tag to the version the write's
+    bumps_versions will produce; anything else (another worker's write,
+    a reset, an import) leaves the tag behind, and the next get()
+    rebuilds from the repository.
+    """
+
+    PROJECTION = {"_id": 1, "x": 1, "y": 1, "radius": 1}
+
+    def __init__(self, max_users: int) -> None:
+        self.max_users = max_users
+        self._lock = threading.Lock()
+        self._grids: "OrderedDict[str, Tuple[Stamp, SpatialGrid]]" = OrderedDict()
+
+    @staticmethod
+    def _stamp(user_id: str) -> Stamp:
+        return current_generation(user_id), int(get_versions(user_id).get("celestial_objects", 0))
+
+    def get(self, user_id: str) -> SpatialGrid:
+        stamp = self._stamp(user_id)
+        with self._lock:
+            entry = self._grids.get(user_id)
+            if entry is not None and entry[0] == stamp:
+                self._grids.move_to_end(user_id)
+                return entry[1]
+        grid = SpatialGrid()
+        for batch in get_repositories().celestial.batches(user_id, stamp[0], self.PROJECTION, 5000):
+            for doc in batch:
+                grid.add(str(doc["_id"]), float(doc.get("x") or 0), float(doc.get("y") or 0),
+                         float(doc.get("radius") or 0))
+        with self._lock:
+            self._grids[user_id] = (stamp, grid)
+            self._grids.move_to_end(user_id)
+            while len(self._grids) > self.max_users:
+                self._grids.popitem(last=False)
+        return grid
+
+    def _patch(self, user_id: str, change: Callable[[SpatialGrid], None]) -> None:
+        # Called from a write view, before its version bump: the stamp
+        # read here is the pre-write one (memoized for the request).
+        generation, version = self._stamp(user_id)
+        with self._lock:
+            entry = self._grids.get(user_id)
+            if entry is None:
+                return
+            if entry[0] not in ((generation, version), (generation, version + 1)):
+                del self._grids[user_id]
+                return
+            change(entry[1])
+            self._grids[user_id] = ((generation, version + 1), entry[1])
+
+    def added(self, user_id: str, docs: Iterable[Mapping[str, Any]]) -> None:
+        """New stars (with _id, x, y, radius)."""
+        docs = list(docs)
+
+        def change(grid: SpatialGrid) -> None:
+            for d in docs:
+                grid.add(str(d["_id"]), float(d.get("x") or 0), float(d.get("y") or 0), float(d.get("radius") or 0))
+
+        self._patch(user_id, change)
+
+    def moved(self, user_id: str, moves: Mapping[str, Position]) -> None:
+        def change(grid: SpatialGrid) -> None:
+            for star_id, (x, y) in moves.items():
+                if star_id in grid.positions:
+                    grid.add(star_id, x, y)
+
+        self._patch(user_id, change)
+
+    def removed(self, user_id: str, ids: Iterable[str]) -> None:
+        ids = list(ids)
+
+        def change(grid: SpatialGrid) -> None:
+            for star_id in ids:
+                grid.remove(star_id)
+
+        self._patch(user_id, change)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._grids.clear()
+
+
+galaxy_indexes = GalaxyIndexes(GALAXY_INDEX_USERS)
@@ -0,0 +1,131 @@
+"""
+Star positions as a pure function of (user seed, spiral index).
+
+Session and task stars store only their spiral index; x/y are computed
+when read: a golden-angle spiral plus a small jitter hashed from the seed
+and index, so the same galaxy lays out identically on every read,
+worker and re-seed. Stars the user dragged are kept in a per-generation
+override map (galaxy_layout) that takes precedence.
+"""
+from __future__ import annotations
+
+import hashlib
+import math
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Mapping, Tuple
+
+GOLDEN_ANGLE = 2.399963229728653
+SPIRAL_SCALE = 7.0
+JITTER = 3.0
+# Cached positions across all users (~100 bytes each).
+SPIRAL_CACHE_POINTS = int(os.getenv("SPIRAL_CACHE_POINTS", "2000000"))
+
+_MASK = (1 << 64) - 1
+_UNIT = JITTER * 2 / 2 ** 32
+
+Position = Tuple[float, float]
+
+
+def spiral_seed(user_id: str) -> int:
+    return int.from_bytes(hashlib.blake2b(str(user_id).encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def _mix(z: int) -> int:
+    # splitmix64 finalizer: well-spread 64 bits from nearby inputs.
+    z = (z + 0x9E3779B97F4A7C15) & _MASK
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & _MASK
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & _MASK
+    return z ^ (z >> 31)
+
+
+def compute_spiral_position(index: int, center_x: float = 0.0, center_y: float = 0.0, c: float = SPIRAL_SCALE,
+                            seed: int = 0) -> Position:
+    """
+    x, y on a golden-angle spiral with jitter in [-3, 3) hashed from (seed, index).
+    """
+    h = _mix(seed ^ index)
+    r = c * math.sqrt(index)
+    theta = index * GOLDEN_ANGLE
+    return (
+        center_x + r * math.cos(theta) + (h >> 32) * _UNIT - JITTER,
+        center_y + r * math.sin(theta) + (h & 0xFFFFFFFF) * _UNIT - JITTER,
+    )
+
+
+def compute_spiral_positions(start_index: int, count: int, center_x: float = 0.0, center_y: float = 0.0,
+                             c: float = SPIRAL_SCALE, seed: int = 0) -> List[Position]:
+    """
+    Positions for indexes start_index .. start_index + count - 1 in one pass.
+    """
+    cos, sin, sqrt, mix, unit = math.cos, math.sin, math.sqrt, _mix, _UNIT
+    positions = []
+    append = positions.append
+    for index in range(start_index, start_index + count):
+        h = mix(seed ^ index)
+        r = c * sqrt(index)
+        theta = index * GOLDEN_ANGLE
+        append((
+            center_x + r * cos(theta) + (h >> 32) * unit - JITTER,
+            center_y + r * sin(theta) + (h & 0xFFFFFFFF) * unit - JITTER,
+        ))
+    return positions
+
+
+class SpiralCache:
+    """
+    Per-seed spiral positions, computed in bulk and extended as galaxies
+    grow, so reads index a list instead of hashing every star. Evicts the
+    least recently used seeds past max_points.
+    """
+
+    def __init__(self, max_points: int) -> None:
+        self.max_points = max_points
+        self._lock = threading.Lock()
+        self._tables: "OrderedDict[int, List[Position]]" = OrderedDict()
+        self._points = 0
+
+    def table(self, seed: int, size: int) -> List[Position]:
+        """
+        Positions for indexes 1..size (or more) under seed.
+        """
+        with self._lock:
+            table = self._tables.get(seed)
+            if table is None:
+                table = self._tables[seed] = []
+            self._tables.move_to_end(seed)
+            if len(table) < size:
+                grow = max(size - len(table), 256)
+                table.extend(compute_spiral_positions(len(table) + 1, grow, seed=seed))
+                self._points += grow
+                while self._points > self.max_points and len(self._tables) > 1:
+                    _, evicted = self._tables.popitem(last=False)
+                    self._points -= len(evicted)
+            return table
+
+
+spiral_cache = SpiralCache(SPIRAL_CACHE_POINTS)
+
+
+def place_stars(user_id: str, docs: Iterable[Dict[str, Any]],
+                overrides: Mapping[str, Position] | None = None) -> List[Dict[str, Any]]:
+    """
+    Fill in x/y on star documents (in place): a dragged position from
+    overrides, else the spiral position of spiral_index, else whatever
+    x/y the document stored (stars from before spiral indexes, or placed
+    explicitly by a constellation stamp).
+    """
+    docs = docs if isinstance(docs, list) else list(docs)
+    top = max((d.get("spiral_index") or 0 for d in docs), default=0)
+    table = spiral_cache.table(spiral_seed(user_id), top) if top else []
+    overrides = overrides or {}
+    for doc in docs:
+        moved = overrides.get(str(doc["_id"])) if overrides else None
+        if moved is not None:
+            doc["x"], doc["y"] = moved
+        else:
+            index = doc.get("spiral_index")
+            if index is not None:
+                doc["x"], doc["y"] = table[index - 1]
+    return docs
@@ -1,15 +1,15 @@
 from __future__ import annotations
 
 import math
-import random
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Dict, Any
+from typing import Any, Dict
 
+from ..repositories import get_repositories
 from .db import get_default_user_id
-
-
-GOLDEN_ANGLE = 2.399963229728653
+from .generations import current_generation
+from .reference_cache import get_mood_palette
+from .spiral import compute_spiral_position, spiral_seed
 
 
 @dataclass
@@ -23,29 +23,33 @@ class CelestialObject:
     y: float
     created_at: datetime
     meta: Dict[str, Any]
+    id: str | None = None
+    generation: int = 0
+    spiral_index: int | None = None
 
     def to_mongo(self) -> Dict[str, Any]:
-        return {
+        doc = {
             "user_id": self.user_id,
             "session_id": self.session_id,
             "type": self.type,
             "radius": self.radius,
             "color": self.color,
-            "x": self.x,
-            "y": self.y,
             "created_at": self.created_at,
             "meta": self.meta,
+            "generation": self.generation,
         }
+        # Spiral stars are placed on read (see utils.spiral); x/y aren't stored.
+        if self.spiral_index is not None:
+            doc["spiral_index"] = self.spiral_index
+        else:
+            doc["x"], doc["y"] = self.x, self.y
+        return doc
 
-
-MOOD_COLOR_MAP: Dict[str, str] = {
-    # Core palette mapping
-    "calm": "#5D8BF4",     # Stellar Blue
-    "focus": "#1F4068",    # Steel Nebula
-    "happy": "#F7F7FF",    # Soft White (bright star)
-    "energy": "#182952",   # Navy Cosmo
-    "neutral": "#0F1C3D",  # Deep Space Blue
-}
+    def as_doc(self) -> Dict[str, Any]:
+        """
+        The stored document with its id and position, as reads return it.
+        """
+        return {**self.to_mongo(), "_id": self.id, "x": self.x, "y": self.y}
 
 
 def duration_to_type(duration_minutes: float) -> str:
@@ -69,24 +73,22 @@ def duration_to_radius(duration_minutes: float) -> float:
     return max(4.0, min(40.0, raw))
 
 
-def compute_spiral_position(index: int, center_x: float, center_y: float, c: float = 7.0) -> tuple[float, float]:
+def next_spiral_index(user_id: str, generation: int) -> int:
     """
-    Compute x, y coordinates using a golden‑angle spiral with small jitter.
+    The spiral index for the galaxy's next star: one past the highest in
+    use, so deleted stars never free an index that a new star would land
+    on. Galaxies with no indexed stars yet (only stars from before
+    spiral indexes) continue after their star count instead.
     """
-    theta = index * GOLDEN_ANGLE
-    r = c * math.sqrt(index)
-
-    jitter_x = random.uniform(-3.0, 3.0)
-    jitter_y = random.uniform(-3.0, 3.0)
-
-    x = center_x + r * math.cos(theta) + jitter_x
-    y = center_y + r * math.sin(theta) + jitter_y
-    return x, y
+    celestial = get_repositories().celestial
+    top = celestial.max_spiral_index(user_id, generation)
+    if top is None:
+        return celestial.count(user_id, generation) + 1
+    return top + 1
 
 
 def create_celestial_for_session(
     *,
-    db,
     session_id: str,
     duration_minutes: float,
     mood: str,
@@ -97,18 +99,18 @@ def create_celestial_for_session(
     """
     user_id = get_default_user_id()
     mood_key = (mood or "neutral").lower()
-    color = MOOD_COLOR_MAP.get(mood_key, MOOD_COLOR_MAP["neutral"])
+    palette = get_mood_palette()
+    color = palette.get(mood_key, palette["neutral"])
 
     obj_type = duration_to_type(duration_minutes)
     radius = duration_to_radius(duration_minutes)
 
-    # Count existing objects for this user to position the new one.
-    star_count = db.celestial_objects.count_documents({"user_id": user_id})
+    generation = current_generation(user_id)
+    celestial = get_repositories().celestial
 
-    # Use a logical center within the canvas; the frontend can treat
-    # (0, 0) as the center, so we keep coordinates around origin.
-    center_x, center_y = 0.0, 0.0
-    x, y = compute_spiral_position(star_count + 1, center_x, center_y)
+    # The frontend treats (0, 0) as the center of the canvas.
+    spiral_index = next_spiral_index(user_id, generation)
+    x, y = compute_spiral_position(spiral_index, seed=spiral_seed(user_id))
 
     obj = CelestialObject(
         user_id=user_id,
@@ -120,9 +122,11 @@ def create_celestial_for_session(
         y=y,
         created_at=datetime.utcnow(),
         meta=meta or {"duration_minutes": duration_minutes, "mood": mood_key},
+        generation=generation,
+        spiral_index=spiral_index,
     )
 
-    db.celestial_objects.insert_one(obj.to_mongo())
+    obj.id = celestial.create(obj.to_mongo())
     return obj
 
 
@@ -0,0 +1,87 @@
+"""
+Galaxy time-lapse: the galaxy's stars replayed as N keyframes.
+
+The user's history from first to last star is cut into N equal time
+slices; each frame carries only the stars born in its slice (the client
+accumulates them), so a years-long history and a week-long one both
+come out as N frames. The body is NDJSON, written while one oldest-first
+pass over the stars is still running:
+
+    {"kind": "timelapse", "frames": 60, "total": 1234, "start": ..., "end": ...}
+    {"frame": 0, "until": ..., "total": 17, "stars": [{...}, ...]}
+    ...
+
+"until" is the end of the frame's slice and "total" the number of stars
+shown once the frame is applied.
+"""
+from __future__ import annotations
+
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple
+
+TIMELAPSE_DEFAULT_FRAMES = int(os.getenv("TIMELAPSE_DEFAULT_FRAMES", "60"))
+TIMELAPSE_MAX_FRAMES = int(os.getenv("TIMELAPSE_MAX_FRAMES", "600"))
+TIMELAPSE_BATCH_SIZE = int(os.getenv("TIMELAPSE_BATCH_SIZE", "2000"))
+
+
+def frame_count(value: Any) -> int:
+    """
+    ?frames= clamped to 1..TIMELAPSE_MAX_FRAMES (default when missing or invalid).
+    """
+    try:
+        frames = int(value)
+    except (TypeError, ValueError):
+        return TIMELAPSE_DEFAULT_FRAMES
+    return max(1, min(frames, TIMELAPSE_MAX_FRAMES))
+
+
+def _naive_utc(value: datetime) -> datetime:
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def timelapse_lines(
+    batches: Iterable[List[Dict[str, Any]]],
+    created_range: Tuple[datetime, datetime] | None,
+    total: int,
+    frames: int,
+    serialize: Callable[[Dict[str, Any]], Dict[str, Any]],
+    dumps: Callable[[Any], bytes],
+) -> Iterator[bytes]:
+    """
+    NDJSON lines for a timelapse over batches (stars oldest first, as
+    CelestialRepository.batches yields them). Frames with no new stars
+    are still emitted so frame numbers map to evenly spaced times.
+    """
+    if created_range is None:
+        yield dumps({"kind": "timelapse", "frames": 0, "total": 0, "start": None, "end": None}) + b"\n"
+        return
+
+    start, end = (_naive_utc(t) for t in created_range)
+    span = (end - start).total_seconds()
+    step = span / frames
+    yield dumps({"kind": "timelapse", "frames": frames, "total": total, "start": start, "end": end}) + b"\n"
+
+    frame, shown, stars = 0, 0, []
+
+    def flush() -> bytes:
+        until = end if frame == frames - 1 else start + timedelta(seconds=step * (frame + 1))
+        return dumps({"frame": frame, "until": until, "total": shown, "stars": stars}) + b"\n"
+
+    for batch in batches:
+        for doc in batch:
+            created = doc.get("created_at")
+            if isinstance(created, datetime) and span > 0:
+                target = min(int((_naive_utc(created) - start).total_seconds() / step), frames - 1)
+            else:
+                target = frame
+            while frame < target:
+                yield flush()
+                frame, stars = frame + 1, []
+            stars.append(serialize(doc))
+            shown += 1
+    while frame < frames:
+        yield flush()
+        frame, stars = frame + 1, []
@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Dict, Iterable, Iterator, Sequence, Tuple
+
+from flask import Response, current_app, make_response, request, stream_with_context
+
+from .conditional import ConditionalSpec
+from .db import get_default_user_id
+from .metrics import Counter
+
+
+# "memory" (per process), "sqlite" (one file shared by the workers on a
+# host) or "off". Entries are keyed by the user's write versions, so a
+# write anywhere makes older entries unreachable; TTL and the size cap
+# only bound how long unreachable entries linger.
+USER_CACHE_BACKEND = os.getenv("USER_CACHE_BACKEND", "memory").strip().lower()
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "300"))
+USER_CACHE_MAX_MB = float(os.getenv("USER_CACHE_MAX_MB", "64"))
+USER_CACHE_PATH = os.getenv(
+    "USER_CACHE_PATH", os.path.join(tempfile.gettempdir(), "codegalaxy-user-cache.sqlite3")
+)
+
+user_cache_requests = Counter("user_cache_requests_total", "Per-user view cache lookups by view and result.")
+
+
+class MemoryBackend:
+    """
+    LRU of response bodies with a byte budget and per-entry expiry.
+    """
+
+    def __init__(self, max_bytes: int, ttl: float) -> None:
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= time.monotonic():
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key: str, value: bytes) -> None:
+        size = len(key) + len(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+
+    def _drop(self, key: str) -> None:
+        value, _ = self._entries.pop(key)
+        self._bytes -= len(key) + len(value)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "memory", "entries": len(self._entries), "bytes": self._bytes, "max_bytes": self.max_bytes}
+
+
+class SQLiteBackend:
+    """
+    Same contract as MemoryBackend, stored in a WAL-mode SQLite file so
+    all worker processes on a host share one copy. Eviction (expired
+    rows, then least recently used) runs every EVICT_EVERY writes.
+    """
+
+    EVICT_EVERY = 50
+
+    def __init__(self, path: str, max_bytes: int, ttl: float) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._local = threading.local()
+        self._writes = 0
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL,"
+            " expires_at REAL NOT NULL, used_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS entries_used_at ON entries (used_at)")
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key: str) -> bytes | None:
+        now = time.time()
+        conn = self._conn()
+        row = conn.execute("SELECT value, expires_at FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        if row[1] <= now:
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            return None
+        conn.execute("UPDATE entries SET used_at = ? WHERE key = ?", (now, key))
+        return row[0]
+
+    def set(self, key: str, value: bytes) -> None:
+        size = len(key) + len(value)
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO entries (key, value, size, expires_at, used_at) VALUES (?, ?, ?, ?, ?)",
+            (key, sqlite3.Binary(value), size, now + self.ttl, now),
+        )
+        self._writes += 1
+        if self._writes % self.EVICT_EVERY == 0:
+            self.evict()
+
+    def evict(self) -> None:
+        conn = self._conn()
+        conn.execute("DELETE FROM entries WHERE expires_at <= ?", (time.time(),))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        doomed = []
+        for key, size in conn.execute("SELECT key, size FROM entries ORDER BY used_at"):
+            doomed.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        conn.executemany("DELETE FROM entries WHERE key = ?", doomed)
+
+    def clear(self) -> None:
+        self._conn().execute("DELETE FROM entries")
+
+    def stats(self) -> Dict[str, Any]:
+        count, size = self._conn().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        return {"backend": "sqlite", "path": self.path, "entries": count, "bytes": size, "max_bytes": self.max_bytes}
+
+
+def _build_backend():
+    max_bytes = int(USER_CACHE_MAX_MB * 1024 * 1024)
+    if USER_CACHE_BACKEND == "off":
+        return None
+    if USER_CACHE_BACKEND == "sqlite":
+        return SQLiteBackend(USER_CACHE_PATH, max_bytes, USER_CACHE_TTL)
+    if USER_CACHE_BACKEND != "memory":
+        print(f"⚠️  Unknown USER_CACHE_BACKEND={USER_CACHE_BACKEND!r}; using memory")
+    return MemoryBackend(max_bytes, USER_CACHE_TTL)
+
+
+backend = _build_backend()
+
+
+def cache_stats() -> Dict[str, Any]:
+    if backend is None:
+        return {"backend": "off"}
+    return {**backend.stats(), "ttl_seconds": USER_CACHE_TTL}
+
+
+def cached_view(name: str, collections: Sequence[str], vary: Sequence[str] = ()) -> Callable:
+    """
+    Read-through cache for a JSON view of the current user's data.
+
+    The key is the user, the listed query args and the user's write
+    versions for collections; views that write those collections bump the
+    versions (see versions.bumps_versions), so hits are never stale.
+    Only 200 responses are stored.
+    """
+
+    spec = ConditionalSpec(name, tuple(collections), tuple(vary))
+
+    def decorator(view: Callable) -> Callable:
+        @wraps(view)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if backend is None:
+                return view(*args, **kwargs)
+            key = spec.key(get_default_user_id(), request.args)
+
+            body = backend.get(key)
+            if body is not None:
+                user_cache_requests.inc(view=name, result="hit")
+                response = current_app.response_class(body, mimetype="application/json")
+                response.headers["X-Cache"] = "HIT"
+                return response
+
+            user_cache_requests.inc(view=name, result="miss")
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200 and response.mimetype == "application/json":
+                backend.set(key, response.get_data())
+            response.headers["X-Cache"] = "MISS"
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def cached_stream(name: str, key: str, produce: Callable[[], Iterable[bytes]], mimetype: str) -> Response:
+    """
+    cached_view for streamed bodies: a hit is sent from the cache; a miss
+    streams produce() to the client and stores the body once it has been
+    sent completely (an aborted stream stores nothing).
+    """
+    if backend is not None:
+        body = backend.get(key)
+        if body is not None:
+            user_cache_requests.inc(view=name, result="hit")
+            response = current_app.response_class(body, mimetype=mimetype)
+            response.headers["X-Cache"] = "HIT"
+            return response
+        user_cache_requests.inc(view=name, result="miss")
+
+    def tee() -> Iterator[bytes]:
+        parts = []
+        for chunk in produce():
+            parts.append(chunk)
+            yield chunk
+        if backend is not None:
+            backend.set(key, b"".join(parts))
+
+    response = current_app.response_class(stream_with_context(tee()), mimetype=mimetype)
+    response.headers["X-Cache"] = "MISS"
+    return response
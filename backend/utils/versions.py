@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+from functools import wraps
+from typing import Any, Callable, Dict, Iterable
+
+from flask import g, has_request_context
+
+from ..repositories import get_repositories
+from .db import DB_UNAVAILABLE_ERRORS, get_default_user_id
+
+
+# Counters live in the storage backend (a single-document lookup per user
+# on MongoDB) so every worker and serverless instance sees the same stamp.
+
+
+def get_versions(user_id: str) -> Dict[str, int]:
+    """
+    Write counters for user_id, read at most once per request.
+    """
+    if has_request_context():
+        memo = g.setdefault("_user_versions", {})
+        if user_id in memo:
+            return memo[user_id]
+    doc = get_repositories().versions.get(user_id)
+    if has_request_context():
+        memo[user_id] = doc
+    return doc
+
+
+def version_stamp(user_id: str, collections: Iterable[str]) -> str:
+    """
+    "3.17" style stamp for the given collections; changes on every write.
+    """
+    versions = get_versions(user_id)
+    return ".".join(str(versions.get(c, 0)) for c in collections)
+
+
+def bump_versions(user_id: str, *collections: str) -> None:
+    get_repositories().versions.bump(user_id, collections)
+    if has_request_context():
+        g.setdefault("_user_versions", {}).pop(user_id, None)
+
+
+def bumps_versions(*collections: str) -> Callable:
+    """
+    Decorator for mutating views: bump the user's counters for collections
+    once the view has run (also when it failed part-way, since some writes
+    may have landed). Bumping after the write means a concurrent reader
+    can only ever cache stale data under the old, now unreachable, stamp.
+    """
+
+    def decorator(view: Callable) -> Callable:
+        @wraps(view)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            try:
+                return view(*args, **kwargs)
+            finally:
+                try:
+                    bump_versions(get_default_user_id(), *collections)
+                except DB_UNAVAILABLE_ERRORS as e:
+                    print(f"⚠️  Could not bump write versions for {', '.join(collections)}: {e}")
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,125 @@
+"""
+Side-by-side throughput of the WSGI (gunicorn) and ASGI (uvicorn) apps.
+
+Seeds the codegalaxy_bench database once, starts each server on a local
+port with the same number of worker processes, and drives both with the
+loadtest traffic generator over HTTP. Needs a local mongod plus gunicorn
+and uvicorn (and motor for the native async driver):
+
+    python -m benchmarks.asgi_vs_wsgi --stars 10000 --workers 2 --concurrency 32
+    python -m benchmarks.asgi_vs_wsgi --mix read-heavy --json asgi.json
+"""
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List
+
+from .loadtest import BENCH_DB, MIXES, HttpClient, load_app, run_load, seed_database
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_ready(port: int, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+            conn.request("GET", "/status")
+            conn.getresponse().read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"server on port {port} did not start within {timeout:.0f}s")
+
+
+def server_command(kind: str, port: int, workers: int, threads: int) -> List[str]:
+    if kind == "wsgi":
+        return [
+            sys.executable, "-m", "gunicorn", "backend.app:app",
+            "--bind", f"127.0.0.1:{port}", "--workers", str(workers), "--threads", str(threads),
+            "--log-level", "warning",
+        ]
+    return [
+        sys.executable, "-m", "uvicorn", "backend.asgi:app",
+        "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers),
+        "--log-level", "warning",
+    ]
+
+
+def run_server(kind: str, args: argparse.Namespace) -> Dict[str, Any]:
+    port = _free_port()
+    env = {**os.environ, "MONGODB_DB": BENCH_DB, "DB_PROFILE": "server", "DEBUG_ENDPOINTS": "0"}
+    proc = subprocess.Popen(server_command(kind, port, args.workers, args.threads), env=env)
+    try:
+        _wait_ready(port)
+        base = f"http://127.0.0.1:{port}"
+        mix = MIXES[args.mix]
+        run_load(lambda: HttpClient(base), mix, args.warmup, args.concurrency, args.seed + 7)
+        return run_load(lambda: HttpClient(base), mix, args.operations, args.concurrency, args.seed)
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def print_comparison(results: Dict[str, Dict[str, Any]]) -> None:
+    wsgi, asgi = results["wsgi"], results["asgi"]
+    print(f"\n  {'endpoint':<26} {'wsgi rps':>9} {'asgi rps':>9} {'wsgi p95':>9} {'asgi p95':>9} {'wsgi p99':>9} {'asgi p99':>9}")
+    labels = sorted(set(wsgi["endpoints"]) | set(asgi["endpoints"]))
+    rows = [(label, wsgi["endpoints"].get(label), asgi["endpoints"].get(label)) for label in labels]
+    rows.append(("TOTAL", wsgi["total"], asgi["total"]))
+    for label, w, a in rows:
+        if w is None or a is None:
+            continue
+        print(
+            f"  {label:<26} {w['throughput_rps']:>9.1f} {a['throughput_rps']:>9.1f} "
+            f"{w['p95_ms']:>9.2f} {a['p95_ms']:>9.2f} {w['p99_ms']:>9.2f} {a['p99_ms']:>9.2f}"
+        )
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare WSGI and ASGI throughput.")
+    parser.add_argument("--stars", type=int, default=10000, help="seeded galaxy size")
+    parser.add_argument("--mix", choices=sorted(MIXES), default="dashboard")
+    parser.add_argument("--operations", type=int, default=2000)
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=2, help="processes per server")
+    parser.add_argument("--threads", type=int, default=8, help="gunicorn threads per worker")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", dest="json_path")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("MONGODB_URI", "mongodb://localhost:27017")
+    load_app("mongod")
+    from backend.utils.async_db import async_driver
+    from backend.utils.db import get_db
+
+    print(f"seeded {seed_database(get_db(), args.stars, args.seed)}")
+    results = {kind: run_server(kind, args) for kind in ("wsgi", "asgi")}
+    print_comparison(results)
+
+    if args.json_path:
+        meta = {k: v for k, v in vars(args).items() if k != "json_path"}
+        meta["async_driver"] = async_driver()
+        with open(args.json_path, "w") as f:
+            json.dump({"meta": meta, **results}, f, indent=2)
+        print(f"\nwrote {args.json_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""
+Cold-start benchmark for the serverless entry point.
+
+Each run starts a fresh interpreter (like a new Vercel instance), imports
+api/index.py and times the first and second request. Run from the repo root:
+
+    python -m benchmarks.cold_start --runs 5
+    python -m benchmarks.cold_start --modes eager lazy --path /api/tasks
+
+MONGODB_URI is taken from the environment (or backend/.env). Results are
+printed as a table and, with --json, written as JSON for diffing.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Any, Dict, List
+
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+_CHILD = r"""
+import json, sys, time
+t0 = time.perf_counter()
+sys.path.insert(0, {root!r})
+from api.index import app
+t1 = time.perf_counter()
+client = app.test_client()
+r1 = client.get({path!r})
+t2 = time.perf_counter()
+r2 = client.get({path!r})
+t3 = time.perf_counter()
+print("__RESULT__" + json.dumps({{
+    "import_ms": (t1 - t0) * 1000,
+    "first_request_ms": (t2 - t1) * 1000,
+    "warm_request_ms": (t3 - t2) * 1000,
+    "status": [r1.status_code, r2.status_code],
+}}))
+"""
+
+
+def run_once(mode: str, path: str) -> Dict[str, Any]:
+    env = dict(os.environ)
+    env["STARTUP_MODE"] = mode
+    env.setdefault("DB_PROFILE", "serverless")
+    proc = subprocess.run(
+        [sys.executable, "-c", _CHILD.format(root=REPO_ROOT, path=path)],
+        cwd=REPO_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    for line in proc.stdout.splitlines():
+        if line.startswith("__RESULT__"):
+            return json.loads(line[len("__RESULT__"):])
+    raise RuntimeError(f"benchmark child failed:\n{proc.stdout}\n{proc.stderr}")
+
+
+def summarize(samples: List[Dict[str, Any]]) -> Dict[str, Any]:
+    out: Dict[str, Any] = {"runs": len(samples)}
+    for key in ("import_ms", "first_request_ms", "warm_request_ms"):
+        values = [s[key] for s in samples]
+        out[key] = {
+            "median": statistics.median(values),
+            "min": min(values),
+            "max": max(values),
+        }
+    cold = [s["import_ms"] + s["first_request_ms"] for s in samples]
+    out["cold_total_ms"] = {"median": statistics.median(cold), "min": min(cold), "max": max(cold)}
+    out["statuses"] = sorted({tuple(s["status"]) for s in samples})
+    return out
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--modes", nargs="+", default=["eager", "lazy"])
+    parser.add_argument("--path", default="/api/tasks")
+    parser.add_argument("--json", dest="json_path", help="write results to this file")
+    args = parser.parse_args(argv)
+
+    results: Dict[str, Any] = {"path": args.path, "modes": {}}
+    for mode in args.modes:
+        samples = [run_once(mode, args.path) for _ in range(args.runs)]
+        results["modes"][mode] = summarize(samples)
+
+    print(f"{'mode':<8} {'import':>10} {'1st req':>10} {'cold total':>12} {'warm req':>10}  (median ms)")
+    for mode, r in results["modes"].items():
+        print(
+            f"{mode:<8} {r['import_ms']['median']:>10.1f} {r['first_request_ms']['median']:>10.1f} "
+            f"{r['cold_total_ms']['median']:>12.1f} {r['warm_request_ms']['median']:>10.1f}"
+        )
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(results, f, indent=2, default=list)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
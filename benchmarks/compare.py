@@ -0,0 +1,70 @@
+"""
+Diff two loadtest JSON reports.
+
+    python -m benchmarks.compare before.json after.json [--metric p95_ms]
+
+Prints per scale/endpoint latency and throughput with the relative change;
+negative latency deltas are improvements.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from typing import Any, Dict, List
+
+
+def _pct(old: float, new: float) -> str:
+    if not old:
+        return "   n/a"
+    return f"{(new - old) / old * 100:+6.1f}%"
+
+
+def compare(before: Dict[str, Any], after: Dict[str, Any], metric: str) -> List[str]:
+    lines = [
+        f"before: {before['meta'].get('commit')} ({before['meta'].get('backend')}, c={before['meta'].get('concurrency')})",
+        f"after:  {after['meta'].get('commit')} ({after['meta'].get('backend')}, c={after['meta'].get('concurrency')})",
+    ]
+    for scale in sorted(set(before["scales"]) | set(after["scales"]), key=int):
+        b_scale = before["scales"].get(scale)
+        a_scale = after["scales"].get(scale)
+        if b_scale is None or a_scale is None:
+            lines.append(f"\nscale={scale}: only in {'after' if b_scale is None else 'before'}")
+            continue
+        lines.append(f"\nscale={scale}")
+        lines.append(f"  {'endpoint':<34} {metric + ' before':>14} {'after':>9} {'delta':>8} {'rps delta':>10}")
+        b_eps, a_eps = b_scale["endpoints"], a_scale["endpoints"]
+        for label in sorted(set(b_eps) | set(a_eps)):
+            b, a = b_eps.get(label), a_eps.get(label)
+            if b is None or a is None:
+                lines.append(f"  {label:<34} {'(missing)':>14}")
+                continue
+            lines.append(
+                f"  {label:<34} {b[metric]:>14.2f} {a[metric]:>9.2f} {_pct(b[metric], a[metric]):>8} "
+                f"{_pct(b['throughput_rps'], a['throughput_rps']):>10}"
+            )
+        b, a = b_scale["total"], a_scale["total"]
+        lines.append(
+            f"  {'TOTAL':<34} {b[metric]:>14.2f} {a[metric]:>9.2f} {_pct(b[metric], a[metric]):>8} "
+            f"{_pct(b['throughput_rps'], a['throughput_rps']):>10}"
+        )
+    return lines
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Diff two loadtest JSON reports.")
+    parser.add_argument("before")
+    parser.add_argument("after")
+    parser.add_argument("--metric", choices=["p50_ms", "p95_ms", "p99_ms"], default="p95_ms")
+    args = parser.parse_args(argv)
+
+    with open(args.before) as f:
+        before = json.load(f)
+    with open(args.after) as f:
+        after = json.load(f)
+    print("\n".join(compare(before, after, args.metric)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
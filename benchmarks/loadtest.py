@@ -0,0 +1,478 @@
+"""
+Load test: seed a galaxy at several scales and drive a traffic mix.
+
+Runs the Flask app in-process (or against --url) with a configurable
+number of concurrent workers, and reports p50/p95/p99 latency and
+throughput per endpoint. Run from the repo root:
+
+    # local mongod (uses the codegalaxy_bench database, never codegalaxy)
+    python -m benchmarks.loadtest --scales 100 1000 10000 --concurrency 8
+
+    # no server at all: in-memory stand-in (pip install mongomock);
+    # requests are serialized, so use it for smoke runs, not numbers
+    python -m benchmarks.loadtest --backend memory --scales 100 1000
+
+    # save, then diff two runs
+    python -m benchmarks.loadtest --json before.json
+    python -m benchmarks.compare before.json after.json
+
+Seeding is deterministic for a given --seed, so runs are comparable
+across commits.
+"""
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Tuple
+from urllib.parse import urlparse
+
+
+BENCH_DB = "codegalaxy_bench"
+USER_ID = "demo-user"
+MOODS = ["calm", "focus", "happy", "energy", "neutral"]
+CATEGORIES = ["Personal", "Work", "Life", "Study"]
+
+# Relative weights of each operation per traffic mix.
+MIXES: Dict[str, Dict[str, int]] = {
+    "default": {
+        "canvas_load": 25,
+        "task_list": 20,
+        "stats_dashboard": 20,
+        "calendar_month": 15,
+        "session_finish": 10,
+        "task_crud": 10,
+    },
+    "read-heavy": {
+        "canvas_load": 40,
+        "task_list": 25,
+        "stats_dashboard": 25,
+        "calendar_month": 10,
+    },
+    "dashboard": {
+        "dashboard": 60,
+        "canvas_load": 20,
+        "task_list": 20,
+    },
+    "write-heavy": {
+        "session_finish": 40,
+        "task_crud": 40,
+        "canvas_load": 10,
+        "stats_dashboard": 10,
+    },
+}
+
+
+# ---------------------------------------------------------------- seeding
+
+
+def seed_database(db, scale: int, seed: int) -> Dict[str, int]:
+    """
+    Replace the bench database contents with a deterministic galaxy:
+    `scale` sessions (one star each) spread over the last year, plus
+    scale/10 tasks and scale/20 calendar events.
+    """
+    from backend.seeds.seed_moods import MOODS as MOOD_ROWS
+    from backend.utils.generations import current_generation
+    from backend.utils.reference_cache import DEFAULT_MOOD_PALETTE
+    from backend.utils.star_logic import duration_to_radius, duration_to_type
+    from backend.utils.versions import bump_versions
+
+    if db.name == "codegalaxy":
+        raise RuntimeError("refusing to seed the main codegalaxy database")
+
+    rng = random.Random(seed)
+    for name in ("tasks", "sessions", "celestial_objects", "calendar_events", "galaxy_layout", "galaxy_stats", "moods"):
+        db[name].delete_many({})
+    db.moods.insert_many([dict(m) for m in MOOD_ROWS])
+
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    # Earlier runs may have reset the galaxy; seed into the live generation.
+    generation = current_generation(USER_ID)
+    sessions, stars = [], []
+    for i in range(scale):
+        duration = rng.choice([5, 15, 25, 25, 45, 60, 90])
+        mood = rng.choice(MOODS)
+        started = now - timedelta(days=rng.randint(0, 364), minutes=rng.randint(0, 1439))
+        sessions.append({
+            "user_id": USER_ID,
+            "task_id": None,
+            "mood": mood,
+            "duration_minutes": float(duration),
+            "started_at": started,
+            "ended_at": started + timedelta(minutes=duration),
+            "created_at": started,
+            "generation": generation,
+        })
+        stars.append({
+            "user_id": USER_ID,
+            "session_id": None,
+            "type": duration_to_type(duration),
+            "radius": duration_to_radius(duration),
+            "color": DEFAULT_MOOD_PALETTE[mood],
+            "spiral_index": i + 1,
+            "created_at": started,
+            "meta": {"duration_minutes": float(duration), "mood": mood},
+            "generation": generation,
+        })
+
+    tasks = [
+        {
+            "user_id": USER_ID,
+            "title": f"Task {i}",
+            "description": "Benchmark task",
+            "date": (now - timedelta(days=rng.randint(-30, 180))).date().isoformat(),
+            "due_at": None,
+            "priority": rng.choice(["Low", "Medium", "High"]),
+            "category": rng.choice(CATEGORIES),
+            "completed": rng.random() < 0.5,
+            "created_at": now - timedelta(days=rng.randint(0, 180)),
+        }
+        for i in range(max(10, scale // 10))
+    ]
+    events = [
+        {
+            "user_id": USER_ID,
+            "title": f"Event {i}",
+            "date": (now - timedelta(days=rng.randint(-60, 300))).date().isoformat(),
+            "time": f"{rng.randint(8, 20):02d}:00",
+            "category": rng.choice(CATEGORIES),
+            "created_at": now,
+        }
+        for i in range(max(5, scale // 20))
+    ]
+
+    for name, docs in (("sessions", sessions), ("celestial_objects", stars), ("tasks", tasks), ("calendar_events", events)):
+        for start in range(0, len(docs), 5000):
+            db[name].insert_many(docs[start:start + 5000], ordered=False)
+    bump_versions(USER_ID, "sessions", "celestial_objects", "tasks", "calendar_events", "galaxy_layout")
+    return {"sessions": len(sessions), "stars": len(stars), "tasks": len(tasks), "events": len(events)}
+
+
+# ---------------------------------------------------------------- clients
+
+
+def _server_ms(header: str | None) -> float | None:
+    # Server-Timing: app;dur=12.34, db;dur=...
+    if not header:
+        return None
+    for part in header.split(","):
+        part = part.strip()
+        if part.startswith("app;dur="):
+            try:
+                return float(part.split("=", 1)[1].split(";")[0])
+            except ValueError:
+                return None
+    return None
+
+
+class InProcessClient:
+    def __init__(self, app, lock: threading.Lock | None = None) -> None:
+        self._client = app.test_client()
+        self._lock = lock
+
+    def request(self, method: str, path: str, body: Any = None) -> Tuple[int, Any, float | None]:
+        if self._lock is not None:
+            with self._lock:
+                resp = self._client.open(path, method=method, json=body)
+        else:
+            resp = self._client.open(path, method=method, json=body)
+        data = resp.get_json(silent=True)
+        return resp.status_code, data, _server_ms(resp.headers.get("Server-Timing"))
+
+
+class HttpClient:
+    """
+    One keep-alive connection per worker thread.
+    """
+
+    def __init__(self, base_url: str) -> None:
+        parsed = urlparse(base_url)
+        conn_cls = http.client.HTTPSConnection if parsed.scheme == "https" else http.client.HTTPConnection
+        self._conn = conn_cls(parsed.hostname, parsed.port, timeout=30)
+
+    def request(self, method: str, path: str, body: Any = None) -> Tuple[int, Any, float | None]:
+        headers = {"Accept-Encoding": "identity"}
+        payload = None
+        if body is not None:
+            payload = json.dumps(body)
+            headers["Content-Type"] = "application/json"
+        self._conn.request(method, path, body=payload, headers=headers)
+        resp = self._conn.getresponse()
+        raw = resp.read()
+        try:
+            data = json.loads(raw) if raw else None
+        except ValueError:
+            data = None
+        return resp.status, data, _server_ms(resp.getheader("Server-Timing"))
+
+
+# ---------------------------------------------------------------- recording
+
+
+class Recorder:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.latencies: Dict[str, List[float]] = {}
+        self.server: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+
+    def timed(self, client, label: str, method: str, path: str, body: Any = None) -> Any:
+        t0 = time.perf_counter()
+        try:
+            status, data, server_ms = client.request(method, path, body)
+        except Exception:
+            status, data, server_ms = 599, None, None
+        elapsed = (time.perf_counter() - t0) * 1000
+        with self._lock:
+            self.latencies.setdefault(label, []).append(elapsed)
+            if server_ms is not None:
+                self.server.setdefault(label, []).append(server_ms)
+            if status >= 400:
+                self.errors[label] = self.errors.get(label, 0) + 1
+        return data
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100.0 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[rank]
+
+
+def summarize(rec: Recorder, wall_seconds: float) -> Dict[str, Any]:
+    endpoints: Dict[str, Any] = {}
+    all_values: List[float] = []
+    for label, values in sorted(rec.latencies.items()):
+        values = sorted(values)
+        all_values.extend(values)
+        server = sorted(rec.server.get(label, []))
+        endpoints[label] = {
+            "count": len(values),
+            "errors": rec.errors.get(label, 0),
+            "throughput_rps": len(values) / wall_seconds if wall_seconds else 0.0,
+            "mean_ms": sum(values) / len(values),
+            "p50_ms": percentile(values, 50),
+            "p95_ms": percentile(values, 95),
+            "p99_ms": percentile(values, 99),
+            "max_ms": values[-1],
+            "server_p50_ms": percentile(server, 50) if server else None,
+        }
+    all_values.sort()
+    total = {
+        "count": len(all_values),
+        "errors": sum(rec.errors.values()),
+        "throughput_rps": len(all_values) / wall_seconds if wall_seconds else 0.0,
+        "p50_ms": percentile(all_values, 50),
+        "p95_ms": percentile(all_values, 95),
+        "p99_ms": percentile(all_values, 99),
+        "wall_seconds": wall_seconds,
+    }
+    return {"endpoints": endpoints, "total": total}
+
+
+# ---------------------------------------------------------------- traffic
+
+
+def op_canvas_load(client, rec: Recorder, rng: random.Random) -> None:
+    rec.timed(client, "GET /api/galaxy/data", "GET", "/api/galaxy/data")
+
+
+def op_task_list(client, rec: Recorder, rng: random.Random) -> None:
+    rec.timed(client, "GET /tasks", "GET", "/tasks")
+
+
+def op_stats_dashboard(client, rec: Recorder, rng: random.Random) -> None:
+    for path in ("/stats/summary", "/stats/streak", "/stats/weekly"):
+        rec.timed(client, f"GET {path}", "GET", path)
+
+
+def op_dashboard(client, rec: Recorder, rng: random.Random) -> None:
+    rec.timed(client, "GET /stats/dashboard", "GET", "/stats/dashboard")
+
+
+def op_calendar_month(client, rec: Recorder, rng: random.Random) -> None:
+    day = datetime.now(timezone.utc) - timedelta(days=rng.randint(0, 300))
+    rec.timed(client, "GET /calendar?month", "GET", f"/calendar?month={day.month}&year={day.year}")
+
+
+def op_session_finish(client, rec: Recorder, rng: random.Random) -> None:
+    body = {"mood": rng.choice(MOODS), "duration_minutes": rng.choice([15, 25, 45])}
+    rec.timed(client, "POST /sessions", "POST", "/sessions", body)
+
+
+def op_task_crud(client, rec: Recorder, rng: random.Random) -> None:
+    created = rec.timed(client, "POST /tasks", "POST", "/tasks", {
+        "title": "Load test task",
+        "date": datetime.now(timezone.utc).date().isoformat(),
+        "category": rng.choice(CATEGORIES),
+    })
+    task_id = (created or {}).get("id")
+    if not task_id:
+        return
+    rec.timed(client, "PUT /tasks/<id>", "PUT", f"/tasks/{task_id}", {"priority": "High"})
+    rec.timed(client, "PATCH /tasks/<id>/complete", "PATCH", f"/tasks/{task_id}/complete")
+    rec.timed(client, "DELETE /tasks/<id>", "DELETE", f"/tasks/{task_id}")
+
+
+OPERATIONS: Dict[str, Callable[[Any, Recorder, random.Random], None]] = {
+    "canvas_load": op_canvas_load,
+    "task_list": op_task_list,
+    "stats_dashboard": op_stats_dashboard,
+    "dashboard": op_dashboard,
+    "calendar_month": op_calendar_month,
+    "session_finish": op_session_finish,
+    "task_crud": op_task_crud,
+}
+
+
+def run_load(make_client: Callable[[], Any], mix: Dict[str, int], operations: int,
+             concurrency: int, seed: int) -> Dict[str, Any]:
+    """
+    Run `operations` weighted operations across `concurrency` threads.
+    """
+    names = list(mix)
+    weights = [mix[n] for n in names]
+    rec = Recorder()
+    remaining = [operations]
+    lock = threading.Lock()
+
+    def worker(idx: int) -> None:
+        rng = random.Random(seed * 1000 + idx)
+        client = make_client()
+        while True:
+            with lock:
+                if remaining[0] <= 0:
+                    return
+                remaining[0] -= 1
+            OPERATIONS[rng.choices(names, weights)[0]](client, rec, rng)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return summarize(rec, time.perf_counter() - t0)
+
+
+# ---------------------------------------------------------------- main
+
+
+def _git_commit() -> str | None:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5)
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+
+def load_app(backend: str):
+    """
+    Import the app against the bench database. Must run before anything
+    else imports backend.*.
+    """
+    os.environ["MONGODB_DB"] = BENCH_DB
+    os.environ.setdefault("DEBUG_ENDPOINTS", "0")
+    if backend == "memory":
+        import mongomock
+        import pymongo
+
+        pymongo.MongoClient = mongomock.MongoClient
+    from backend.app import app
+
+    return app
+
+
+def print_report(scale: int, seeded: Dict[str, int], result: Dict[str, Any]) -> None:
+    print(f"\nscale={scale}  seeded={seeded}")
+    print(f"  {'endpoint':<34} {'n':>6} {'err':>4} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for label, r in result["endpoints"].items():
+        print(f"  {label:<34} {r['count']:>6} {r['errors']:>4} {r['throughput_rps']:>8.1f} "
+              f"{r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} {r['p99_ms']:>8.2f}")
+    t = result["total"]
+    print(f"  {'TOTAL':<34} {t['count']:>6} {t['errors']:>4} {t['throughput_rps']:>8.1f} "
+          f"{t['p50_ms']:>8.2f} {t['p95_ms']:>8.2f} {t['p99_ms']:>8.2f}")
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--backend", choices=["mongod", "memory"], default="mongod",
+                        help="mongod uses MONGODB_URI (default localhost); memory needs mongomock")
+    parser.add_argument("--allow-remote", action="store_true",
+                        help="permit a non-localhost MONGODB_URI (writes go to the codegalaxy_bench database)")
+    parser.add_argument("--url", help="drive a running server instead of the in-process app")
+    parser.add_argument("--scales", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--mix", choices=sorted(MIXES), default="default")
+    parser.add_argument("--operations", type=int, default=500, help="operations per scale")
+    parser.add_argument("--warmup", type=int, default=20, help="unrecorded operations per scale")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", dest="json_path", help="write results to this file")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("MONGODB_URI", "mongodb://localhost:27017")
+    if args.backend == "mongod" and not args.allow_remote:
+        host = urlparse(os.environ["MONGODB_URI"]).hostname or ""
+        if host not in ("localhost", "127.0.0.1", "::1"):
+            parser.error(f"MONGODB_URI points at {host}; pass --allow-remote to benchmark against it")
+    app = load_app(args.backend)
+    from backend.utils.db import DatabaseUnavailable, get_db
+    from backend.utils.reference_cache import invalidate
+
+    if args.url:
+        make_client = lambda: HttpClient(args.url)  # noqa: E731
+    else:
+        # mongomock is not thread-safe: with the memory backend requests
+        # still come from N workers but reach the app one at a time.
+        lock = threading.Lock() if args.backend == "memory" else None
+        make_client = lambda: InProcessClient(app, lock)  # noqa: E731
+
+    mix = MIXES[args.mix]
+    report: Dict[str, Any] = {
+        "meta": {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "backend": args.backend,
+            "target": args.url or "in-process",
+            "mix": args.mix,
+            "weights": mix,
+            "operations": args.operations,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+            "started_at": datetime.now(timezone.utc).isoformat(),
+        },
+        "scales": {},
+    }
+
+    for scale in args.scales:
+        try:
+            seeded = seed_database(get_db(), scale, args.seed)
+        except DatabaseUnavailable as e:
+            print(f"❌ {e}")
+            return 1
+        invalidate()
+        if args.warmup:
+            run_load(make_client, mix, args.warmup, min(args.concurrency, args.warmup), args.seed + 7)
+        result = run_load(make_client, mix, args.operations, args.concurrency, args.seed)
+        result["seeded"] = seeded
+        report["scales"][str(scale)] = result
+        print_report(scale, seeded, result)
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nwrote {args.json_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
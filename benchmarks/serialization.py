@@ -0,0 +1,121 @@
+"""
+Micro-benchmark: serializing a 100k-star galaxy payload.
+
+Compares the old per-document serializer + Flask's default JSON provider
+with the field-table Serializer + BSONJSONProvider (stdlib and orjson).
+No database is needed. Run from the repo root:
+
+    python -m benchmarks.serialization --stars 100000 --repeat 5
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List
+
+from bson import ObjectId
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from backend.routes.galaxy import serialize_celestial
+from backend.utils import json_provider
+from backend.utils.json_provider import BSONJSONProvider
+
+
+def legacy_serialize_celestial(doc):
+    # The hand-written serializer this benchmark replaced.
+    return {
+        "id": str(doc["_id"]),
+        "type": doc.get("type"),
+        "radius": doc.get("radius"),
+        "color": doc.get("color"),
+        "x": doc.get("x"),
+        "y": doc.get("y"),
+        "created_at": doc.get("created_at"),
+        "session_id": doc.get("session_id"),
+        "meta": doc.get("meta", {}),
+    }
+
+
+def make_stars(n: int, seed: int = 42) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 1)
+    moods = ["calm", "focus", "happy", "energy", "neutral"]
+    return [
+        {
+            "_id": ObjectId(),
+            "user_id": "demo-user",
+            "session_id": str(ObjectId()),
+            "type": rng.choice(["tiny_star", "star", "planet", "comet"]),
+            "radius": rng.uniform(4, 40),
+            "color": "#5D8BF4",
+            "x": rng.uniform(-2000, 2000),
+            "y": rng.uniform(-2000, 2000),
+            "created_at": start + timedelta(minutes=i * 7),
+            "meta": {"duration_minutes": rng.randint(5, 90), "mood": rng.choice(moods)},
+        }
+        for i in range(n)
+    ]
+
+
+def best_of(repeat: int, fn: Callable[[], Any]) -> float:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return min(times) * 1000
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--stars", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", dest="json_path", help="write results to this file")
+    args = parser.parse_args(argv)
+
+    docs = make_stars(args.stars)
+    app = Flask(__name__)
+    default_provider = DefaultJSONProvider(app)
+    fast_provider = BSONJSONProvider(app)
+
+    cases: Dict[str, Callable[[], Any]] = {}
+    cases["legacy serializer"] = lambda: [legacy_serialize_celestial(d) for d in docs]
+    cases["Serializer"] = lambda: [serialize_celestial(d) for d in docs]
+
+    rows = [serialize_celestial(d) for d in docs]
+    cases["default provider dumps"] = lambda: default_provider.dumps(rows)
+    results: Dict[str, float] = {}
+
+    with app.app_context():
+        for name, fn in cases.items():
+            results[name] = best_of(args.repeat, fn)
+        fast_provider.use_orjson = False
+        results["bson provider (stdlib)"] = best_of(args.repeat, lambda: fast_provider.dumps_bytes(rows))
+        if json_provider.orjson is not None:
+            fast_provider.use_orjson = True
+            results["bson provider (orjson)"] = best_of(args.repeat, lambda: fast_provider.dumps_bytes(rows))
+
+        results["end-to-end legacy"] = best_of(
+            args.repeat, lambda: default_provider.response([legacy_serialize_celestial(d) for d in docs])
+        )
+        results["end-to-end new"] = best_of(
+            args.repeat, lambda: fast_provider.response([serialize_celestial(d) for d in docs])
+        )
+
+    print(f"{args.stars} stars, best of {args.repeat}")
+    for name, ms in results.items():
+        print(f"  {name:<26} {ms:>9.1f} ms")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({"stars": args.stars, "results_ms": results}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,183 @@
+"""
+Benchmark: the storage repositories on MongoDB vs embedded SQLite.
+
+Runs the same workloads (seeding, the hot reads behind the dashboard and
+galaxy canvas, and the small writes) directly against each engine's
+repositories, so the numbers compare storage, not HTTP. Run from the
+repo root:
+
+    python -m benchmarks.storage_bench --stars 10000 --ops 500
+    python -m benchmarks.storage_bench --mongo memory   # mongomock, no server
+    python -m benchmarks.storage_bench --mongo off      # SQLite only
+
+The live MongoDB run uses the codegalaxy_bench database and removes its
+documents afterwards.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List
+
+from .loadtest import BENCH_DB, percentile
+
+BENCH_USER = "bench-storage"
+
+
+def seed(repos, stars: int, rng: random.Random) -> float:
+    """
+    Insert stars (one session each, in batches) and 200 tasks; returns ms.
+    """
+    start = datetime.utcnow() - timedelta(days=365)
+    t0 = time.perf_counter()
+    batch: List[Dict[str, Any]] = []
+    for i in range(stars):
+        at = start + timedelta(minutes=i * 5)
+        batch.append({
+            "user_id": BENCH_USER, "generation": 0, "session_id": f"seed-{i}", "type": "star",
+            "radius": rng.uniform(4, 40), "color": "#5D8BF4", "spiral_index": i + 1, "created_at": at,
+            "meta": {"seed": True},
+        })
+        if len(batch) == 1000:
+            repos.celestial.create_many(batch)
+            batch = []
+    repos.celestial.create_many(batch)
+    for i in range(stars // 10):
+        at = start + timedelta(minutes=i * 50)
+        repos.sessions.create({
+            "user_id": BENCH_USER, "generation": 0, "task_id": None, "mood": "focus",
+            "duration_minutes": float(rng.randint(5, 90)), "started_at": at, "ended_at": at, "created_at": at,
+        })
+    for i in range(200):
+        repos.tasks.create({
+            "user_id": BENCH_USER, "title": f"task {i}", "description": "", "date": f"2026-{i % 12 + 1:02d}-01",
+            "due_at": None, "priority": "Medium", "category": rng.choice(["Work", "Study", "Life"]),
+            "completed": i % 3 == 0, "created_at": datetime.utcnow(),
+        })
+    return (time.perf_counter() - t0) * 1000
+
+
+def workloads(repos, rng: random.Random) -> Dict[str, Callable[[], Any]]:
+    star_ids = [d["_id"] for d in repos.celestial.positions(BENCH_USER, 0)]
+    week_ago = datetime.utcnow() - timedelta(days=7)
+
+    def session_and_star() -> None:
+        now = datetime.utcnow()
+        session_id = repos.sessions.create({
+            "user_id": BENCH_USER, "generation": 0, "task_id": None, "mood": "calm",
+            "duration_minutes": 25.0, "started_at": now, "ended_at": now, "created_at": now,
+        })
+        repos.celestial.create({
+            "user_id": BENCH_USER, "generation": 0, "session_id": session_id, "type": "star", "radius": 8.0,
+            "color": "#5D8BF4", "spiral_index": 1, "created_at": now, "meta": {},
+        })
+
+    return {
+        "list galaxy": lambda: repos.celestial.list(BENCH_USER, 0),
+        "list tasks": lambda: repos.tasks.list(BENCH_USER),
+        "list tasks (category)": lambda: repos.tasks.list(BENCH_USER, "Work", False),
+        "count stars": lambda: repos.celestial.count(BENCH_USER, 0),
+        "session totals": lambda: repos.sessions.totals(BENCH_USER, 0),
+        "sessions this week": lambda: repos.sessions.started_since(BENCH_USER, 0, week_ago),
+        "get versions": lambda: repos.versions.get(BENCH_USER),
+        "bump versions": lambda: repos.versions.bump(BENCH_USER, ("tasks", "sessions")),
+        "create task": lambda: repos.tasks.create({
+            "user_id": BENCH_USER, "title": "bench", "date": "2026-10-19", "completed": False,
+            "created_at": datetime.utcnow(),
+        }),
+        "session + star": session_and_star,
+        "move star": lambda: repos.celestial.move_many(
+            BENCH_USER, 0, {str(rng.choice(star_ids)): (rng.uniform(-2000, 2000), rng.uniform(-2000, 2000))}
+        ),
+    }
+
+
+def measure(fn: Callable[[], Any], ops: int, slow_ops: int, name: str) -> Dict[str, float]:
+    # Full-galaxy reads are orders of magnitude slower than point queries.
+    n = slow_ops if name == "list galaxy" else ops
+    samples = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    samples.sort()
+    return {"n": n, "p50_ms": percentile(samples, 50), "p95_ms": percentile(samples, 95)}
+
+
+def run_engine(repos, args: argparse.Namespace) -> Dict[str, Any]:
+    rng = random.Random(args.seed)
+    result: Dict[str, Any] = {"seed_ms": seed(repos, args.stars, rng), "workloads": {}}
+    for name, fn in workloads(repos, rng).items():
+        result["workloads"][name] = measure(fn, args.ops, args.galaxy_ops, name)
+    return result
+
+
+def cleanup_mongo() -> None:
+    from backend.utils.db import get_db
+
+    db = get_db()
+    for name in ("tasks", "sessions", "celestial_objects", "galaxy_layout"):
+        db[name].delete_many({"user_id": BENCH_USER})
+    db.user_versions.delete_one({"_id": BENCH_USER})
+
+
+def print_table(results: Dict[str, Dict[str, Any]]) -> None:
+    engines = list(results)
+    print(f"  {'seed':<24}" + "".join(f" {results[e]['seed_ms']:>19.1f}ms" for e in engines))
+    print(f"  {'workload':<24}" + "".join(f" {e + ' p50/p95 (ms)':>21}" for e in engines))
+    for name in results[engines[0]]["workloads"]:
+        cells = []
+        for e in engines:
+            w = results[e]["workloads"][name]
+            cells.append(f" {w['p50_ms']:>10.3f} /{w['p95_ms']:>9.3f}")
+        print(f"  {name:<24}" + "".join(cells))
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare the MongoDB and SQLite storage backends.")
+    parser.add_argument("--stars", type=int, default=10000, help="seeded galaxy size")
+    parser.add_argument("--ops", type=int, default=500, help="iterations per workload")
+    parser.add_argument("--galaxy-ops", type=int, default=20, help="iterations of the full galaxy read")
+    parser.add_argument("--mongo", choices=["live", "memory", "off"], default="live",
+                        help="live: MONGODB_URI (bench database); memory: mongomock; off: skip")
+    parser.add_argument("--sqlite-path", help="database file (default: a temporary file)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", dest="json_path")
+    args = parser.parse_args(argv)
+
+    os.environ["MONGODB_DB"] = BENCH_DB
+    if args.mongo == "memory":
+        import mongomock
+        import pymongo
+
+        pymongo.MongoClient = mongomock.MongoClient
+    from backend.repositories import mongo_repositories, sqlite_repositories
+
+    results: Dict[str, Dict[str, Any]] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.sqlite_path or os.path.join(tmp, "bench.sqlite3")
+        results["sqlite"] = run_engine(sqlite_repositories(path), args)
+    if args.mongo != "off":
+        name = "mongo" if args.mongo == "live" else "mongomock"
+        try:
+            results[name] = run_engine(mongo_repositories(), args)
+        finally:
+            cleanup_mongo()
+
+    print(f"{args.stars} stars, {args.ops} ops per workload ({args.galaxy_ops} for list galaxy)")
+    print_table(results)
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({"stars": args.stars, "ops": args.ops, "results": results}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
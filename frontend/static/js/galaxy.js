@@ -78,6 +78,7 @@ document.addEventListener('DOMContentLoaded', () => {
     loadGalaxy().then(() => {
         // Start animation after initial load
         animate();
+        subscribeGalaxyEvents();
     });
 });
 
@@ -93,17 +94,7 @@ async function loadGalaxy() {
         const response = await fetch('/api/galaxy/data');
         const objects = await response.json();
 
-        galaxyObjects = objects.map((obj, index) => ({
-            id: obj.id,
-            x: obj.x ?? 0,
-            y: obj.y ?? 0,
-            radius: obj.radius ?? 6,
-            color: obj.color || '#FFD700', // Golden default
-            type: obj.type || 'star',
-            created_at: obj.created_at ? new Date(obj.created_at) : new Date(),
-            // for simple animation timing
-            index,
-        }));
+        galaxyObjects = objects.map(toGalaxyObject);
 
         updateGalaxyStats();
         markLayoutDirty(false);
@@ -112,9 +103,74 @@ async function loadGalaxy() {
     }
 }
 
+function toGalaxyObject(obj, index) {
+    return {
+        id: obj.id,
+        x: obj.x ?? 0,
+        y: obj.y ?? 0,
+        radius: obj.radius ?? 6,
+        color: obj.color || '#FFD700', // Golden default
+        type: obj.type || 'star',
+        created_at: obj.created_at ? new Date(obj.created_at) : new Date(),
+        // for simple animation timing
+        index,
+    };
+}
+
 // Make loadGalaxy available globally for task completion
 window.loadGalaxy = loadGalaxy;
 
+// ==================== LIVE UPDATES (SSE) ====================
+// Applies changes made in other tabs (or by this one) without refetching.
+// Only when the server rendered the page with live updates on.
+function subscribeGalaxyEvents() {
+    if (!window.EventSource || document.body.dataset.liveUpdates !== 'on') return;
+    const source = new EventSource('/api/events');
+
+    source.addEventListener('star-created', (e) => {
+        const { stars } = JSON.parse(e.data);
+        stars.forEach((obj) => {
+            if (!galaxyObjects.some((o) => o.id === obj.id)) {
+                galaxyObjects.push(toGalaxyObject(obj, galaxyObjects.length));
+            }
+        });
+        updateGalaxyStats();
+    });
+
+    source.addEventListener('star-moved', (e) => {
+        // Don't yank stars out from under an unsaved local arrangement.
+        if (dragState.active || layoutDirty) return;
+        const { stars } = JSON.parse(e.data);
+        stars.forEach(({ id, x, y }) => {
+            const obj = galaxyObjects.find((o) => o.id === id);
+            if (obj) {
+                obj.x = x;
+                obj.y = y;
+            }
+        });
+    });
+
+    source.addEventListener('star-deleted', (e) => {
+        const ids = new Set(JSON.parse(e.data).ids);
+        galaxyObjects = galaxyObjects.filter((o) => !ids.has(o.id));
+        updateGalaxyStats();
+    });
+
+    source.addEventListener('task-changed', () => {
+        if (typeof loadTasks === 'function') loadTasks();
+    });
+
+    source.addEventListener('stats-changed', () => {
+        if (typeof loadStats === 'function') loadStats();
+    });
+
+    source.addEventListener('resync', () => {
+        loadGalaxy();
+        if (typeof loadTasks === 'function') loadTasks();
+        if (typeof loadStats === 'function') loadStats();
+    });
+}
+
 function updateGalaxyStats() {
     const starCount = galaxyObjects.filter(obj => obj.type === 'star' || obj.type === 'tiny_star').length;
     const planetCount = galaxyObjects.filter(obj => obj.type === 'planet').length;